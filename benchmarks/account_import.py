@@ -0,0 +1,77 @@
+"""Throughput of AccountImporter on a CSV body, against the number of worker processes validating it.
+
+A CSV body of --rows accounts, a few of them invalid, is fed to the importer in reads of 64 KiB, as a request body is
+received, and created in the repository selected. Worker counts of 0 validate in the event loop. Pools are started
+before the clock does, as a server keeps them between imports.
+
+Run from the root of the project, for instance:
+
+    PYTHONPATH=src python benchmarks/account_import.py --rows 1000000 --workers 0 1 2 4
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import AsyncIterator, List
+
+from application.services.account_importer import AccountImporter
+from application.services.account_service import AccountService
+from infrastructure.metrics.registry import MetricsRegistry
+from infrastructure.repositories.account.factory import build_account_repository
+from settings import Settings
+
+_READ_SIZE = 64 * 1024
+
+
+def _csv(rows: int) -> bytes:
+    generator = random.Random(rows)
+    lines = [b'name,age']
+    for index in range(rows):
+        # One row in a thousand has an invalid age.
+        age = -1 if index % 1000 == 999 else generator.randrange(100)
+        lines.append(f'name {generator.randrange(1_000_000)},{age}'.encode())
+    return b'\n'.join(lines) + b'\n'
+
+
+async def _body(data: bytes) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), _READ_SIZE):
+        yield data[start:start + _READ_SIZE]
+
+
+async def _benchmark(repository_name: str, body: bytes, workers: int, chunk_size: int) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        repository = build_account_repository(Settings(
+            account_repository=repository_name, account_search_index=False, metrics_enabled=False,
+            account_sqlite_path=str(Path(directory) / 'accounts.sqlite3'),
+            account_mmap_path=str(Path(directory) / 'accounts.mmap')))
+        importer = AccountImporter(AccountService(repository, MetricsRegistry()), workers, chunk_size)
+        await importer.import_accounts(_body(b'name,age\n' + b'warm up,1\n' * workers * 2), 'csv')
+        start = time.perf_counter()
+        summary = await importer.import_accounts(_body(body), 'csv')
+        elapsed = time.perf_counter() - start
+        importer.close()
+        await repository.close()
+    return (summary.created + summary.failed) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repositories', nargs='+', choices=['in_memory', 'columnar', 'sqlite', 'mmap'],
+                        default=['in_memory', 'sqlite'])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4])
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    arguments = parser.parse_args()
+    body = _csv(arguments.rows)
+    for repository_name in arguments.repositories:
+        results: List[str] = []
+        for workers in arguments.workers:
+            throughput = asyncio.run(_benchmark(repository_name, body, workers, arguments.chunk_size))
+            results.append(f'{workers} workers {throughput:>8.0f} rows/s')
+        print(f'{repository_name:<10} ' + '  '.join(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Throughput of concurrent AccountService.get_account calls, read one by one or coalesced into batches.
+
+Every round starts --concurrency get_account calls at once, for random ids of which some repeat, as concurrent
+requests do, and waits for all of them. Each repository is timed without coalescing, then with every window given.
+
+Run from the root of the project, for instance:
+
+    PYTHONPATH=src python benchmarks/account_loader.py --accounts 100000 --concurrency 1 10 100 --windows 0 0.0005
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from application.services.account_service import AccountService
+from domain.aggregates.account import Account
+from domain.entities.user import User
+from domain.types.user_id import UserId
+from domain.value_objects.personal_information import PersonalInformation
+from infrastructure.metrics.registry import MetricsRegistry
+from infrastructure.repositories.account.factory import build_account_repository
+from settings import Settings
+
+_REPOSITORY_SETTINGS = {
+    'in_memory': {'account_repository': 'in_memory', 'account_search_index': False},
+    'columnar': {'account_repository': 'columnar'},
+    'sqlite': {'account_repository': 'sqlite'},
+    'mmap': {'account_repository': 'mmap'},
+}
+_LOAD_CHUNK_SIZE = 10_000
+
+
+async def _benchmark(repository_name: str, accounts: int, concurrency: List[int], windows: List[float],
+                     duration: float):
+    generator = random.Random(accounts)
+    with tempfile.TemporaryDirectory() as directory:
+        settings = Settings(metrics_enabled=False, account_sqlite_path=str(Path(directory) / 'accounts.sqlite3'),
+                            account_mmap_path=str(Path(directory) / 'accounts.mmap'),
+                            **_REPOSITORY_SETTINGS[repository_name])
+        repository = build_account_repository(settings)
+        for start in range(0, accounts, _LOAD_CHUNK_SIZE):
+            await repository.create_accounts([
+                Account(user=User(id=None, personal_information=PersonalInformation(
+                    age=generator.randrange(100), name=f'name {generator.randrange(1_000_000)}')))
+                for _ in range(min(_LOAD_CHUNK_SIZE, accounts - start))])
+        for calls in concurrency:
+            line = f'{repository_name:<10} {calls:>5} concurrent:'
+            window: Optional[float]
+            for window in [None, *windows]:
+                service = AccountService(repository, MetricsRegistry(), get_account_window=window)
+                done = 0
+                start = time.perf_counter()
+                while time.perf_counter() - start < duration:
+                    # A quarter of the ids repeat within a round.
+                    ids = [UserId(generator.randrange(accounts)) for _ in range(calls - calls // 4)]
+                    ids += generator.choices(ids, k=calls // 4)
+                    await asyncio.gather(*(service.get_account(user_id) for user_id in ids))
+                    done += calls
+                label = 'one by one' if window is None else f'window {window * 1e6:g} us'
+                line += f'  {label} {done / (time.perf_counter() - start):>8.0f} ops/s'
+            print(line)
+        await repository.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repositories', nargs='+', choices=sorted(_REPOSITORY_SETTINGS),
+                        default=sorted(_REPOSITORY_SETTINGS))
+    parser.add_argument('--accounts', type=int, default=100_000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--windows', type=float, nargs='*', default=[0.0], help='Coalescing windows, in seconds.')
+    parser.add_argument('--duration', type=float, default=1.0, help='Seconds each measure runs for.')
+    arguments = parser.parse_args()
+    for repository_name in arguments.repositories:
+        asyncio.run(_benchmark(repository_name, arguments.accounts, arguments.concurrency, arguments.windows,
+                               arguments.duration))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Restart time of the durable in-memory account repository, from a snapshot and a write-ahead log tail.
+
+The snapshot and the log are written directly, without going through the repository, then the repository is opened
+on them and timed until it serves its first page. With --rebuild, the same accounts are also loaded row by row
+through create_accounts, which builds and validates an aggregate per account, for comparison.
+
+Run from the root of the project, for instance:
+
+    PYTHONPATH=src python benchmarks/account_restart.py --accounts 1000000 5000000 --log-records 100000
+"""
+import argparse
+import asyncio
+import random
+import resource
+import string
+import tempfile
+import time
+from pathlib import Path
+
+from domain.aggregates.account import Account
+from domain.entities.user import User
+from domain.types.pagination_size import PaginationSize
+from domain.value_objects.pagination import Pagination
+from domain.value_objects.personal_information import PersonalInformation
+from infrastructure.repositories.account.repositories.account_repository_durable.repository import \
+    DurableAccountRepository, _PUT, _RECORD
+from infrastructure.repositories.account.repositories.account_repository_durable.snapshot import SnapshotWriter
+from infrastructure.repositories.account.repositories.account_repository_durable.write_ahead_log import WriteAheadLog
+from infrastructure.repositories.account.repositories.account_repository_in_memory.repository import \
+    AccountRepositoryInMemory
+
+_LOAD_CHUNK_SIZE = 10_000
+
+
+def _name(generator: random.Random) -> str:
+    return ''.join(generator.choices(string.ascii_lowercase, k=generator.randint(6, 12))).capitalize()
+
+
+async def _write_log(directory: Path, accounts: int, records: int, generator: random.Random):
+    """Writes records patching random accounts, in the segment following the snapshot."""
+    log = WriteAheadLog(directory, 1)
+    for start in range(0, records, _LOAD_CHUNK_SIZE):
+        await log.append([_RECORD.pack(_PUT, generator.randrange(accounts), generator.randrange(100), 2)
+                          + _name(generator).encode() for _ in range(min(_LOAD_CHUNK_SIZE, records - start))])
+    await log.close()
+
+
+async def _benchmark(accounts: int, log_records: int, search_index: bool, rebuild: bool):
+    generator = random.Random(accounts)
+    rows = [(user_id, _name(generator), generator.randrange(100), 1) for user_id in range(accounts)]
+    with tempfile.TemporaryDirectory() as directory:
+        writer = SnapshotWriter()
+        writer.extend(rows)
+        writer.write(Path(directory), accounts, 1)
+        del writer
+        await _write_log(Path(directory), accounts, log_records, generator)
+
+        start = time.perf_counter()
+        repository = DurableAccountRepository(AccountRepositoryInMemory(search_index), directory, 3600)
+        await repository.get_accounts(Pagination(size=PaginationSize(10)))
+        restart_seconds = time.perf_counter() - start
+        # Closing without writes leaves the directory as it is, without a new snapshot.
+        await repository.close()
+        del repository
+    print(f'{accounts:>9} accounts, {log_records:>7} log records: restart {restart_seconds:>6.2f} s, '
+          f'peak {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB')
+
+    if rebuild:
+        repository = AccountRepositoryInMemory(search_index)
+        start = time.perf_counter()
+        for chunk_start in range(0, accounts, _LOAD_CHUNK_SIZE):
+            await repository.create_accounts([
+                Account(user=User(id=None, personal_information=PersonalInformation(age=age, name=name)))
+                for _, name, age, _ in rows[chunk_start:chunk_start + _LOAD_CHUNK_SIZE]])
+        print(f'{accounts:>9} accounts, row by row rebuild: {time.perf_counter() - start:>6.2f} s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--accounts', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--log-records', type=int, default=100_000)
+    parser.add_argument('--search-index', action='store_true',
+                        help='Build the trigram index of the names too, which takes most of the restart time.')
+    parser.add_argument('--rebuild', action='store_true')
+    arguments = parser.parse_args()
+    for accounts in arguments.accounts:
+        asyncio.run(_benchmark(accounts, arguments.log_records, arguments.search_index, arguments.rebuild))
+
+
+if __name__ == '__main__':
+    main()
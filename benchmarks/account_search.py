@@ -0,0 +1,96 @@
+"""Name search of the in-memory account repository, with its trigram index and with the linear scan it replaces.
+
+Names are two random words. Queries are names of existing accounts with one letter changed, and single words, which
+match many accounts partially.
+
+Run from the root of the project, for instance:
+
+    PYTHONPATH=src python benchmarks/account_search.py --accounts 1000000 --scan-queries 3
+"""
+import argparse
+import asyncio
+import random
+import string
+import time
+from typing import Dict, List
+
+from domain.aggregates.account import Account
+from domain.entities.user import User
+from domain.types.pagination_size import PaginationSize
+from domain.value_objects.personal_information import PersonalInformation
+from infrastructure.repositories.account.factory import build_account_repository
+from infrastructure.repositories.account.interface import AccountRepositoryInterface
+from settings import Settings
+
+_LOAD_CHUNK_SIZE = 10_000
+
+
+def _word(generator: random.Random) -> str:
+    return ''.join(generator.choices(string.ascii_lowercase, k=generator.randint(3, 8))).capitalize()
+
+
+def _queries(names: List[str], generator: random.Random, count: int) -> List[str]:
+    queries = []
+    for _ in range(count):
+        name = generator.choice(names)
+        if len(queries) % 2:
+            queries.append(name.split()[generator.randrange(2)])
+        else:
+            position = generator.randrange(len(name))
+            queries.append(name[:position] + generator.choice(string.ascii_lowercase) + name[position + 1:])
+    return queries
+
+
+async def _load(repository: AccountRepositoryInterface, names: List[str]):
+    for start in range(0, len(names), _LOAD_CHUNK_SIZE):
+        await repository.create_accounts([
+            Account(user=User(id=None, personal_information=PersonalInformation(age=0, name=name)))
+            for name in names[start:start + _LOAD_CHUNK_SIZE]])
+
+
+async def _time(repository: AccountRepositoryInterface, queries: List[str], limit: int) -> Dict[str, float]:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        await repository.search_accounts(query, PaginationSize(limit))
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        'p50_ms': latencies[len(latencies) // 2] * 1e3,
+        'p99_ms': latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1e3,
+        'queries_per_second': len(latencies) / sum(latencies),
+    }
+
+
+async def _benchmark(accounts: int, queries: int, scan_queries: int, limit: int):
+    generator = random.Random(accounts)
+    names = [f'{_word(generator)} {_word(generator)}' for _ in range(accounts)]
+    search_queries = _queries(names, generator, queries)
+    for search_index, count in ((True, queries), (False, scan_queries)):
+        if not count:
+            continue
+        repository = build_account_repository(Settings(account_search_index=search_index, metrics_enabled=False))
+        start = time.perf_counter()
+        await _load(repository, names)
+        load_seconds = time.perf_counter() - start
+        result = await _time(repository, search_queries[:count], limit)
+        print(f"{'trigram index' if search_index else 'linear scan':>13} {accounts:>9} accounts: "
+              f"load {load_seconds:>6.1f} s, p50 {result['p50_ms']:>9.2f} ms, p99 {result['p99_ms']:>9.2f} ms, "
+              f"{result['queries_per_second']:>8.1f} queries/s")
+        await repository.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--accounts', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--scan-queries', type=int, default=5,
+                        help='Queries run against the linear scan, which is much slower (default: 5).')
+    parser.add_argument('--limit', type=int, default=10)
+    arguments = parser.parse_args()
+    for accounts in arguments.accounts:
+        asyncio.run(_benchmark(accounts, arguments.queries, arguments.scan_queries, arguments.limit))
+
+
+if __name__ == '__main__':
+    main()
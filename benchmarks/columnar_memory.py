@@ -0,0 +1,70 @@
+"""Memory held per account by the in-process account repositories.
+
+Memory is the size of every object reachable from the repository once the accounts are loaded, as reported by
+sys.getsizeof, so allocator overheads are not included.
+
+Run from the root of the project, for instance:
+
+    PYTHONPATH=src python benchmarks/columnar_memory.py --accounts 1000000 --repository columnar
+"""
+import argparse
+import asyncio
+import gc
+import random
+import string
+import sys
+from types import FunctionType, ModuleType
+from typing import Iterator, List
+
+from domain.aggregates.account import Account
+from domain.entities.user import User
+from domain.value_objects.personal_information import PersonalInformation
+from infrastructure.repositories.account.factory import build_account_repository
+from settings import Settings
+
+_CHUNK_SIZE = 10_000
+
+
+def _chunks(accounts: int, seed: int) -> Iterator[List[Account]]:
+    generator = random.Random(seed)
+    for start in range(0, accounts, _CHUNK_SIZE):
+        yield [Account(user=User(id=None, personal_information=PersonalInformation(
+            age=generator.randrange(100),
+            name=''.join(generator.choices(string.ascii_lowercase, k=generator.randint(6, 12))))))
+            for _ in range(min(_CHUNK_SIZE, accounts - start))]
+
+
+def _retained_size(root: object) -> int:
+    size = 0
+    seen = set()
+    pending = [root]
+    while pending:
+        current = pending.pop()
+        if id(current) in seen or isinstance(current, (type, ModuleType, FunctionType)):
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current)
+        pending.extend(gc.get_referents(current))
+    return size
+
+
+async def _measure(repository: str, accounts: int) -> int:
+    account_repository = build_account_repository(Settings(account_repository=repository))
+    for chunk in _chunks(accounts, seed=0):
+        await account_repository.create_accounts(chunk)
+    return _retained_size(account_repository)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--accounts', type=int, default=1_000_000)
+    parser.add_argument('--repository', default='columnar')
+    arguments = parser.parse_args()
+
+    used = asyncio.run(_measure(arguments.repository, arguments.accounts))
+    print(f'{arguments.repository} {arguments.accounts:,} accounts: {used / 1e6:.1f} MB, '
+          f'{used / arguments.accounts:.1f} B/account')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Allocations per second of the user id allocators, one by one and in batches, against the size of the leased blocks.
+
+Counting allocators never leave the process. Block leasing ones write their store once per block, synced to disk, so
+small blocks measure the store and large ones the allocation in memory. Stores are in a temporary directory, on the
+filesystem of the system temporary directory.
+
+Run from the root of the project, for instance:
+
+    PYTHONPATH=src python benchmarks/id_allocators.py --ids 2000000 --block-sizes 10 1000 100000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from infrastructure.repositories.account.id_allocators.block_leasing import BlockLeasingUserIdAllocator
+from infrastructure.repositories.account.id_allocators.counting import CountingUserIdAllocator
+from infrastructure.repositories.account.id_allocators.id_block_leases import FileIdBlockLeases, SQLiteIdBlockLeases
+from infrastructure.repositories.account.id_allocators.interface import UserIdAllocatorInterface
+
+_BATCH_SIZE = 1000
+
+
+def _benchmark(allocator: UserIdAllocatorInterface, ids: int, batched: bool) -> float:
+    start = time.perf_counter()
+    if batched:
+        for _ in range(ids // _BATCH_SIZE):
+            for _ in allocator.allocate_many(_BATCH_SIZE):
+                pass
+    else:
+        allocate = allocator.allocate
+        for _ in range(ids):
+            allocate()
+    elapsed = time.perf_counter() - start
+    allocator.close()
+    return ids / elapsed
+
+
+def _report(name: str, build: Callable[[], UserIdAllocatorInterface], ids: int):
+    results = [f'{mode} {_benchmark(build(), ids, mode == "batched") / 1e6:>6.2f} M/s'
+               for mode in ('single', 'batched')]
+    print(f'{name:<24} ' + '  '.join(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ids', type=int, default=1_000_000)
+    parser.add_argument('--block-sizes', type=int, nargs='+', default=[100, 1000, 10_000])
+    arguments = parser.parse_args()
+    _report('counting', CountingUserIdAllocator, arguments.ids)
+    with tempfile.TemporaryDirectory() as directory:
+        for store, leases_class in (('file', FileIdBlockLeases), ('sqlite', SQLiteIdBlockLeases)):
+            for block_size in arguments.block_sizes:
+                path = str(Path(directory) / f'account_ids.{store}')
+                _report(f'{store} blocks of {block_size}',
+                        lambda: BlockLeasingUserIdAllocator(leases_class(path), block_size), arguments.ids)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Requests per second of GET /api/account/ on the application of main, served in process, and bytes per response.
+
+Pages can be restricted with --fields, and compressed with --accept-encoding, sent as the Accept-Encoding header.
+
+Run from the root of the project, for instance:
+
+    PYTHONPATH=src python benchmarks/list_accounts_endpoint.py --size 1000 --requests 300 --fields id,name \
+        --accept-encoding gzip
+"""
+import argparse
+import asyncio
+import time
+from typing import Optional, Tuple
+
+import httpx
+
+from domain.aggregates.account import Account
+from domain.entities.user import User
+from domain.value_objects.personal_information import PersonalInformation
+from main import app
+
+
+async def _run(accounts: int, size: int, requests: int, fields: Optional[str],
+               accept_encoding: str) -> Tuple[float, float]:
+    params = {'size': size} if fields is None else {'size': size, 'fields': fields}
+    async with app.router.lifespan_context(app), httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url='http://benchmark',
+            headers={'Accept-Encoding': accept_encoding}) as client:
+        await app.state.account_service.create_accounts(
+            [Account(user=User(id=None, personal_information=PersonalInformation(age=index % 100,
+                                                                                 name=f'name {index}')))
+             for index in range(accounts)])
+        (await client.get('/api/account/', params=params)).raise_for_status()
+        sent = 0
+        start = time.perf_counter()
+        for request in range(requests):
+            page = request % max(accounts // size, 1)
+            response = await client.get('/api/account/', params={**params, 'page': page})
+            response.raise_for_status()
+            sent += response.num_bytes_downloaded
+        return requests / (time.perf_counter() - start), sent / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--accounts', type=int, default=10_000)
+    parser.add_argument('--size', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--fields', help='Comma separated account fields of the pages, all of them by default.')
+    parser.add_argument('--accept-encoding', default='identity')
+    arguments = parser.parse_args()
+
+    requests_per_second, response_bytes = asyncio.run(_run(arguments.accounts, arguments.size, arguments.requests,
+                                                           arguments.fields, arguments.accept_encoding))
+    print(f'GET /api/account/?size={arguments.size}&fields={arguments.fields or ""} '
+          f'({arguments.accept_encoding}): {requests_per_second:.1f} requests/s, {response_bytes:.0f} bytes/response')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+"""Load test of the HTTP API, with virtual users running scenarios, gated by the thresholds of load_thresholds.json.
+
+Targets are the application of main.create_app, built from the environment and served in process over an ASGI
+transport by default, a uvicorn server started on a free port with --uvicorn, or a server already running at --url.
+Accounts are seeded through POST /api/account/batch before the scenarios run, one after the other:
+
+- read: GET /api/account/{user_id} of a random seeded account.
+- deep_pages: GET /api/account/ of a random offset page of 100 accounts among the last tenth of the pages.
+- patch_storm: PATCH /api/account/{user_id} of one of the first 10 seeded accounts, so patches pile up on them.
+- create_delete: POST /api/account/ of a new account, then DELETE of it.
+
+Each scenario runs --users virtual users for --duration seconds, every one sending its next request as soon as the
+last one is answered. Throughput, latency percentiles and the responses that are not 200 are reported per scenario,
+and the process exits with status 1 when a result goes past its threshold. Thresholds are checked for in-process runs
+by default, and for servers when given with --thresholds, as they depend on the host.
+
+Run from the root of the project, for instance:
+
+    PYTHONPATH=src python benchmarks/load_test.py --users 16 --duration 10
+    ACCOUNT_REPOSITORY=sqlite PYTHONPATH=src python benchmarks/load_test.py --uvicorn --scenarios read patch_storm
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+import httpx
+
+_PROJECT_DIRECTORY = Path(__file__).resolve().parent.parent
+_THRESHOLDS_PATH = Path(__file__).resolve().parent / 'load_thresholds.json'
+_SEED_BATCH_SIZE = 1000
+_PAGE_SIZE = 100
+_HOT_ACCOUNTS = 10
+_SERVER_START_TIMEOUT = 30.0
+
+
+class _VirtualUser:
+    """Client of one virtual user, recording the latency of every request and the responses that are not 200."""
+
+    def __init__(self, client: httpx.AsyncClient, generator: random.Random):
+        self.client = client
+        self.generator = generator
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            self.errors += 1
+        return response
+
+
+def _account(generator: random.Random) -> dict:
+    return {'user': {'id': None, 'personal_information': {'age': generator.randrange(100),
+                                                          'name': f'name {generator.randrange(1_000_000)}'}}}
+
+
+async def _read(user: _VirtualUser, user_ids: List[int]):
+    await user.request('GET', f'/api/account/{user.generator.choice(user_ids)}')
+
+
+async def _deep_pages(user: _VirtualUser, user_ids: List[int]):
+    pages = max(len(user_ids) // _PAGE_SIZE, 1)
+    page = user.generator.randrange(pages - max(pages // 10, 1), pages)
+    await user.request('GET', '/api/account/', params={'size': _PAGE_SIZE, 'page': page})
+
+
+async def _patch_storm(user: _VirtualUser, user_ids: List[int]):
+    user_id = user.generator.choice(user_ids[:_HOT_ACCOUNTS])
+    await user.request('PATCH', f'/api/account/{user_id}', json=_account(user.generator))
+
+
+async def _create_delete(user: _VirtualUser, user_ids: List[int]):
+    response = await user.request('POST', '/api/account/', json=_account(user.generator))
+    if response.status_code == 200:
+        await user.request('DELETE', f"/api/account/{response.json()['user']['id']}")
+
+
+_SCENARIOS: Dict[str, Callable[[_VirtualUser, List[int]], Awaitable[None]]] = {
+    'read': _read,
+    'deep_pages': _deep_pages,
+    'patch_storm': _patch_storm,
+    'create_delete': _create_delete,
+}
+
+
+class _Result(NamedTuple):
+    """Outcome of a scenario, with latencies in milliseconds."""
+    requests: int
+    errors: int
+    requests_per_second: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of values sorted in increasing order."""
+    return sorted_values[max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)]
+
+
+async def _seed(client: httpx.AsyncClient, accounts: int) -> List[int]:
+    generator = random.Random(accounts)
+    user_ids = []
+    for start in range(0, accounts, _SEED_BATCH_SIZE):
+        response = await client.post('/api/account/batch', json=[
+            _account(generator) for _ in range(min(_SEED_BATCH_SIZE, accounts - start))])
+        response.raise_for_status()
+        user_ids += [item['account']['user']['id'] for item in response.json()]
+    return user_ids
+
+
+async def _run_scenario(client: httpx.AsyncClient, name: str, user_ids: List[int], users: int,
+                        duration: float) -> _Result:
+    scenario = _SCENARIOS[name]
+    virtual_users = [_VirtualUser(client, random.Random(index)) for index in range(users)]
+    deadline = time.perf_counter() + duration
+
+    async def run(user: _VirtualUser):
+        while time.perf_counter() < deadline:
+            await scenario(user, user_ids)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(user) for user in virtual_users))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(latency * 1000 for user in virtual_users for latency in user.latencies)
+    if not latencies:
+        return _Result(0, 0, 0.0, 0.0, 0.0, 0.0, 0.0)
+    return _Result(len(latencies), sum(user.errors for user in virtual_users), len(latencies) / elapsed,
+                   _percentile(latencies, 50), _percentile(latencies, 95), _percentile(latencies, 99), latencies[-1])
+
+
+def _check(name: str, result: _Result, thresholds: Dict[str, float]) -> List[str]:
+    """Descriptions of the thresholds of a scenario its result goes past."""
+    failures = []
+    minimum = thresholds.get('min_requests_per_second')
+    if minimum is not None and result.requests_per_second < minimum:
+        failures.append(f'{name}: {result.requests_per_second:.1f} requests/s, below {minimum}')
+    for field in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'error_rate'):
+        maximum = thresholds.get(f'max_{field}')
+        if maximum is not None and getattr(result, field) > maximum:
+            failures.append(f'{name}: {field} {getattr(result, field):.4g}, above {maximum}')
+    return failures
+
+
+def _free_port() -> int:
+    with socket.socket() as listener:
+        listener.bind(('127.0.0.1', 0))
+        return listener.getsockname()[1]
+
+
+async def _start_uvicorn(stack: AsyncExitStack, workers: int) -> str:
+    """Starts uvicorn on the application of main.create_app, built from the environment, and returns its URL."""
+    port = _free_port()
+    server = subprocess.Popen([sys.executable, '-m', 'uvicorn', '--factory', 'main:create_app', '--app-dir', 'src',
+                               '--port', str(port), '--workers', str(workers), '--log-level', 'warning'],
+                              cwd=_PROJECT_DIRECTORY, env=os.environ.copy())
+    stack.callback(server.wait)
+    stack.callback(server.terminate)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.perf_counter() + _SERVER_START_TIMEOUT
+    async with httpx.AsyncClient(base_url=url) as client:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f'uvicorn exited with status {server.returncode}.')
+            try:
+                (await client.get('/api/account/', params={'size': 1})).raise_for_status()
+                return url
+            except httpx.TransportError:
+                if time.perf_counter() > deadline:
+                    raise RuntimeError(f'uvicorn did not answer within {_SERVER_START_TIMEOUT} seconds.')
+                await asyncio.sleep(0.1)
+
+
+async def _run(arguments: argparse.Namespace) -> Dict[str, _Result]:
+    async with AsyncExitStack() as stack:
+        if arguments.url is not None or arguments.uvicorn:
+            url = arguments.url if arguments.url is not None else await _start_uvicorn(stack, arguments.workers)
+            transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=arguments.users))
+        else:
+            from main import create_app
+            app = create_app()
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            url, transport = 'http://load-test', httpx.ASGITransport(app=app)
+        client = await stack.enter_async_context(httpx.AsyncClient(transport=transport, base_url=url, timeout=60.0))
+        user_ids = await _seed(client, arguments.accounts)
+        results = {}
+        for name in arguments.scenarios:
+            results[name] = result = await _run_scenario(client, name, user_ids, arguments.users, arguments.duration)
+            print(f'{name:<14} {result.requests:>8} requests {result.requests_per_second:>9.1f}/s  '
+                  f'p50 {result.p50_ms:>7.2f} ms  p95 {result.p95_ms:>7.2f} ms  p99 {result.p99_ms:>7.2f} ms  '
+                  f'max {result.max_ms:>8.2f} ms  {result.errors} errors')
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', choices=list(_SCENARIOS), default=list(_SCENARIOS))
+    parser.add_argument('--users', type=int, default=16, help='Virtual users sending requests concurrently.')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds each scenario runs for.')
+    parser.add_argument('--accounts', type=int, default=10_000, help='Accounts seeded before the scenarios.')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', help='URL of a running server, such as http://127.0.0.1:8000.')
+    target.add_argument('--uvicorn', action='store_true', help='Serve the application with uvicorn.')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='uvicorn worker processes, more than one only sharing accounts with the sqlite or mmap '
+                             'repositories.')
+    parser.add_argument('--thresholds', type=Path,
+                        help=f'JSON thresholds per scenario, {_THRESHOLDS_PATH.name} for in-process runs by default.')
+    parser.add_argument('--no-thresholds', action='store_true', help='Report the results without checking them.')
+    arguments = parser.parse_args()
+
+    results = asyncio.run(_run(arguments))
+    thresholds_path = arguments.thresholds
+    if thresholds_path is None and arguments.url is None and not arguments.uvicorn:
+        thresholds_path = _THRESHOLDS_PATH
+    if arguments.no_thresholds or thresholds_path is None:
+        return
+    thresholds = json.loads(thresholds_path.read_text())
+    failures = [failure for name, result in results.items()
+                for failure in _check(name, result, thresholds.get(name, {}))]
+    for failure in failures:
+        print(f'FAILED {failure}', file=sys.stderr)
+    if failures:
+        sys.exit(1)
+    print(f'Every result is within {thresholds_path.name}.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""Microbenchmarks of every account repository, called directly and through AccountService.
+
+Each repository is filled with every requested number of accounts, and every operation is then timed call by call:
+create, get, get_accounts at several page sizes and depths, patch and delete. Each repository, size and layer runs in a
+fresh process, so the peak memory reported is the peak resident set size of that process.
+
+Run from the root of the project, for instance:
+
+    PYTHONPATH=src python benchmarks/repositories.py --accounts 1000 10000 --output results.json
+    PYTHONPATH=src python benchmarks/repositories.py --accounts 1000 10000 --baseline results.json
+
+Results are saved as JSON. When a baseline is given, every operation whose ops/sec dropped by more than the tolerance
+is reported and the exit code is 1.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from application.services.account_service import AccountService
+from domain.aggregates.account import Account
+from domain.entities.user import User
+from domain.types.pagination_size import PaginationSize
+from domain.types.user_id import UserId
+from domain.value_objects.account_query import AccountQuery
+from domain.value_objects.pagination import Pagination
+from domain.value_objects.personal_information import PersonalInformation
+from infrastructure.repositories.account.factory import build_account_repository
+from settings import Settings
+
+_REPOSITORY_SETTINGS = {
+    'in_memory': {'account_repository': 'in_memory'},
+    'columnar': {'account_repository': 'columnar'},
+    'sqlite': {'account_repository': 'sqlite'},
+    'sqlite_cached': {'account_repository': 'sqlite', 'account_cache_size': 10_000},
+    'mmap': {'account_repository': 'mmap'},
+}
+_LOAD_CHUNK_SIZE = 10_000
+_PAGE_SIZES = (10, 100, 1000)
+_QUERIES = {
+    'age=30..40': AccountQuery(min_age=30, max_age=40),
+    'age=30..40,sort=age': AccountQuery(min_age=30, max_age=40, sort='age'),
+    'sort=name': AccountQuery(sort='name'),
+}
+
+
+def _account(generator: random.Random) -> Account:
+    return Account(user=User(id=None, personal_information=PersonalInformation(
+        age=generator.randrange(100), name=f'name {generator.randrange(1_000_000)}')))
+
+
+def _percentile(latencies: List[int], percentile: float) -> float:
+    return latencies[min(int(len(latencies) * percentile), len(latencies) - 1)] / 1000
+
+
+async def _time(operation: Callable[[int], Awaitable], calls: int) -> Dict[str, float]:
+    latencies = []
+    for call in range(calls):
+        start = time.perf_counter_ns()
+        await operation(call)
+        latencies.append(time.perf_counter_ns() - start)
+    total = sum(latencies)
+    latencies.sort()
+    return {
+        'ops_per_second': calls / (total / 1e9),
+        'p50_us': _percentile(latencies, 0.50),
+        'p99_us': _percentile(latencies, 0.99),
+    }
+
+
+async def _operations(target, accounts: int, generator: random.Random) -> List[Tuple[str, Callable, int]]:
+    """Operations as (name, call taking the call number, calls)."""
+    user_ids = [UserId(generator.randrange(accounts)) for _ in range(1000)]
+    # Deletes use their own ids, so every other operation only meets existing accounts.
+    deleted_ids = generator.sample(range(accounts), min(accounts, 1000))
+    operations = [
+        ('get', lambda call: target.get_account(user_ids[call]), len(user_ids)),
+    ]
+    for size in _PAGE_SIZES:
+        pages = max(accounts // size, 1)
+        calls = max(10, 10_000 // size)
+        for depth, page in (('first', 0), ('middle', pages // 2), ('last', pages - 1)):
+            pagination = Pagination(size=PaginationSize(size), page=page)
+            operations.append((f'get_accounts[size={size},page={depth}]',
+                               lambda call, pagination=pagination: target.get_accounts(pagination), calls))
+        pagination = Pagination(size=PaginationSize(size), after_id=UserId(accounts // 2))
+        operations.append((f'get_accounts[size={size},after_id=middle]',
+                           lambda call, pagination=pagination: target.get_accounts(pagination), calls))
+    for name, query in _QUERIES.items():
+        operations.append((f'get_accounts[size=100,{name}]',
+                           lambda call, query=query: target.get_accounts(Pagination(size=PaginationSize(100)), query),
+                           100))
+
+    patched = [await target.get_account(user_id) for user_id in user_ids]
+    operations += [
+        ('create', lambda call: target.create_account(_account(generator)), 1000),
+        ('patch', lambda call: target.patch_account(patched[call]), len(patched)),
+        ('delete', lambda call: target.delete_account(UserId(deleted_ids[call])), len(deleted_ids)),
+    ]
+    return operations
+
+
+async def _benchmark_case(repository: str, accounts: int, layer: str) -> List[dict]:
+    generator = random.Random(accounts)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        account_repository = build_account_repository(Settings(
+            account_sqlite_path=str(Path(directory) / 'accounts.sqlite3'),
+            account_mmap_path=str(Path(directory) / 'accounts.mmap'), **_REPOSITORY_SETTINGS[repository]))
+        for start in range(0, accounts, _LOAD_CHUNK_SIZE):
+            await account_repository.create_accounts(
+                [_account(generator) for _ in range(min(_LOAD_CHUNK_SIZE, accounts - start))])
+        target = AccountService(account_repository) if layer == 'service' else account_repository
+        for operation, call, calls in await _operations(target, accounts, generator):
+            results.append({'repository': repository, 'layer': layer, 'accounts': accounts,
+                            'operation': operation, **await _time(call, calls)})
+        await account_repository.close()
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    for result in results:
+        result['peak_memory_bytes'] = peak_memory
+    return results
+
+
+def _run_case(repository: str, accounts: int, layer: str) -> List[dict]:
+    return asyncio.run(_benchmark_case(repository, accounts, layer))
+
+
+def _key(result: dict) -> Tuple:
+    return result['repository'], result['layer'], result['accounts'], result['operation']
+
+
+def _regressions(results: List[dict], baseline: List[dict], tolerance: float) -> List[str]:
+    baseline_by_key = {_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = baseline_by_key.get(_key(result))
+        if previous and result['ops_per_second'] < previous['ops_per_second'] * (1 - tolerance):
+            regressions.append(f"{' '.join(map(str, _key(result)))}: {previous['ops_per_second']:.0f} -> "
+                               f"{result['ops_per_second']:.0f} ops/s")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repositories', nargs='+', choices=list(_REPOSITORY_SETTINGS),
+                        default=list(_REPOSITORY_SETTINGS))
+    parser.add_argument('--accounts', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--layers', nargs='+', choices=['repository', 'service'], default=['repository', 'service'])
+    parser.add_argument('--output', type=Path)
+    parser.add_argument('--baseline', type=Path)
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Relative drop of ops/sec reported as a regression (default: 0.2).')
+    arguments = parser.parse_args()
+
+    results = []
+    for repository, accounts, layer in product(arguments.repositories, arguments.accounts, arguments.layers):
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+            case = executor.submit(_run_case, repository, accounts, layer).result()
+        for result in case:
+            print(f"{result['repository']:>13} {result['layer']:>10} {result['accounts']:>9} "
+                  f"{result['operation']:<44} {result['ops_per_second']:>12.0f} ops/s "
+                  f"p50 {result['p50_us']:>9.1f} us p99 {result['p99_us']:>9.1f} us "
+                  f"peak {result['peak_memory_bytes'] / 1e6:>8.1f} MB")
+        results += case
+
+    if arguments.output:
+        arguments.output.write_text(json.dumps({
+            'python': sys.version,
+            'platform': platform.platform(),
+            'results': results,
+        }, indent=2))
+
+    if arguments.baseline:
+        regressions = _regressions(results, json.loads(arguments.baseline.read_text())['results'],
+                                   arguments.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Throughput of a mixed read and write workload on ShardedAccountRepository, against the number of shards.
+
+Every round starts --concurrency operations at once and waits for all of them: point reads, patches and pages of 100
+accounts, in the proportions given. Shards are in-memory repositories. With a write latency, every write of a shard
+first sleeps that long, as a shard that flushes a log or writes to a database suspends, so the per-shard locks are
+what bounds the writes in flight. Without it, shards never suspend and the fan-out of the pages is all sharding adds.
+
+Run from the root of the project, for instance:
+
+    PYTHONPATH=src python benchmarks/sharded_accounts.py --accounts 100000 --shards 1 2 4 8 --write-latencies 0 0.001
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import List, Optional
+
+from domain.aggregates.account import Account
+from domain.entities.user import User
+from domain.types.account_version import AccountVersion
+from domain.types.pagination_size import PaginationSize
+from domain.types.user_id import UserId
+from domain.value_objects.pagination import Pagination
+from domain.value_objects.personal_information import PersonalInformation
+from infrastructure.repositories.account.id_allocators.counting import CountingUserIdAllocator
+from infrastructure.repositories.account.repositories.account_repository_in_memory.repository import \
+    AccountRepositoryInMemory
+from infrastructure.repositories.account.repositories.account_repository_sharded.repository import \
+    ShardedAccountRepository
+
+_LOAD_CHUNK_SIZE = 10_000
+
+
+class _SlowWritesAccountRepository(AccountRepositoryInMemory):
+    def __init__(self, first_id: UserId, id_step: int, write_latency: float):
+        super().__init__(search_index=False, id_allocator=CountingUserIdAllocator(first_id, id_step))
+        self._write_latency = write_latency
+
+    async def patch_account(self, account_aggregate: Account,
+                            expected_version: Optional[AccountVersion] = None) -> Account:
+        if self._write_latency:
+            await asyncio.sleep(self._write_latency)
+        return await super().patch_account(account_aggregate, expected_version)
+
+
+def _account(generator: random.Random, user_id: Optional[int] = None) -> Account:
+    return Account(user=User(id=user_id, personal_information=PersonalInformation(
+        age=generator.randrange(100), name=f'name {generator.randrange(1_000_000)}')))
+
+
+async def _benchmark(accounts: int, shards: int, write_latency: float, concurrency: int, writes: float, pages: float,
+                     duration: float) -> float:
+    generator = random.Random(accounts)
+    repository = ShardedAccountRepository([_SlowWritesAccountRepository(shard, shards, write_latency)
+                                           for shard in range(shards)])
+    for start in range(0, accounts, _LOAD_CHUNK_SIZE):
+        await repository.create_accounts([_account(generator) for _ in range(min(_LOAD_CHUNK_SIZE, accounts - start))])
+
+    done = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        operations = []
+        for _ in range(concurrency):
+            user_id = generator.randrange(accounts)
+            draw = generator.random()
+            if draw < writes:
+                operations.append(repository.patch_account(_account(generator, user_id)))
+            elif draw < writes + pages:
+                operations.append(repository.get_accounts(Pagination(size=PaginationSize(100), after_id=user_id)))
+            else:
+                operations.append(repository.get_account(UserId(user_id)))
+        await asyncio.gather(*operations)
+        done += concurrency
+    await repository.close()
+    return done / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--accounts', type=int, default=100_000)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--write-latencies', type=float, nargs='+', default=[0.0, 0.001],
+                        help='Seconds every write of a shard sleeps for.')
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--writes', type=float, default=0.2, help='Share of patches among the operations.')
+    parser.add_argument('--pages', type=float, default=0.1, help='Share of pages among the operations.')
+    parser.add_argument('--duration', type=float, default=2.0, help='Seconds each measure runs for.')
+    arguments = parser.parse_args()
+    for write_latency in arguments.write_latencies:
+        results: List[str] = []
+        for shards in arguments.shards:
+            throughput = asyncio.run(_benchmark(arguments.accounts, shards, write_latency, arguments.concurrency,
+                                                arguments.writes, arguments.pages, arguments.duration))
+            results.append(f'{shards} shards {throughput:>8.0f} ops/s')
+        print(f'write latency {write_latency * 1000:g} ms: ' + '  '.join(results))
+
+
+if __name__ == '__main__':
+    main()
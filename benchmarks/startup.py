@@ -0,0 +1,68 @@
+"""Cold start of the application: time to import it, start it up, and serve its first requests, in fresh processes.
+
+Every run is a new interpreter that imports main, enters the lifespan of main.app and sends a first GET of an account
+and of the OpenAPI document, the request of a client and of a load balancer probing the docs, then a second one of each.
+The median of the runs is reported for every repository.
+
+Run from the root of the project, for instance:
+
+    PYTHONPATH=src python benchmarks/startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+_REPOSITORY_SETTINGS = {
+    'in_memory': {'ACCOUNT_REPOSITORY': 'in_memory'},
+    'sqlite': {'ACCOUNT_REPOSITORY': 'sqlite'},
+    'mmap': {'ACCOUNT_REPOSITORY': 'mmap'},
+}
+
+# Runs in the fresh interpreter, with the testing client imported before the clock starts, as a server is.
+_CHILD = '''
+import json, time
+from starlette.testclient import TestClient
+start = time.perf_counter()
+import main
+app = main.app
+imported = time.perf_counter()
+timings = {'import': imported - start}
+with TestClient(app) as client:
+    timings['startup'] = time.perf_counter() - imported
+    for attempt in ('first', 'second'):
+        for name, url in (('account', '/api/account/0'), ('openapi', '/openapi.json')):
+            request_start = time.perf_counter()
+            client.get(url)
+            timings[f'{attempt} {name}'] = time.perf_counter() - request_start
+print(json.dumps(timings))
+'''
+
+
+def _run(environment: dict) -> dict:
+    output = subprocess.run([sys.executable, '-c', _CHILD], env=environment, check=True, capture_output=True,
+                            text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repositories', nargs='+', choices=sorted(_REPOSITORY_SETTINGS),
+                        default=sorted(_REPOSITORY_SETTINGS))
+    parser.add_argument('--runs', type=int, default=5)
+    arguments = parser.parse_args()
+    for repository in arguments.repositories:
+        with tempfile.TemporaryDirectory() as directory:
+            environment = {**os.environ, **_REPOSITORY_SETTINGS[repository],
+                           'ACCOUNT_SQLITE_PATH': os.path.join(directory, 'accounts.sqlite3'),
+                           'ACCOUNT_MMAP_PATH': os.path.join(directory, 'accounts.mmap')}
+            runs = [_run(environment) for _ in range(arguments.runs)]
+        print(f'{repository}: ' + ', '.join(f'{name} {statistics.median(run[name] for run in runs) * 1000:.1f} ms'
+                                            for name in runs[0]))
+
+
+if __name__ == '__main__':
+    main()
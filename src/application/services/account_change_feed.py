@@ -0,0 +1,72 @@
+import asyncio
+from typing import AsyncIterator, List, Optional
+
+from application.services.exceptions.account_changes_expired_error import AccountChangesExpiredError
+from domain.aggregates.account import Account
+from domain.entities.user import User
+from domain.events.account_change import AccountChange
+from domain.types.account_change_type import AccountChangeType
+from domain.types.user_id import UserId
+from infrastructure.data_structures.ring_buffer import RingBuffer
+
+
+class AccountChangeFeed:
+    """Changes made to the accounts of a process, kept in a ring buffer of the last capacity ones.
+
+    Publishing never waits on subscribers: each one reads the buffer from its own position, as fast as it consumes the
+    changes, so a slow subscriber only falls behind. One that falls more than capacity changes behind can no longer
+    catch up from the buffer, and must read the accounts again before subscribing from the last change.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self._changes: RingBuffer[AccountChange] = RingBuffer(capacity)
+        self._published = asyncio.Event()
+
+    @property
+    def last_sequence(self) -> int:
+        """Sequence number of the last change published, 0 before any."""
+        return self._changes.last_sequence
+
+    def publish(self, change_type: AccountChangeType, user_id: UserId, account: Optional[Account] = None):
+        if account is not None:
+            # Copied, as aggregates are mutable and the caller keeps them. Personal information is frozen and shared.
+            account = Account.trusted(User.trusted(account.user.id, account.user.personal_information),
+                                      account.version)
+        self._changes.append(AccountChange.trusted(self._changes.last_sequence + 1, change_type, user_id, account))
+        published, self._published = self._published, asyncio.Event()
+        published.set()
+
+    def subscribe(self, since: Optional[int] = None, batch_size: int = 1000,
+                  keep_alive: Optional[float] = None) -> AsyncIterator[List[AccountChange]]:
+        """Changes published after the one numbered since, or after the last one without, in batches as published.
+
+        Batches hold up to batch_size changes. With keep_alive, an empty batch is yielded after that many seconds
+        without changes. Raises AccountChangesExpiredError when the changes after since are no longer kept, whether
+        right away or once the subscriber has fallen too far behind, and when since is ahead of the last change, as
+        it is after a restart.
+        """
+        sequence = self.last_sequence if since is None else since
+        self._check(sequence)
+        return self._tail(sequence, batch_size, keep_alive)
+
+    async def _tail(self, sequence: int, batch_size: int,
+                    keep_alive: Optional[float]) -> AsyncIterator[List[AccountChange]]:
+        while True:
+            # Taken before reading, so a change published while the batch is consumed is not missed.
+            published = self._published
+            self._check(sequence)
+            changes = self._changes.after(sequence, batch_size)
+            if changes:
+                sequence = changes[-1].sequence
+                yield changes
+                continue
+            try:
+                await asyncio.wait_for(published.wait(), keep_alive)
+            except asyncio.TimeoutError:
+                yield []
+
+    def _check(self, sequence: int):
+        if not self._changes.first_sequence - 1 <= sequence <= self._changes.last_sequence:
+            raise AccountChangesExpiredError(
+                f'Changes after {sequence} are not kept, subscribe after {self._changes.first_sequence - 1} to '
+                f'{self._changes.last_sequence}.')
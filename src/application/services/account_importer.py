@@ -0,0 +1,172 @@
+import asyncio
+import csv
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import AsyncIterator, Deque, List, Literal, Optional, Tuple
+
+from pydantic import BaseModel, ValidationError
+
+from application.services.account_service import AccountService
+from domain.aggregates.account import Account
+from domain.entities.user import User
+from domain.types.personal_age import PersonalAge
+from domain.types.personal_name import PersonalName
+from domain.value_objects.personal_information import PersonalInformation
+
+AccountImportFormat = Literal['csv', 'ndjson']
+# Valid rows of a chunk as (name, age), and its invalid ones as (line number, reason).
+_ValidatedChunk = Tuple[List[Tuple[PersonalName, PersonalAge]], List[Tuple[int, str]]]
+
+
+class AccountImportRowError(BaseModel):
+    """Row of an import that was not created, by its line number in the body."""
+    line: int
+    detail: str
+
+
+class AccountImportSummary(BaseModel):
+    """Outcome of an import: accounts created, rows rejected, and the errors of the first rejected rows."""
+    created: int = 0
+    failed: int = 0
+    errors: List[AccountImportRowError] = []
+
+
+class AccountImporter:
+    """Creates the accounts of a CSV or NDJSON body, read as a stream and validated in chunks by worker processes.
+
+    CSV bodies start with a header naming a name and an age column, among any others. NDJSON bodies hold an account
+    per line, as exported by GET /api/account/export. Ids and versions are left to the repository in both. Every row
+    must fit on one line, and blank lines are skipped, including those before the CSV header.
+
+    Lines are grouped in chunks of chunk_size, validated in a pool of worker processes while the next ones are read,
+    and the valid rows of each chunk are created with a single create_accounts call, in the order of the body. At most
+    2 * workers chunks are in flight, after which the body is only read as chunks are created, so a client sending
+    faster than that is held back by the transport instead of filling memory. With no workers, chunks are validated in
+    the event loop. The pool is started on the first import and stopped by close. When a worker dies, the import it
+    served raises BrokenProcessPool and the pool is stopped, so the next import starts a new one.
+    """
+
+    def __init__(self, account_service: AccountService, workers: Optional[int] = None, chunk_size: int = 5000,
+                 max_errors: int = 100):
+        self._account_service = account_service
+        self._workers = (os.cpu_count() or 1) if workers is None else workers
+        self._chunk_size = chunk_size
+        self._max_errors = max_errors
+        self._max_in_flight = 2 * max(self._workers, 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def import_accounts(self, body: AsyncIterator[bytes],
+                              import_format: AccountImportFormat) -> AccountImportSummary:
+        """Creates the valid rows of body. Raises ValueError when a CSV header lacks the name or age column."""
+        summary = AccountImportSummary()
+        in_flight: Deque[asyncio.Future] = deque()
+        columns = None
+        try:
+            async for first_line, lines in _line_chunks(body, self._chunk_size):
+                if import_format == 'csv' and columns is None:
+                    header = next((index for index, line in enumerate(lines) if line.strip()), None)
+                    if header is None:
+                        continue
+                    columns = _csv_columns(lines[header].rstrip(b'\r'))
+                    first_line, lines = first_line + header + 1, lines[header + 1:]
+                in_flight.append(self._validate(import_format, lines, first_line, columns))
+                if len(in_flight) >= self._max_in_flight:
+                    await self._create(await in_flight.popleft(), summary)
+            while in_flight:
+                await self._create(await in_flight.popleft(), summary)
+        except BrokenProcessPool:
+            self.close()
+            raise
+        finally:
+            for future in in_flight:
+                future.cancel()
+        return summary
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _validate(self, import_format: AccountImportFormat, lines: List[bytes], first_line: int,
+                  columns: Optional[Tuple[int, int]]) -> 'asyncio.Future[_ValidatedChunk]':
+        loop = asyncio.get_running_loop()
+        if not self._workers:
+            future = loop.create_future()
+            future.set_result(_validate_chunk(import_format, lines, first_line, columns))
+            return future
+        if self._executor is None:
+            # Workers are spawned rather than forked, as the server process runs threads, such as the SQLite pool.
+            self._executor = ProcessPoolExecutor(self._workers, mp_context=get_context('spawn'))
+        return loop.run_in_executor(self._executor, _validate_chunk, import_format, lines, first_line, columns)
+
+    async def _create(self, chunk: _ValidatedChunk, summary: AccountImportSummary):
+        rows, errors = chunk
+        if rows:
+            # Rows were validated by the workers, so the accounts are built from them as trusted.
+            await self._account_service.create_accounts([
+                Account.trusted(User.trusted(None, PersonalInformation.trusted(age, name)), 0) for name, age in rows])
+        summary.created += len(rows)
+        summary.failed += len(errors)
+        summary.errors.extend(AccountImportRowError(line=line, detail=detail)
+                              for line, detail in errors[:self._max_errors - len(summary.errors)])
+
+
+async def _line_chunks(body: AsyncIterator[bytes], chunk_size: int) -> AsyncIterator[Tuple[int, List[bytes]]]:
+    """Lines of body without their line feeds, in lists of up to chunk_size, each with the number of its first line."""
+    lines: List[bytes] = []
+    tail = b''
+    line_number = 1
+    async for data in body:
+        parts = (tail + data).split(b'\n')
+        tail = parts.pop()
+        lines += parts
+        while len(lines) >= chunk_size:
+            yield line_number, lines[:chunk_size]
+            del lines[:chunk_size]
+            line_number += chunk_size
+    if tail:
+        lines.append(tail)
+    if lines:
+        yield line_number, lines
+
+
+def _csv_columns(header: bytes) -> Tuple[int, int]:
+    """Positions of the name and age columns of a CSV header."""
+    names = [name.strip() for name in next(csv.reader([header.decode(errors='replace')]), [])]
+    if 'name' not in names or 'age' not in names:
+        raise ValueError('The CSV header must name a name and an age column.')
+    return names.index('name'), names.index('age')
+
+
+def _validate_chunk(import_format: AccountImportFormat, lines: List[bytes], first_line: int,
+                    columns: Optional[Tuple[int, int]]) -> _ValidatedChunk:
+    """Validates the rows of a chunk, in a worker process."""
+    rows = []
+    errors = []
+    for line_number, line in enumerate(lines, start=first_line):
+        line = line.rstrip(b'\r')
+        if not line.strip():
+            continue
+        try:
+            if import_format == 'csv':
+                name_column, age_column = columns
+                record = next(csv.reader([line.decode()]))
+                if len(record) <= max(name_column, age_column):
+                    raise ValueError(f'Expected at least {max(name_column, age_column) + 1} columns.')
+                personal_information = PersonalInformation.model_validate({'name': record[name_column],
+                                                                           'age': record[age_column]})
+            else:
+                personal_information = Account.model_validate_json(line).user.personal_information
+        except ValidationError as e:
+            errors.append((line_number, '; '.join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" if error['loc'] else error['msg']
+                for error in e.errors())))
+        except (ValueError, csv.Error) as e:
+            # Lines that are not UTF-8 or not CSV, and CSV records that lack columns.
+            errors.append((line_number, str(e)))
+        else:
+            rows.append((personal_information.name, personal_information.age))
+    return rows, errors
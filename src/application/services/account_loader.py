@@ -0,0 +1,67 @@
+import asyncio
+from typing import Dict, List, Optional
+
+from domain.aggregates.account import Account
+from domain.types.user_id import UserId
+from infrastructure.repositories.account.exceptions.account_not_found_error import AccountNotFoundError
+from infrastructure.repositories.account.interface import AccountRepositoryInterface
+
+
+class AccountLoader:
+    """Coalesces concurrent reads of single accounts into get_accounts_by_ids calls.
+
+    Ids asked for are collected until the end of the current event loop iteration, or for window seconds after the
+    first one when window is set, then read in one repository call, each id once. A batch is also sent as soon as it
+    holds max_batch_size ids. Every caller gets its own aggregate, or its own AccountNotFoundError, and a failed read
+    fails every caller of the batch.
+    """
+
+    def __init__(self, account_repository: AccountRepositoryInterface, window: float = 0.0,
+                 max_batch_size: int = 1000):
+        self._account_repository = account_repository
+        self._window = window
+        self._max_batch_size = max_batch_size
+        self._waiters: Dict[UserId, List[asyncio.Future]] = {}
+        self._handle: Optional[asyncio.Handle] = None
+        self._tasks = set()
+
+    async def load(self, user_id: UserId) -> Account:
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.setdefault(user_id, []).append(waiter)
+        if len(self._waiters) >= self._max_batch_size:
+            self._dispatch()
+        elif self._handle is None and self._window:
+            self._handle = loop.call_later(self._window, self._dispatch)
+        elif self._handle is None:
+            self._handle = loop.call_soon(self._dispatch)
+        return await waiter
+
+    def _dispatch(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        waiters, self._waiters = self._waiters, {}
+        task = asyncio.get_running_loop().create_task(self._load_batch(waiters))
+        # The loop only keeps weak references to tasks.
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, waiters: Dict[UserId, List[asyncio.Future]]):
+        try:
+            accounts = await self._account_repository.get_accounts_by_ids(list(waiters))
+        except Exception as error:
+            for user_waiters in waiters.values():
+                for waiter in user_waiters:
+                    if not waiter.done():
+                        waiter.set_exception(error)
+            return
+        for (user_id, user_waiters), account in zip(waiters.items(), accounts):
+            for index, waiter in enumerate(user_waiters):
+                if waiter.done():
+                    # The caller was cancelled.
+                    continue
+                if account is None:
+                    waiter.set_exception(AccountNotFoundError(f"Account with id {user_id} is not found."))
+                else:
+                    waiter.set_result(account if index == 0 else account.model_copy(deep=True))
@@ -1,26 +1,110 @@
-from typing import List
+from typing import AsyncIterator, List, Optional
 
+from application.services.account_change_feed import AccountChangeFeed
+from application.services.account_loader import AccountLoader
 from domain.aggregates.account import Account
+from domain.events.account_change import AccountChange
+from domain.types.account_version import AccountVersion
+from domain.types.pagination_size import PaginationSize
 from domain.types.user_id import UserId
+from domain.value_objects.account_query import AccountQuery
 from domain.value_objects.pagination import Pagination
+from infrastructure.metrics.registry import REGISTRY, MetricsRegistry
 from infrastructure.repositories.account.interface import AccountRepositoryInterface
 
 
 class AccountService:
-    def __init__(self, account_repository: AccountRepositoryInterface):
+    """Account use cases over a repository, timed in the registry.
+
+    With a get_account_window, which may be 0, concurrent get_account calls are coalesced into batched reads of the
+    repository by an AccountLoader.
+
+    Every account created, patched or deleted through the service is published to a change feed keeping the last
+    change_feed_capacity changes, which subscribe_changes tails.
+    """
+
+    def __init__(self, account_repository: AccountRepositoryInterface, registry: MetricsRegistry = REGISTRY,
+                 get_account_window: Optional[float] = None, change_feed_capacity: int = 10000):
         self._account_repository = account_repository
+        self._change_feed = AccountChangeFeed(change_feed_capacity)
+        self._account_loader = AccountLoader(account_repository, get_account_window) \
+            if get_account_window is not None else None
+        duration = registry.histogram('account_service_duration_seconds', 'Time spent in AccountService calls.',
+                                      ('method',))
+        self._create_account = duration.labels('create_account')
+        self._get_account = duration.labels('get_account')
+        self._get_accounts = duration.labels('get_accounts')
+        self._patch_account = duration.labels('patch_account')
+        self._delete_account = duration.labels('delete_account')
+        self._create_accounts = duration.labels('create_accounts')
+        self._patch_accounts = duration.labels('patch_accounts')
+        self._delete_accounts = duration.labels('delete_accounts')
+        self._search_accounts = duration.labels('search_accounts')
+        self._count_accounts = duration.labels('count_accounts')
 
     async def create_account(self, account_aggregation: Account) -> Account:
-        return await self._account_repository.create_account(account_aggregation)
+        with self._create_account.time():
+            account = await self._account_repository.create_account(account_aggregation)
+        self._change_feed.publish('created', account.user.id, account)
+        return account
 
     async def get_account(self, user_id: UserId) -> Account:
-        return await self._account_repository.get_account(user_id)
+        with self._get_account.time():
+            if self._account_loader is not None:
+                return await self._account_loader.load(user_id)
+            return await self._account_repository.get_account(user_id)
+
+    async def get_accounts(self, pagination: Pagination, query: AccountQuery = AccountQuery()) -> List[Account]:
+        with self._get_accounts.time():
+            return await self._account_repository.get_accounts(pagination, query)
+
+    async def count_accounts(self, query: AccountQuery = AccountQuery()) -> int:
+        with self._count_accounts.time():
+            return await self._account_repository.count_accounts(query)
 
-    async def get_accounts(self, pagination: Pagination) -> List[Account]:
-        return await self._account_repository.get_accounts(pagination)
+    def iter_accounts(self, chunk_size: PaginationSize) -> AsyncIterator[Account]:
+        return self._account_repository.iter_accounts(chunk_size)
 
-    async def patch_account(self, account_aggregation: Account) -> Account:
-        return await self._account_repository.patch_account(account_aggregation)
+    async def patch_account(self, account_aggregation: Account,
+                            expected_version: Optional[AccountVersion] = None) -> Account:
+        with self._patch_account.time():
+            account = await self._account_repository.patch_account(account_aggregation, expected_version)
+        self._change_feed.publish('patched', account.user.id, account)
+        return account
 
     async def delete_account(self, user_id: UserId):
-        await self._account_repository.delete_account(user_id)
+        with self._delete_account.time():
+            await self._account_repository.delete_account(user_id)
+        self._change_feed.publish('deleted', user_id)
+
+    async def create_accounts(self, account_aggregations: List[Account]) -> List[Account]:
+        with self._create_accounts.time():
+            accounts = await self._account_repository.create_accounts(account_aggregations)
+        for account in accounts:
+            self._change_feed.publish('created', account.user.id, account)
+        return accounts
+
+    async def patch_accounts(self, account_aggregations: List[Account]) -> List[Optional[Account]]:
+        with self._patch_accounts.time():
+            accounts = await self._account_repository.patch_accounts(account_aggregations)
+        for account in accounts:
+            if account is not None:
+                self._change_feed.publish('patched', account.user.id, account)
+        return accounts
+
+    async def delete_accounts(self, user_ids: List[UserId]) -> List[bool]:
+        with self._delete_accounts.time():
+            deleted = await self._account_repository.delete_accounts(user_ids)
+        for user_id, found in zip(user_ids, deleted):
+            if found:
+                self._change_feed.publish('deleted', user_id)
+        return deleted
+
+    async def search_accounts(self, text: str, limit: PaginationSize) -> List[Account]:
+        with self._search_accounts.time():
+            return await self._account_repository.search_accounts(text, limit)
+
+    def subscribe_changes(self, since: Optional[int] = None,
+                          keep_alive: Optional[float] = None) -> AsyncIterator[List[AccountChange]]:
+        """Batches of the changes made after the one numbered since, see AccountChangeFeed.subscribe."""
+        return self._change_feed.subscribe(since, keep_alive=keep_alive)
@@ -0,0 +1,2 @@
+class AccountChangesExpiredError(Exception):
+    pass
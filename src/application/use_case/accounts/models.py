@@ -0,0 +1,20 @@
+"""Accounts views models."""
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from domain.aggregates.account import Account
+
+
+class BatchItemResult(BaseModel):
+    """Outcome of one item of a batch request, at the position the item had in the request."""
+    status_code: int
+    account: Optional[Account] = None
+    detail: Optional[str] = None
+
+
+class AccountPage(BaseModel):
+    """Page of a listing, with the number of accounts the listing holds and the cursor of the next page, if any."""
+    items: List[Account]
+    total: int
+    next: Optional[str] = None
@@ -0,0 +1,116 @@
+"""Accounts views responses.
+
+Views hand over aggregates that were already validated, either by the request body or by the repository that built
+them, so these responses serialize them straight to JSON bytes with a precompiled TypeAdapter instead of letting
+FastAPI validate and encode them again. Routes keep declaring their response_model, so the OpenAPI schema is unchanged.
+
+Account responses can be restricted to some fields of the accounts, keeping their nesting, for the fields parameter of
+the views. Accounts listed with fields may not hold the others, see AccountQuery.fields.
+
+Account changes are streamed as Server-Sent Events, by account_change_events.
+"""
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, Optional
+
+from pydantic import TypeAdapter
+from starlette.responses import Response
+
+from application.services.account_importer import AccountImportSummary
+from application.services.exceptions.account_changes_expired_error import AccountChangesExpiredError
+from application.use_case.accounts.models import AccountPage, BatchItemResult
+from domain.aggregates.account import Account
+from domain.events.account_change import AccountChange
+from domain.types.account_field import AccountField
+
+# Path of every account field within an account.
+_FIELD_PATHS: Dict[AccountField, tuple] = {
+    'id': ('user', 'id'),
+    'version': ('version',),
+    'name': ('user', 'personal_information', 'name'),
+    'age': ('user', 'personal_information', 'age'),
+}
+_CHANGE_ADAPTER = TypeAdapter(AccountChange)
+
+
+class _TrustedJSONResponse(Response):
+    media_type = 'application/json'
+    adapter: TypeAdapter
+
+    include: Optional[dict] = None
+
+    def render(self, content: Any) -> bytes:
+        return self.adapter.dump_json(content, include=self.include)
+
+
+class _AccountFieldsJSONResponse(_TrustedJSONResponse):
+    """Response holding accounts, restricted to fields when given."""
+
+    def __init__(self, content: Any, fields: Optional[FrozenSet[AccountField]] = None, **kwargs):
+        if fields is not None:
+            self.include = self._include(_account_include(fields))
+        super().__init__(content, **kwargs)
+
+    @staticmethod
+    def _include(account_include: dict) -> dict:
+        """What to include of the content, given what to include of its accounts."""
+        return account_include
+
+
+class AccountJSONResponse(_AccountFieldsJSONResponse):
+    adapter = TypeAdapter(Account)
+
+
+class AccountsJSONResponse(_AccountFieldsJSONResponse):
+    adapter = TypeAdapter(List[Account])
+
+    @staticmethod
+    def _include(account_include: dict) -> dict:
+        return {'__all__': account_include}
+
+
+class AccountPageJSONResponse(_AccountFieldsJSONResponse):
+    adapter = TypeAdapter(AccountPage)
+
+    @staticmethod
+    def _include(account_include: dict) -> dict:
+        return {'items': {'__all__': account_include}, 'total': True, 'next': True}
+
+
+class BatchItemResultsJSONResponse(_TrustedJSONResponse):
+    adapter = TypeAdapter(List[BatchItemResult])
+
+
+class AccountImportSummaryJSONResponse(_TrustedJSONResponse):
+    adapter = TypeAdapter(AccountImportSummary)
+
+
+async def account_change_events(changes: AsyncIterator[List[AccountChange]]) -> AsyncIterator[bytes]:
+    """Server-Sent Events of batches of changes, one message per batch.
+
+    Every change is an event named by its type, with its sequence number as id, so clients reconnect after it with the
+    Last-Event-ID header, and the change as JSON data. Empty batches are sent as comments, to keep the connection
+    alive. Once the changes are no longer kept, an expired event is sent and the stream ends.
+    """
+    try:
+        async for batch in changes:
+            if not batch:
+                yield b': keep-alive\n\n'
+                continue
+            yield b''.join(b'id: %d\nevent: %s\ndata: %s\n\n'
+                           % (change.sequence, change.type.encode(), _CHANGE_ADAPTER.dump_json(change))
+                           for change in batch)
+    except AccountChangesExpiredError as e:
+        yield b'event: expired\ndata: %s\n\n' % str(e).encode()
+
+
+@lru_cache(maxsize=None)
+def _account_include(fields: FrozenSet[AccountField]) -> dict:
+    """Nested include of pydantic serialization keeping fields of an account. There are few, so each is built once."""
+    include: dict = {}
+    for field in fields:
+        *parents, leaf = _FIELD_PATHS[field]
+        node = include
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[leaf] = True
+    return include
@@ -1,66 +1,259 @@
 """Accounts views."""
-from typing import List, Annotated
+from typing import Dict, FrozenSet, List, Annotated, Optional, AsyncIterator, Union, get_args
 
-from fastapi import APIRouter, HTTPException, Body, Depends
-from pydantic import ValidationError
+from fastapi import APIRouter, HTTPException, Body, Depends, Header, Request
+from fastapi.responses import Response, StreamingResponse
 
+from application.services.account_importer import AccountImporter, AccountImportFormat, AccountImportSummary
 from application.services.account_service import AccountService
+from application.services.exceptions.account_changes_expired_error import AccountChangesExpiredError
+from application.use_case.accounts.models import AccountPage, BatchItemResult
+from application.use_case.accounts.responses import AccountImportSummaryJSONResponse, AccountJSONResponse, \
+    AccountPageJSONResponse, AccountsJSONResponse, BatchItemResultsJSONResponse, account_change_events
 from domain.aggregates.account import Account
+from domain.types.account_field import AccountField
+from domain.types.account_version import AccountVersion
 from domain.types.pagination_page import PaginationPage
 from domain.types.pagination_size import PaginationSize
 from domain.types.user_id import UserId
+from domain.value_objects.account_query import AccountQuery
 from domain.value_objects.pagination import Pagination
+from domain.value_objects.pagination_cursor import PaginationCursor
 from infrastructure.repositories.account.exceptions.account_not_found_error import AccountNotFoundError
-from infrastructure.repositories.account.repositories.account_repository_in_memory.repository import \
-    AccountRepositoryInMemory
+from infrastructure.repositories.account.exceptions.account_version_conflict_error import \
+    AccountVersionConflictError
 
 accounts_router = APIRouter(prefix='/api/account', tags=['accounts'])
-_ACCOUNT_SERVICE = AccountService(AccountRepositoryInMemory())
+_NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+_SEARCH_MAX_LIMIT = 100
+_ETAG_HEADER = 'ETag'
+_IMPORT_FORMATS: Dict[str, AccountImportFormat] = {'text/csv': 'csv', 'application/x-ndjson': 'ndjson'}
+# Seconds without changes after which a change stream sends a comment, so proxies and clients keep the connection.
+_CHANGES_KEEP_ALIVE = 15.0
 
 
-async def account_service_callable() -> AccountService:
-    return _ACCOUNT_SERVICE
+async def account_service_callable(request: Request) -> AccountService:
+    """Account service of the application, built by main from the settings."""
+    return request.app.state.account_service
+
+
+async def account_importer_callable(request: Request) -> AccountImporter:
+    """Account importer of the application, built by main from the settings."""
+    return request.app.state.account_importer
 
 
 @accounts_router.post('/', response_model=Account)
 async def _create_account(account_service: Annotated[AccountService, Depends(account_service_callable)],
                           account: Annotated[Account, Body()]):
     account = await account_service.create_account(account)
-    return account
+    return AccountJSONResponse(account)
+
+
+@accounts_router.post('/batch', response_model=List[BatchItemResult])
+async def _create_accounts(account_service: Annotated[AccountService, Depends(account_service_callable)],
+                           accounts: Annotated[List[Account], Body()]):
+    """Creates every account in a single repository operation."""
+    accounts = await account_service.create_accounts(accounts)
+    return BatchItemResultsJSONResponse([BatchItemResult(status_code=200, account=account) for account in accounts])
+
+
+@accounts_router.patch('/batch', response_model=List[BatchItemResult])
+async def _patch_accounts(account_service: Annotated[AccountService, Depends(account_service_callable)],
+                          accounts: Annotated[List[Account], Body()]):
+    """Patches every account, identified by its user id, in a single repository operation."""
+    patched = iter(await account_service.patch_accounts([account for account in accounts
+                                                         if account.user.id is not None]))
+    results = []
+    for account in accounts:
+        if account.user.id is None:
+            results.append(BatchItemResult(status_code=400, detail="Account user id is required."))
+        elif (patched_account := next(patched)) is None:
+            results.append(BatchItemResult(status_code=404,
+                                           detail=f"Account with id {account.user.id} is not found."))
+        else:
+            results.append(BatchItemResult(status_code=200, account=patched_account))
+    return BatchItemResultsJSONResponse(results)
 
 
-@accounts_router.get('/', response_model=List[Account])
-async def _get_accounts(account_service: Annotated[AccountService, Depends(account_service_callable)], size: int = 100,
-                        page: int = 0):
-    """Returns accounts of the system in function of pagination."""
+@accounts_router.delete('/batch', response_model=List[BatchItemResult])
+async def _delete_accounts(account_service: Annotated[AccountService, Depends(account_service_callable)],
+                           user_ids: Annotated[List[int], Body()]):
+    """Deletes every account in a single repository operation."""
+    deleted = await account_service.delete_accounts([UserId(user_id) for user_id in user_ids])
+    return BatchItemResultsJSONResponse([
+        BatchItemResult(status_code=200) if found else
+        BatchItemResult(status_code=404, detail=f"Account with id {user_id} is not found.")
+        for user_id, found in zip(user_ids, deleted)
+    ])
+
+
+@accounts_router.post('/import', response_model=AccountImportSummary, openapi_extra={'requestBody': {
+    'required': True,
+    'content': {content_type: {'schema': {'type': 'string'}} for content_type in _IMPORT_FORMATS},
+}})
+async def _import_accounts(account_importer: Annotated[AccountImporter, Depends(account_importer_callable)],
+                           request: Request):
+    """Creates the accounts of a CSV or NDJSON body, read as it is received.
+
+    CSV bodies start with a header naming a name and an age column, NDJSON bodies hold an account per line as exported.
+    Rows that are not valid are skipped and counted, and the first ones are reported by line number with the reason.
+    """
+    import_format = _IMPORT_FORMATS.get(request.headers.get('content-type', '').split(';')[0].strip())
+    if import_format is None:
+        raise HTTPException(status_code=415, detail=f"Content-Type must be one of {', '.join(_IMPORT_FORMATS)}.")
+    try:
+        summary = await account_importer.import_accounts(request.stream(), import_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return AccountImportSummaryJSONResponse(summary)
+
+
+@accounts_router.get('/', response_model=Union[List[Account], AccountPage])
+async def _get_accounts(account_service: Annotated[AccountService, Depends(account_service_callable)],
+                        size: int = 100, page: int = 0, cursor: Optional[str] = None, min_age: Optional[int] = None,
+                        max_age: Optional[int] = None, sort: str = 'id', envelope: bool = False,
+                        fields: Optional[str] = None):
+    """Returns accounts of the system in function of pagination.
+
+    Accounts can be filtered by an inclusive age range and sorted by id, age or name, ties being broken by id. Pages
+    are selected by offset with page, or by keyset with the opaque cursor. When a page is full, the X-Next-Cursor
+    header holds the cursor of the following one, which is only valid for the same sort.
+
+    With envelope, the page is returned as an object holding the accounts as items, the number of accounts matching
+    the age range as total, and the next cursor as next, null on the last page.
+
+    With fields, a comma separated list of id, version, name and age, accounts only hold those fields, which are the
+    only ones the repository reads.
+    """
     # TODO: Pagination values should be classes and not an annotations. It should have his own domain.
     try:
-        pagination = Pagination(size=PaginationSize(size), page=PaginationPage(page))
-    except ValidationError as e:
+        query = AccountQuery(min_age=min_age, max_age=max_age, sort=sort, fields=_parse_fields(fields))
+        position = None if cursor is None else PaginationCursor.decode(cursor)
+        if position is not None and position.sort != query.sort:
+            raise ValueError('The cursor was issued for another sort.')
+        pagination = Pagination(size=PaginationSize(size), page=PaginationPage(page),
+                                after_id=None if position is None else position.after_id,
+                                after_value=None if position is None else position.after_value)
+    except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    return await account_service.get_accounts(pagination)
+    accounts = await account_service.get_accounts(pagination, query)
+    headers = {}
+    if len(accounts) == pagination.size:
+        headers[_NEXT_CURSOR_HEADER] = PaginationCursor.after_account(accounts[-1], query.sort).encode()
+    if envelope:
+        total = await account_service.count_accounts(query)
+        return AccountPageJSONResponse(AccountPage(items=accounts, total=total, next=headers.get(_NEXT_CURSOR_HEADER)),
+                                       query.fields, headers=headers)
+    return AccountsJSONResponse(accounts, query.fields, headers=headers)
+
+
+@accounts_router.get('/export', response_class=StreamingResponse)
+async def _export_accounts(account_service: Annotated[AccountService, Depends(account_service_callable)],
+                           chunk_size: int = 1000):
+    """Streams every account as newline delimited JSON, in id order.
+
+    Accounts are read and written chunk_size at a time, and the next chunk is only read once the previous one has been
+    sent, so the export runs in constant memory on a single connection.
+    """
+    try:
+        pagination = Pagination(size=PaginationSize(chunk_size))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(_ndjson_chunks(account_service.iter_accounts(pagination.size), pagination.size),
+                             media_type='application/x-ndjson')
+
+
+async def _ndjson_chunks(accounts: AsyncIterator[Account], chunk_size: int) -> AsyncIterator[bytes]:
+    lines = []
+    async for account in accounts:
+        lines.append(AccountJSONResponse.adapter.dump_json(account))
+        if len(lines) == chunk_size:
+            yield b'\n'.join(lines) + b'\n'
+            lines = []
+    if lines:
+        yield b'\n'.join(lines) + b'\n'
+
+
+@accounts_router.get('/changes', response_class=StreamingResponse)
+async def _account_changes(account_service: Annotated[AccountService, Depends(account_service_callable)],
+                           since: Optional[int] = None, last_event_id: Annotated[Optional[str], Header()] = None):
+    """Streams the accounts created, patched and deleted as Server-Sent Events, as they are.
+
+    Changes are numbered in order and sent after the one numbered since, or Last-Event-ID when reconnecting, or from
+    now without either. The last changes are kept in memory to catch up from: when since is older, or ahead of the
+    last change as after a restart, the response is 410, and an expired event ends streams that fall that far behind.
+    Either way the client reads the accounts again, then subscribes from the last change. Changes are those of this
+    process only.
+    """
+    try:
+        if since is None and last_event_id is not None:
+            since = int(last_event_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail='Last-Event-ID must be the id of a change.')
+    try:
+        changes = account_service.subscribe_changes(since, keep_alive=_CHANGES_KEEP_ALIVE)
+    except AccountChangesExpiredError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+
+    return StreamingResponse(account_change_events(changes), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache'})
+
+
+@accounts_router.get('/search', response_model=List[Account])
+async def _search_accounts(account_service: Annotated[AccountService, Depends(account_service_callable)],
+                           q: str, limit: int = 10):
+    """Returns up to limit accounts whose name is similar to q, most similar first.
+
+    Names are compared by their trigrams, so partial and misspelled names still match.
+    """
+    if not 0 < limit <= _SEARCH_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f'limit must be between 1 and {_SEARCH_MAX_LIMIT}.')
+
+    return AccountsJSONResponse(await account_service.search_accounts(q, PaginationSize(limit)))
 
 
 @accounts_router.get('/{user_id}', response_model=Account)
-async def _get_account(account_service: Annotated[AccountService, Depends(account_service_callable)], user_id: int):
+async def _get_account(account_service: Annotated[AccountService, Depends(account_service_callable)], user_id: int,
+                       if_none_match: Annotated[Optional[str], Header()] = None, fields: Optional[str] = None):
+    """Returns the account with its version as ETag, or 304 without a body when If-None-Match holds that ETag.
+
+    With fields, a comma separated list of id, version, name and age, the account only holds those fields.
+    """
     # TODO: user_id value should be a class and not an annotation. It should have his own domain.
+    try:
+        account_fields = _parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
         data = await account_service.get_account(UserId(user_id))
     except AccountNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
-    return data
+    etag = _etag(data.version)
+    if if_none_match is not None and _etag_none_match(if_none_match, etag):
+        return Response(status_code=304, headers={_ETAG_HEADER: etag})
+    return AccountJSONResponse(data, account_fields, headers={_ETAG_HEADER: etag})
 
 
 @accounts_router.patch('/{user_id}', response_model=Account)
 async def _patch_account(account_service: Annotated[AccountService, Depends(account_service_callable)],
-                          account: Annotated[Account, Body()], user_id: int):
+                          account: Annotated[Account, Body()], user_id: int,
+                          if_match: Annotated[Optional[str], Header()] = None):
+    """Patches the account and returns it with its new ETag.
+
+    With If-Match, the patch only applies while the account is still at the version of that ETag, and fails with 412
+    otherwise, so a client cannot overwrite a change it has not seen.
+    """
     account.user.id = user_id
+    expected_version = None if if_match is None or if_match.strip() == '*' else _parse_etag(if_match)
     try:
-        account = await account_service.patch_account(account)
+        account = await account_service.patch_account(account, expected_version)
     except AccountNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
-    return account
+    except AccountVersionConflictError as e:
+        raise HTTPException(status_code=412, detail=str(e))
+    return AccountJSONResponse(account, headers={_ETAG_HEADER: _etag(account.version)})
 
 
 @accounts_router.delete('/{user_id}')
@@ -71,3 +264,34 @@ async def _delete_account(account_service: Annotated[AccountService, Depends(acc
     except AccountNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     return
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[FrozenSet[AccountField]]:
+    """Account fields of a fields parameter, a comma separated list of them."""
+    if fields is None:
+        return None
+    names = frozenset(name.strip() for name in fields.split(',') if name.strip())
+    if not names or not names <= set(get_args(AccountField)):
+        raise ValueError(f"fields must be a comma separated list of {', '.join(get_args(AccountField))}.")
+    return names
+
+
+def _etag(version: AccountVersion) -> str:
+    return f'"{version}"'
+
+
+def _etag_none_match(header: str, etag: str) -> bool:
+    """Whether the comma separated ETags of an If-None-Match header hold etag, weak ones included, or are *."""
+    for candidate in header.split(','):
+        candidate = candidate.strip().removeprefix('W/')
+        if candidate in ('*', etag):
+            return True
+    return False
+
+
+def _parse_etag(header: str) -> AccountVersion:
+    """Version of the single strong ETag of an If-Match header, as issued by the account views."""
+    etag = header.strip()
+    if len(etag) < 3 or etag[0] != '"' or etag[-1] != '"' or not etag[1:-1].isdigit():
+        raise HTTPException(status_code=412, detail=f'If-Match must be * or a single account ETag, not {header}.')
+    return AccountVersion(int(etag[1:-1]))
@@ -0,0 +1,13 @@
+"""Metrics views."""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from infrastructure.metrics.registry import REGISTRY
+
+metrics_router = APIRouter(tags=['metrics'])
+_PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+
+@metrics_router.get('/metrics', include_in_schema=False)
+async def _get_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=_PROMETHEUS_CONTENT_TYPE)
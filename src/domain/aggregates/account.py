@@ -1,7 +1,15 @@
 from pydantic import BaseModel
 
 from domain.entities.user import User
+from domain.trusted import construct_trusted
+from domain.types.account_version import AccountVersion
 
 
 class Account(BaseModel):
     user: User
+    version: AccountVersion = 0
+
+    @classmethod
+    def trusted(cls, user: User, version: AccountVersion) -> 'Account':
+        """Builds an account from already validated values, see domain.trusted."""
+        return construct_trusted(cls, {'user': user, 'version': version})
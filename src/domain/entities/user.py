@@ -1,9 +1,16 @@
 from typing import Optional
 
 from domain.entities.user_creation import UserCreation
+from domain.trusted import construct_trusted
 from domain.types.user_id import UserId
+from domain.value_objects.personal_information import PersonalInformation
 
 
 class User(UserCreation):
     """Root entity."""
     id: Optional[UserId]
+
+    @classmethod
+    def trusted(cls, user_id: Optional[UserId], personal_information: PersonalInformation) -> 'User':
+        """Builds a user from already validated values, see domain.trusted."""
+        return construct_trusted(cls, {'personal_information': personal_information, 'id': user_id})
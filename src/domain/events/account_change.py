@@ -0,0 +1,28 @@
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+
+from domain.aggregates.account import Account
+from domain.trusted import construct_trusted
+from domain.types.account_change_type import AccountChangeType
+from domain.types.user_id import UserId
+
+
+class AccountChange(BaseModel):
+    """Domain event of an account created, patched or deleted, numbered by its position in the change feed.
+
+    Creations and patches hold the account as it was once changed, deletions hold no account.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    sequence: int
+    type: AccountChangeType
+    user_id: UserId
+    account: Optional[Account] = None
+
+    @classmethod
+    def trusted(cls, sequence: int, change_type: AccountChangeType, user_id: UserId,
+                account: Optional[Account]) -> 'AccountChange':
+        """Builds a change from already validated values, see domain.trusted."""
+        return construct_trusted(cls, {'sequence': sequence, 'type': change_type, 'user_id': user_id,
+                                       'account': account})
@@ -0,0 +1,50 @@
+"""Trusted construction of domain models, for data that was already validated, such as the rows of a repository.
+
+Repositories only store values that passed validation when they were written, so the models they read back are built
+by setting every field directly instead of validating it again. pydantic's model_construct skips validation too, but
+it is slower than validating a whole aggregate at once, as it resolves aliases and defaults in Python field by field.
+
+set_trusted_validation(True) validates trusted models like any other, to check in tests or while debugging that no
+repository hands over invalid data. The DOMAIN_VALIDATE_TRUSTED setting turns it on in the application.
+
+Partial models, holding None in the fields a listing did not ask for, are built the same way but never validated, as
+they are not valid values. They must only be serialized with the fields they hold.
+"""
+from typing import Any, Dict, Type, TypeVar
+
+from pydantic import BaseModel
+
+_Model = TypeVar('_Model', bound=BaseModel)
+
+# Setters of the slots every model has, called directly as BaseModel.__setattr__ would validate or refuse the values.
+_set_dict = BaseModel.__dict__['__dict__'].__set__
+_set_fields_set = BaseModel.__dict__['__pydantic_fields_set__'].__set__
+_set_extra = BaseModel.__dict__['__pydantic_extra__'].__set__
+_set_private = BaseModel.__dict__['__pydantic_private__'].__set__
+_validate = False
+
+
+def set_trusted_validation(enabled: bool):
+    """Whether trusted models are validated, which they are not by default."""
+    global _validate
+    _validate = enabled
+
+
+def construct_trusted(model_class: Type[_Model], fields: Dict[str, Any]) -> _Model:
+    """Builds a model from the value of every one of its fields, without validating them unless turned on.
+
+    Nested models must be given as models, built the same way.
+    """
+    if _validate:
+        return model_class.model_validate(fields)
+    return construct_partial(model_class, fields)
+
+
+def construct_partial(model_class: Type[_Model], fields: Dict[str, Any]) -> _Model:
+    """Builds a model from the value of every one of its fields, some of them None though required, never validated."""
+    model = object.__new__(model_class)
+    _set_dict(model, fields)
+    _set_fields_set(model, set(fields))
+    _set_extra(model, None)
+    _set_private(model, None)
+    return model
@@ -0,0 +1,4 @@
+from typing import Literal
+
+# Kind of change made to an account, see AccountChange.
+AccountChangeType = Literal['created', 'patched', 'deleted']
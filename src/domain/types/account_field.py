@@ -0,0 +1,4 @@
+from typing import Literal
+
+# Field of an account a listing can be restricted to, see AccountQuery.fields.
+AccountField = Literal['id', 'version', 'name', 'age']
@@ -0,0 +1,4 @@
+from typing import Literal
+
+# Field accounts are ordered by, ties being broken by id.
+AccountSort = Literal['id', 'age', 'name']
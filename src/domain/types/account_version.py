@@ -0,0 +1,6 @@
+from typing import Annotated
+
+from pydantic import Field
+
+# Version of an account, 1 once created and bumped by every patch. 0 until the account is stored.
+AccountVersion = Annotated[int, Field(ge=0)]
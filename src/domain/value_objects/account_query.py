@@ -0,0 +1,38 @@
+from typing import FrozenSet, Optional
+
+from pydantic import BaseModel, ConfigDict, model_validator
+
+from domain.types.account_field import AccountField
+from domain.types.account_sort import AccountSort
+from domain.types.personal_age import PersonalAge
+
+
+class AccountQuery(BaseModel):
+    """Accounts to list, their order, and the fields they need. Age bounds are inclusive.
+
+    With fields, repositories may leave the other fields of the accounts listed out, as None, but always build the id
+    and the sort field, which the pages and their cursors are made of.
+    """
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
+    min_age: Optional[PersonalAge] = None
+    max_age: Optional[PersonalAge] = None
+    sort: AccountSort = 'id'
+    fields: Optional[FrozenSet[AccountField]] = None
+
+    @model_validator(mode='after')
+    def _check_age_range(self) -> 'AccountQuery':
+        if self.min_age is not None and self.max_age is not None and self.min_age > self.max_age:
+            raise ValueError('min_age can not be greater than max_age.')
+        return self
+
+    @property
+    def filtered(self) -> bool:
+        return self.min_age is not None or self.max_age is not None
+
+    def matches(self, age: PersonalAge) -> bool:
+        return (self.min_age is None or age >= self.min_age) and (self.max_age is None or age <= self.max_age)
+
+    def includes(self, field: AccountField) -> bool:
+        """Whether the accounts listed must hold field."""
+        return self.fields is None or field in self.fields or field in ('id', self.sort)
@@ -1,11 +1,32 @@
-from pydantic import BaseModel, ConfigDict
+from typing import Optional, Union
+
+from pydantic import BaseModel, ConfigDict, model_validator
 
 from domain.types.pagination_page import PaginationPage
 from domain.types.pagination_size import PaginationSize
+from domain.types.personal_age import PersonalAge
+from domain.types.personal_name import PersonalName
+from domain.types.user_id import UserId
 
 
 class Pagination(BaseModel):
+    """Offset pagination by page, or keyset pagination when after_id is set.
+
+    Keyset pagination returns the accounts with an id greater than after_id, so its cost does not grow with the depth
+    of the page and deletes between requests neither skip nor repeat accounts. When accounts are sorted by another
+    field, after_value holds that field of the last account seen, and the page starts after (after_value, after_id).
+    """
     model_config = ConfigDict(extra='forbid', frozen=True)
 
     size: PaginationSize
-    page: PaginationPage
+    page: PaginationPage = 0
+    after_id: Optional[UserId] = None
+    after_value: Optional[Union[PersonalAge, PersonalName]] = None
+
+    @model_validator(mode='after')
+    def _check_mode(self) -> 'Pagination':
+        if self.after_id is not None and self.page != 0:
+            raise ValueError('page and after_id can not be used together.')
+        if self.after_value is not None and self.after_id is None:
+            raise ValueError('after_value requires after_id.')
+        return self
@@ -0,0 +1,46 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import Optional, Union
+
+from pydantic import BaseModel, ConfigDict, model_validator
+
+from domain.aggregates.account import Account
+from domain.types.account_sort import AccountSort
+from domain.types.personal_age import PersonalAge
+from domain.types.personal_name import PersonalName
+from domain.types.user_id import UserId
+
+
+class PaginationCursor(BaseModel):
+    """Position of a keyset page. Clients receive it encoded and must treat it as an opaque string.
+
+    A cursor is only valid for the sort it was issued for. after_value is the sorted field of the last account seen,
+    unless accounts are sorted by id.
+    """
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
+    after_id: UserId
+    sort: AccountSort = 'id'
+    after_value: Optional[Union[PersonalAge, PersonalName]] = None
+
+    @model_validator(mode='after')
+    def _check_after_value(self) -> 'PaginationCursor':
+        if self.sort == 'id':
+            if self.after_value is not None:
+                raise ValueError('after_value can not be used with the id sort.')
+        elif not isinstance(self.after_value, int if self.sort == 'age' else str):
+            raise ValueError(f'after_value must be the {self.sort} of the last account for the {self.sort} sort.')
+        return self
+
+    @classmethod
+    def after_account(cls, account: Account, sort: AccountSort) -> 'PaginationCursor':
+        """Cursor of the page following the given account, in the given sort."""
+        after_value = None if sort == 'id' else getattr(account.user.personal_information, sort)
+        return cls(after_id=account.user.id, sort=sort, after_value=after_value)
+
+    def encode(self) -> str:
+        return urlsafe_b64encode(self.model_dump_json(exclude_defaults=True).encode()).decode().rstrip('=')
+
+    @classmethod
+    def decode(cls, cursor: str) -> 'PaginationCursor':
+        """Raises ValueError when the cursor was not produced by encode."""
+        return cls.model_validate_json(urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
@@ -1,5 +1,8 @@
+from typing import Optional
+
 from pydantic import BaseModel, ConfigDict
 
+from domain.trusted import construct_partial, construct_trusted
 from domain.types.personal_age import PersonalAge
 from domain.types.personal_name import PersonalName
 
@@ -9,3 +12,13 @@ class PersonalInformation(BaseModel):
 
     age: PersonalAge
     name: PersonalName
+
+    @classmethod
+    def trusted(cls, age: PersonalAge, name: PersonalName) -> 'PersonalInformation':
+        """Builds personal information from already validated values, see domain.trusted."""
+        return construct_trusted(cls, {'age': age, 'name': name})
+
+    @classmethod
+    def partial(cls, age: Optional[PersonalAge], name: Optional[PersonalName]) -> 'PersonalInformation':
+        """Builds personal information without the fields a listing did not ask for, see domain.trusted."""
+        return construct_partial(cls, {'age': age, 'name': name})
@@ -0,0 +1,102 @@
+import zlib
+from typing import Dict, Optional, Type
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Optional, responses are only compressed with gzip without it.
+    brotli = None
+
+# Levels favouring speed over size, as every response is compressed as it is sent.
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+class _GzipCompressor:
+    def __init__(self):
+        # 16 more window bits write the gzip header and trailer around the deflate stream.
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, last: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliCompressor:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes, last: bool) -> bytes:
+        return self._compressor.process(data) + (self._compressor.finish() if last else self._compressor.flush())
+
+
+_COMPRESSORS: Dict[str, Type] = {'gzip': _GzipCompressor}
+if brotli is not None:
+    _COMPRESSORS = {'br': _BrotliCompressor, **_COMPRESSORS}
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing response bodies of at least minimum_size bytes with brotli or gzip.
+
+    The encoding is the first the request accepts of br, when the brotli package is installed, and gzip. Bodies
+    streamed in several messages are always compressed, message by message, each being flushed so that none is held
+    back, as the events of a stream must not be. Responses that already have a Content-Encoding are left as they are.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1000):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        encoding = _accepted_encoding(scope) if scope['type'] == 'http' else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        compressor = None
+
+        async def send_compressed(message: Message):
+            nonlocal start, compressor
+            if message['type'] == 'http.response.start':
+                # Held back until the first body message tells whether the response is compressed.
+                start = message
+                return
+            if message['type'] != 'http.response.body':
+                await send(message)
+                return
+            more_body = message.get('more_body', False)
+            if start is not None:
+                headers = MutableHeaders(raw=start['headers'])
+                if 'content-encoding' not in headers and (more_body or
+                                                          len(message.get('body', b'')) >= self.minimum_size):
+                    compressor = _COMPRESSORS[encoding]()
+                    headers['Content-Encoding'] = encoding
+                    headers.add_vary_header('Accept-Encoding')
+                    del headers['Content-Length']
+            if compressor is not None:
+                message = {**message, 'body': compressor.compress(message.get('body', b''), not more_body)}
+                if start is not None and not more_body:
+                    headers['Content-Length'] = str(len(message['body']))
+            if start is not None:
+                await send(start)
+                start = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+
+def _accepted_encoding(scope: Scope) -> Optional[str]:
+    """Preferred encoding among the ones the Accept-Encoding header of the request does not give a quality of 0."""
+    accepted = set()
+    for coding in Headers(scope=scope).get('accept-encoding', '').split(','):
+        name, _, parameters = coding.partition(';')
+        quality = parameters.strip().removeprefix('q=')
+        try:
+            if quality and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(name.strip().lower())
+    return next((encoding for encoding in _COMPRESSORS if encoding in accepted), None)
@@ -0,0 +1,61 @@
+"""Fenwick (binary indexed) tree over a growable sequence of counters."""
+from array import array
+from typing import Iterable
+
+
+class FenwickTree:
+    """Prefix sums and rank lookups in O(log n) over an append-only sequence of non-negative counters."""
+
+    def __init__(self):
+        # 1-based layout, slot 0 is never used.
+        self._tree = array('q', [0])
+
+    @classmethod
+    def build(cls, values: Iterable[int]) -> 'FenwickTree':
+        """Builds the tree of values in O(n)."""
+        fenwick_tree = cls()
+        tree = fenwick_tree._tree
+        tree.extend(values)
+        size = len(tree)
+        for index in range(1, size):
+            parent = index + (index & -index)
+            if parent < size:
+                tree[parent] += tree[index]
+        return fenwick_tree
+
+    def __len__(self) -> int:
+        return len(self._tree) - 1
+
+    def append(self, value: int):
+        index = len(self._tree)
+        lower = index - (index & -index)
+        # The new node covers positions (lower, index]: its own value plus the ones already stored.
+        self._tree.append(value + self.prefix_sum(index - 1) - self.prefix_sum(lower))
+
+    def add(self, position: int, delta: int):
+        index = position + 1
+        size = len(self._tree)
+        while index < size:
+            self._tree[index] += delta
+            index += index & -index
+
+    def prefix_sum(self, end: int) -> int:
+        """Sum of the counters at positions [0, end)."""
+        total = 0
+        while end > 0:
+            total += self._tree[end]
+            end -= end & -end
+        return total
+
+    def find(self, rank: int) -> int:
+        """Position where the running sum first exceeds rank, or the length of the tree if it never does."""
+        position = 0
+        size = len(self._tree)
+        step = 1 << size.bit_length()
+        while step:
+            candidate = position + step
+            if candidate < size and self._tree[candidate] <= rank:
+                position = candidate
+                rank -= self._tree[candidate]
+            step >>= 1
+        return position
@@ -0,0 +1,61 @@
+"""Bounded least recently used cache with expiration."""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+_K = TypeVar('_K', bound=Hashable)
+_V = TypeVar('_V')
+
+
+@dataclass
+class CacheStatistics:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class LRUCache(Generic[_K, _V]):
+    """Keeps up to max_size values, each one for ttl seconds at most, evicting the least recently used first.
+
+    Every operation is O(1). Expired values are dropped lazily when they are read.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        self._values: OrderedDict[_K, Tuple[float, _V]] = OrderedDict()
+        self.statistics = CacheStatistics()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, key: _K) -> Optional[_V]:
+        try:
+            expires_at, value = self._values[key]
+        except KeyError:
+            self.statistics.misses += 1
+            return None
+        if self._ttl is not None and expires_at <= self._clock():
+            del self._values[key]
+            self.statistics.misses += 1
+            self.statistics.evictions += 1
+            return None
+        self._values.move_to_end(key)
+        self.statistics.hits += 1
+        return value
+
+    def set(self, key: _K, value: _V):
+        expires_at = self._clock() + self._ttl if self._ttl is not None else 0.0
+        self._values[key] = (expires_at, value)
+        self._values.move_to_end(key)
+        while len(self._values) > self._max_size:
+            self._values.popitem(last=False)
+            self.statistics.evictions += 1
+
+    def pop(self, key: _K):
+        self._values.pop(key, None)
+
+    def clear(self):
+        self._values.clear()
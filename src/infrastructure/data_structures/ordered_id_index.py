@@ -0,0 +1,93 @@
+"""Insertion ordered index of ids."""
+from bisect import bisect_left, bisect_right
+from itertools import repeat
+from typing import Dict, Iterator, List, Optional
+
+from domain.types.user_id import UserId
+from infrastructure.data_structures.fenwick_tree import FenwickTree
+
+
+class OrderedIdIndex:
+    """Ids in insertion order with O(1) membership, O(log n) removal and O(log n + size) slicing by offset.
+
+    Removed ids stay in place as tombstones, so a removal never shifts the rest of the ids. Tombstones are compacted
+    away once they outnumber the live ids, which keeps the amortized cost of every operation unchanged.
+
+    Ids must be appended in increasing order for after to be correct.
+    """
+    _COMPACTION_MIN_SIZE = 1024
+
+    def __init__(self):
+        self._ids: List[UserId] = []
+        self._positions: Dict[UserId, int] = {}
+        self._alive = FenwickTree()
+
+    @classmethod
+    def build(cls, user_ids: List[UserId]) -> 'OrderedIdIndex':
+        """Builds the index of user_ids, which must be increasing, in O(n)."""
+        ordered_id_index = cls()
+        ordered_id_index._ids = list(user_ids)
+        ordered_id_index._positions = dict(zip(user_ids, range(len(user_ids))))
+        ordered_id_index._alive = FenwickTree.build(repeat(1, len(user_ids)))
+        return ordered_id_index
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, user_id: UserId) -> bool:
+        return user_id in self._positions
+
+    def append(self, user_id: UserId):
+        self._positions[user_id] = len(self._ids)
+        self._ids.append(user_id)
+        self._alive.append(1)
+
+    def remove(self, user_id: UserId):
+        position = self._positions.pop(user_id)
+        self._alive.add(position, -1)
+        if len(self._ids) > self._COMPACTION_MIN_SIZE and len(self._positions) * 2 < len(self._ids):
+            self._compact()
+
+    def restore(self, user_id: UserId):
+        """Puts a removed id back at its place in id order, in O(log n) while its tombstone is kept and O(n) after."""
+        position = bisect_left(self._ids, user_id)
+        if position < len(self._ids) and self._ids[position] == user_id:
+            self._positions[user_id] = position
+            self._alive.add(position, 1)
+            return
+        self._compact()
+        self._ids.insert(bisect_left(self._ids, user_id), user_id)
+        self._positions = {user_id: position for position, user_id in enumerate(self._ids)}
+        self._alive = FenwickTree.build(1 for _ in self._ids)
+
+    def slice(self, start: int, size: int) -> List[UserId]:
+        """Returns up to size live ids, skipping the first start live ones."""
+        return self._collect(self._alive.find(start), size)
+
+    def after(self, user_id: UserId, size: int) -> List[UserId]:
+        """Returns up to size live ids greater than user_id."""
+        return self._collect(bisect_right(self._ids, user_id), size)
+
+    def iter_after(self, user_id: Optional[UserId] = None) -> Iterator[UserId]:
+        """Yields the live ids greater than user_id, or every live id when it is None."""
+        positions = self._positions
+        for position in range(0 if user_id is None else bisect_right(self._ids, user_id), len(self._ids)):
+            user_id = self._ids[position]
+            if positions.get(user_id) == position:
+                yield user_id
+
+    def _collect(self, position: int, size: int) -> List[UserId]:
+        ids = []
+        positions = self._positions
+        total = len(self._ids)
+        while position < total and len(ids) < size:
+            user_id = self._ids[position]
+            if positions.get(user_id) == position:
+                ids.append(user_id)
+            position += 1
+        return ids
+
+    def _compact(self):
+        self._ids = [user_id for position, user_id in enumerate(self._ids) if self._positions.get(user_id) == position]
+        self._positions = {user_id: position for position, user_id in enumerate(self._ids)}
+        self._alive = FenwickTree.build(1 for _ in self._ids)
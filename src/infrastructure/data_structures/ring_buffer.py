@@ -0,0 +1,43 @@
+"""Bounded buffer of the last items appended, read by sequence number."""
+from typing import Generic, List, Optional, TypeVar
+
+_T = TypeVar('_T')
+
+
+class RingBuffer(Generic[_T]):
+    """Keeps the last capacity items appended, numbered from 1 in the order they were appended.
+
+    Appending is O(1) and overwrites the oldest item once full. Reading the items after a sequence number is O(items
+    read), whatever the number of items appended.
+    """
+
+    def __init__(self, capacity: int):
+        self._items: List[Optional[_T]] = [None] * capacity
+        self._last_sequence = 0
+
+    @property
+    def last_sequence(self) -> int:
+        """Sequence number of the last item appended, 0 before any."""
+        return self._last_sequence
+
+    @property
+    def first_sequence(self) -> int:
+        """Sequence number of the oldest item kept, or of the next item to be appended when empty."""
+        return max(self._last_sequence - len(self._items), 0) + 1
+
+    def append(self, item: _T) -> int:
+        self._last_sequence += 1
+        self._items[self._last_sequence % len(self._items)] = item
+        return self._last_sequence
+
+    def after(self, sequence: int, limit: int) -> List[_T]:
+        """Up to limit items following the item numbered sequence, 0 to read from the first item.
+
+        Raises IndexError when items following sequence were overwritten, or sequence was not appended yet.
+        """
+        if not self.first_sequence - 1 <= sequence <= self._last_sequence:
+            raise IndexError(f'Items after {sequence} are not kept, only the ones after {self.first_sequence - 1} up '
+                             f'to {self._last_sequence} are.')
+        capacity = len(self._items)
+        return [self._items[item_sequence % capacity]
+                for item_sequence in range(sequence + 1, min(sequence + limit, self._last_sequence) + 1)]
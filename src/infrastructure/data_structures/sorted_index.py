@@ -0,0 +1,101 @@
+"""Sorted index of comparable keys."""
+from bisect import bisect_left, bisect_right, insort
+from typing import Generic, Iterator, List, TypeVar
+
+from infrastructure.data_structures.fenwick_tree import FenwickTree
+
+K = TypeVar('K')
+
+
+class SortedIndex(Generic[K]):
+    """Sorted keys with O(log n) search by key or by position and inserts and removals in O(log n + load).
+
+    Keys are split in sorted buckets of at most twice the load, so an insert or a removal only moves the keys of one
+    bucket instead of the whole index. A Fenwick tree over the bucket lengths turns a position into a bucket and
+    back in O(log n). It is rebuilt when a bucket is split or dropped, once every load updates at most.
+
+    Keys must be unique; the indexes of the repositories make them so by ending every key with the id of the account.
+    """
+    _LOAD = 512
+
+    def __init__(self):
+        self._buckets: List[List[K]] = []
+        self._maxes: List[K] = []
+        self._lengths = FenwickTree()
+        self._size = 0
+
+    @classmethod
+    def build(cls, keys: List[K]) -> 'SortedIndex[K]':
+        """Builds the index of keys, which must be sorted, in O(n)."""
+        sorted_index = cls()
+        sorted_index._buckets = [keys[start:start + cls._LOAD] for start in range(0, len(keys), cls._LOAD)]
+        sorted_index._maxes = [bucket[-1] for bucket in sorted_index._buckets]
+        sorted_index._size = len(keys)
+        sorted_index._rebuild_lengths()
+        return sorted_index
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, key: K):
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            self._lengths.append(1)
+        else:
+            index = min(bisect_left(self._maxes, key), len(self._buckets) - 1)
+            bucket = self._buckets[index]
+            insort(bucket, key)
+            self._maxes[index] = bucket[-1]
+            if len(bucket) > 2 * self._LOAD:
+                self._buckets[index:index + 1] = bucket[:self._LOAD], bucket[self._LOAD:]
+                self._maxes[index:index + 1] = bucket[self._LOAD - 1], bucket[-1]
+                self._rebuild_lengths()
+            else:
+                self._lengths.add(index, 1)
+        self._size += 1
+
+    def remove(self, key: K):
+        """Removes the key, which must be in the index."""
+        index = bisect_left(self._maxes, key)
+        bucket = self._buckets[index]
+        del bucket[bisect_left(bucket, key)]
+        self._size -= 1
+        if bucket:
+            self._maxes[index] = bucket[-1]
+            self._lengths.add(index, -1)
+        else:
+            del self._buckets[index]
+            del self._maxes[index]
+            self._rebuild_lengths()
+
+    def __getitem__(self, position: int) -> K:
+        index = self._lengths.find(position)
+        return self._buckets[index][position - self._lengths.prefix_sum(index)]
+
+    def bisect_left(self, key: K) -> int:
+        """Position of the first key not lower than key."""
+        index = bisect_left(self._maxes, key)
+        if index == len(self._buckets):
+            return self._size
+        return self._lengths.prefix_sum(index) + bisect_left(self._buckets[index], key)
+
+    def bisect_right(self, key: K) -> int:
+        """Position of the first key greater than key."""
+        index = bisect_right(self._maxes, key)
+        if index == len(self._buckets):
+            return self._size
+        return self._lengths.prefix_sum(index) + bisect_right(self._buckets[index], key)
+
+    def iter_from(self, position: int) -> Iterator[K]:
+        """Yields the keys in order, from the one at position."""
+        if position >= self._size:
+            return
+        index = self._lengths.find(position)
+        offset = position - self._lengths.prefix_sum(index)
+        for index in range(index, len(self._buckets)):
+            yield from self._buckets[index][offset:] if offset else self._buckets[index]
+            offset = 0
+
+    def _rebuild_lengths(self):
+        self._lengths = FenwickTree.build(len(bucket) for bucket in self._buckets)
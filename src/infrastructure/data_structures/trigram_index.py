@@ -0,0 +1,105 @@
+"""Trigram inverted index for fuzzy text search."""
+from collections import Counter
+from heapq import nlargest
+from math import ceil
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+from domain.types.user_id import UserId
+
+# Lowest similarity a match can have, the default of PostgreSQL pg_trgm.
+SIMILARITY_THRESHOLD = 0.3
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Trigrams of every word of the text, lower cased and padded as pg_trgm does, so word starts weigh more."""
+    grams = set()
+    for word in text.lower().split():
+        padded = f'  {word} '
+        grams.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def similarity(left: FrozenSet[str], right: FrozenSet[str]) -> float:
+    """Share of the trigrams of both texts found in each of them, from 0 to 1."""
+    if not left or not right:
+        return 0.0
+    shared = len(left & right)
+    return shared / (len(left) + len(right) - shared)
+
+
+class TrigramIndex:
+    """Ids indexed by the trigrams of a text, searched by similarity to another text.
+
+    An id whose similarity to a query reaches the threshold shares at least a known number of its trigrams, so it
+    appears in one of the rarest posting lists of the query. Only those lists are walked to find candidates, and
+    the other ones are intersected with the candidates, which keeps common trigrams from dominating the cost.
+    """
+
+    _THRESHOLD_STEPS = (0.8, 0.5)
+
+    def __init__(self):
+        self._postings: Dict[str, Set[UserId]] = {}
+        self._sizes: Dict[UserId, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def add(self, user_id: UserId, text: str):
+        grams = trigrams(text)
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                posting = self._postings[gram] = set()
+            posting.add(user_id)
+        self._sizes[user_id] = len(grams)
+
+    def remove(self, user_id: UserId, text: str):
+        """Removes the id, which must have been added with the same text."""
+        for gram in trigrams(text):
+            posting = self._postings[gram]
+            posting.discard(user_id)
+            if not posting:
+                del self._postings[gram]
+        del self._sizes[user_id]
+
+    def search(self, text: str, limit: int, threshold: float = SIMILARITY_THRESHOLD) -> List[Tuple[float, UserId]]:
+        """Up to limit (similarity, id) pairs with a similarity of at least threshold, most similar first.
+
+        Ties are broken by id, lowest first. Stricter thresholds are tried first, as they need fewer posting lists to
+        find their candidates, and the lists walked by one are reused by the next, less strict, one. The search stops
+        at the first threshold that limit ids reach.
+        """
+        query = trigrams(text)
+        if not query or limit <= 0:
+            return []
+        postings = sorted((self._postings.get(gram, set()) for gram in query), key=len)
+        counts: Counter = Counter()
+        walked = 0
+        for step_threshold in [step for step in self._THRESHOLD_STEPS if step > threshold] + [threshold]:
+            # similarity <= shared / len(query), so a match shares at least required trigrams of the query and
+            # appears in one of its len(query) - required + 1 rarest posting lists.
+            required = max(ceil(step_threshold * len(query) - 1e-9), 1)
+            candidates = len(query) - required + 1
+            for posting in postings[walked:candidates]:
+                counts.update(posting)
+            walked = candidates
+            matches = self._matches(query, counts, postings[candidates:], required, step_threshold)
+            if len(matches) >= limit or step_threshold == threshold:
+                return nlargest(limit, matches, key=lambda match: (match[0], -match[1]))
+        return []
+
+    def _matches(self, query: FrozenSet[str], counts: Counter, other_postings: List[Set[UserId]], required: int,
+                 threshold: float) -> List[Tuple[float, UserId]]:
+        """(similarity, id) pairs of the candidates counted with a similarity of at least threshold."""
+        others: Counter = Counter()
+        for posting in other_postings:
+            others.update(counts.keys() & posting)
+        sizes = self._sizes
+        matches = []
+        for user_id, shared in counts.items():
+            shared += others.get(user_id, 0)
+            if shared >= required:
+                score = shared / (len(query) + sizes[user_id] - shared)
+                if score >= threshold:
+                    matches.append((score, user_id))
+        return matches
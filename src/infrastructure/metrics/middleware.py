@@ -0,0 +1,86 @@
+import time
+from typing import Dict, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from infrastructure.metrics.registry import BYTES_BUCKETS, MetricsRegistry
+
+# Label of the requests no route matched, so unknown paths cannot blow up the number of series.
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording the latency, status code and body sizes of every HTTP request, per route.
+
+    Requests are labelled with the path template of the route that handled them, such as /api/account/{user_id}, which
+    the router leaves in the ASGI scope. Bodies are measured as they stream, without being buffered; request bodies
+    the handler does not read are measured by their Content-Length header.
+    """
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry):
+        self.app = app
+        self._requests = registry.counter(
+            'http_requests', 'HTTP requests handled, by route and status code.', ('method', 'route', 'status'))
+        self._duration = registry.histogram(
+            'http_request_duration_seconds', 'Time spent handling HTTP requests.', ('method', 'route'))
+        self._in_progress = registry.gauge('http_requests_in_progress', 'HTTP requests being handled.').labels()
+        self._request_size = registry.histogram(
+            'http_request_size_bytes', 'Size of HTTP request bodies.', ('method', 'route'), BYTES_BUCKETS)
+        self._response_size = registry.histogram(
+            'http_response_size_bytes', 'Size of HTTP response bodies.', ('method', 'route'), BYTES_BUCKETS)
+        self._route_metrics: Dict[Tuple[str, str], tuple] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        request_size = response_size = 0
+        status = 500
+
+        async def receive_counting() -> Message:
+            nonlocal request_size
+            message = await receive()
+            if message['type'] == 'http.request':
+                request_size += len(message.get('body', b''))
+            return message
+
+        async def send_counting(message: Message):
+            nonlocal response_size, status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                response_size += len(message.get('body', b''))
+            await send(message)
+
+        self._in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_counting, send_counting)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._in_progress.dec()
+            route = scope.get('route')
+            route_path = route.path if route is not None else UNMATCHED_ROUTE
+            duration, request_size_histogram, response_size_histogram = self._metrics_of(scope['method'], route_path)
+            duration.observe(elapsed)
+            request_size_histogram.observe(request_size or _content_length(scope))
+            response_size_histogram.observe(response_size)
+            self._requests.labels(scope['method'], route_path, status).inc()
+
+    def _metrics_of(self, method: str, route: str) -> tuple:
+        metrics = self._route_metrics.get((method, route))
+        if metrics is None:
+            metrics = self._route_metrics[(method, route)] = (
+                self._duration.labels(method, route),
+                self._request_size.labels(method, route),
+                self._response_size.labels(method, route),
+            )
+        return metrics
+
+
+def _content_length(scope: Scope) -> int:
+    for name, value in scope['headers']:
+        if name == b'content-length':
+            return int(value) if value.isdigit() else 0
+    return 0
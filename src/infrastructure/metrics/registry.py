@@ -0,0 +1,239 @@
+"""Counters, gauges and histograms rendered in the Prometheus text exposition format.
+
+Metrics are meant to be updated from the event loop thread only, so they keep no locks. Label values are resolved once
+into a child with labels(), and the hot paths keep that child around, so recording a value is a few attribute updates.
+"""
+import abc
+import time
+from abc import ABC
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+BYTES_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    _TYPE: str
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.label_names):
+                raise ValueError(f'{self.name} expects the labels {self.label_names}.')
+            child = self._children[key] = self._new_child()
+        return child
+
+    @property
+    def sample_name(self) -> str:
+        """Name of the samples of the metric, which HELP and TYPE are given for."""
+        return self.name
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.sample_name} {_escape(self.documentation)}', f'# TYPE {self.sample_name} {self._TYPE}']
+        for values, child in self._children.items():
+            lines += self._render_child(_format_labels(self.label_names, values), values, child)
+        return lines
+
+    @abc.abstractmethod
+    def _new_child(self):
+        pass
+
+    @abc.abstractmethod
+    def _render_child(self, labels: str, values: Tuple[str, ...], child) -> List[str]:
+        pass
+
+
+class _Value:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+
+class Counter(_Metric):
+    _TYPE = 'counter'
+
+    @property
+    def sample_name(self) -> str:
+        return f'{self.name}_total'
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def _render_child(self, labels: str, values: Tuple[str, ...], child: _Value) -> List[str]:
+        return [f'{self.sample_name}{labels} {_format_number(child.value)}']
+
+
+class Gauge(_Metric):
+    _TYPE = 'gauge'
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def _render_child(self, labels: str, values: Tuple[str, ...], child: _Value) -> List[str]:
+        return [f'{self.name}{labels} {_format_number(child.value)}']
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # One more slot for the observations above the last bucket.
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> '_Timer':
+        """Context manager observing the time spent in its block, in seconds."""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ('_histogram', '_start')
+
+    def __init__(self, histogram: _HistogramChild):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+
+    def __exit__(self, *_):
+        self._histogram.observe(time.perf_counter() - self._start)
+
+
+class Histogram(_Metric):
+    _TYPE = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def _render_child(self, labels: str, values: Tuple[str, ...], child: _HistogramChild) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), child.counts):
+            cumulative += count
+            bucket_labels = _format_labels(self.label_names + ('le',), values + (_format_number(float(bound)),))
+            lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+        lines.append(f'{self.name}_sum{labels} {_format_number(child.sum)}')
+        lines.append(f'{self.name}_count{labels} {child.count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics of the process, rendered together on the metrics endpoint.
+
+    Registering a name again returns the metric already registered, so every instance of a component shares it.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric: _Metric):
+        registered = self._metrics.setdefault(metric.name, metric)
+        if type(registered) is not type(metric) or registered.label_names != metric.label_names:
+            raise ValueError(f'Metric {metric.name} is already registered with another type or other labels.')
+        return registered
+
+
+class _NullMetric:
+    """Metric and child of every metric of a NullMetricsRegistry, ignoring every update."""
+    __slots__ = ()
+
+    def labels(self, *values: str) -> '_NullMetric':
+        return self
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def dec(self, amount: float = 1):
+        pass
+
+    def observe(self, value: float):
+        pass
+
+    def time(self) -> '_NullMetric':
+        return self
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *_):
+        pass
+
+
+_NULL_METRIC = _NullMetric()
+
+
+class NullMetricsRegistry(MetricsRegistry):
+    """Registry of components built while metrics are disabled, whose metrics record nothing and are never rendered."""
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return _NULL_METRIC
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        return _NULL_METRIC
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return _NULL_METRIC
+
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,2 @@
+class AccountVersionConflictError(Exception):
+    pass
@@ -0,0 +1,80 @@
+from infrastructure.repositories.account.id_allocators.interface import UserIdAllocatorInterface
+from infrastructure.repositories.account.interface import AccountRepositoryInterface
+from settings import Settings
+
+
+def build_account_repository(settings: Settings) -> AccountRepositoryInterface:
+    """Builds the account repository selected by the settings, behind a cache when one is configured.
+
+    With metrics enabled, calls to the storage itself are timed, underneath the cache.
+    """
+    account_repository = _build_storage(settings)
+    if settings.metrics_enabled:
+        from infrastructure.metrics.registry import REGISTRY
+        from infrastructure.repositories.account.repositories.account_repository_instrumented.repository import \
+            InstrumentedAccountRepository
+        account_repository = InstrumentedAccountRepository(account_repository, REGISTRY)
+    if settings.account_cache_size:
+        from infrastructure.repositories.account.repositories.account_repository_caching.repository import \
+            CachingAccountRepository
+        account_repository = CachingAccountRepository(account_repository, settings.account_cache_size,
+                                                      settings.account_cache_ttl, settings.account_cache_pages)
+    return account_repository
+
+
+def _build_storage(settings: Settings) -> AccountRepositoryInterface:
+    if settings.account_repository == 'sqlite':
+        from infrastructure.repositories.account.repositories.account_repository_sqlite.repository import \
+            AccountRepositorySQLite
+        return AccountRepositorySQLite(settings.account_sqlite_path, settings.account_sqlite_pool_size,
+                                       _build_id_allocator(settings) if settings.account_id_leases else None)
+    if settings.account_repository == 'mmap':
+        from infrastructure.repositories.account.repositories.account_repository_mmap.repository import \
+            AccountRepositoryMmap
+        return AccountRepositoryMmap(settings.account_mmap_path)
+    if settings.account_shards > 1:
+        return _build_sharded_storage(settings)
+    if settings.account_repository == 'columnar':
+        from infrastructure.repositories.account.repositories.account_repository_columnar.repository import \
+            AccountRepositoryColumnar
+        return AccountRepositoryColumnar(_build_id_allocator(settings))
+
+    from infrastructure.repositories.account.repositories.account_repository_in_memory.repository import \
+        AccountRepositoryInMemory
+    account_repository = AccountRepositoryInMemory(settings.account_search_index, _build_id_allocator(settings))
+    if settings.account_wal_directory is not None:
+        from infrastructure.repositories.account.repositories.account_repository_durable.repository import \
+            DurableAccountRepository
+        return DurableAccountRepository(account_repository, settings.account_wal_directory,
+                                        settings.account_snapshot_interval)
+    return account_repository
+
+
+def _build_sharded_storage(settings: Settings) -> AccountRepositoryInterface:
+    from infrastructure.repositories.account.repositories.account_repository_sharded.repository import \
+        ShardedAccountRepository
+    shards = settings.account_shards
+    if settings.account_repository == 'columnar':
+        from infrastructure.repositories.account.repositories.account_repository_columnar.repository import \
+            AccountRepositoryColumnar
+        return ShardedAccountRepository([AccountRepositoryColumnar(_build_id_allocator(settings, shard, shards))
+                                         for shard in range(shards)])
+
+    from infrastructure.repositories.account.repositories.account_repository_in_memory.repository import \
+        AccountRepositoryInMemory
+    return ShardedAccountRepository([
+        AccountRepositoryInMemory(settings.account_search_index, _build_id_allocator(settings, shard, shards))
+        for shard in range(shards)])
+
+
+def _build_id_allocator(settings: Settings, shard: int = 0, shards: int = 1) -> UserIdAllocatorInterface:
+    """Allocator of the ids i + n * k of shard i of n, leased from its own sequence of the store when one is set."""
+    if settings.account_id_leases is None:
+        from infrastructure.repositories.account.id_allocators.counting import CountingUserIdAllocator
+        return CountingUserIdAllocator(shard, shards)
+    from infrastructure.repositories.account.id_allocators.block_leasing import BlockLeasingUserIdAllocator
+    from infrastructure.repositories.account.id_allocators.id_block_leases import FileIdBlockLeases, \
+        SQLiteIdBlockLeases
+    leases_class = FileIdBlockLeases if settings.account_id_leases == 'file' else SQLiteIdBlockLeases
+    return BlockLeasingUserIdAllocator(leases_class(settings.account_id_lease_path, shard),
+                                       settings.account_id_block_size, shard, shards)
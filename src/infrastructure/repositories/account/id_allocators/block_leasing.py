@@ -0,0 +1,67 @@
+from itertools import chain
+from typing import Iterable, List
+
+from domain.types.user_id import UserId
+from infrastructure.repositories.account.id_allocators.id_block_leases import IdBlockLeasesInterface
+from infrastructure.repositories.account.id_allocators.interface import UserIdAllocatorInterface
+
+
+class BlockLeasingUserIdAllocator(UserIdAllocatorInterface):
+    """Allocates ids from blocks of block_size leased from a store shared by every process, as hi/lo allocators do.
+
+    The store only records the end of the last block leased, so the ids of a block are allocated in memory without
+    any coordination, and are never allocated again by another process or after a restart. The ids left in the block
+    of a process that stops are skipped, so ids have gaps. A block is leased when the previous one runs out, which
+    blocks the event loop for one write of the store every block_size ids.
+
+    The store hands out numbers, and the ids are first_id + step * number, so each shard of a ShardedAccountRepository
+    leases from its own sequence of the store and keeps the ids of its residue. The number of shards must then stay the
+    same for as long as the store is kept.
+    """
+
+    def __init__(self, leases: IdBlockLeasesInterface, block_size: int = 1000, first_id: UserId = 0, step: int = 1):
+        self._leases = leases
+        self._block_size = block_size
+        self._first_id = first_id
+        self._step = step
+        # Numbers of the current block still to allocate, none until the first allocation.
+        self._next_number = self._end_number = 0
+        self._minimum_number = 0
+
+    def allocate(self) -> UserId:
+        if self._next_number == self._end_number:
+            self._lease(1)
+        number = self._next_number
+        self._next_number = number + 1
+        return self._first_id + self._step * number
+
+    def allocate_many(self, count: int) -> Iterable[UserId]:
+        blocks: List[range] = []
+        while count:
+            if self._next_number == self._end_number:
+                self._lease(count)
+            taken = min(count, self._end_number - self._next_number)
+            first_id = self._first_id + self._step * self._next_number
+            blocks.append(range(first_id, first_id + self._step * taken, self._step))
+            self._next_number += taken
+            count -= taken
+        return blocks[0] if len(blocks) == 1 else chain.from_iterable(blocks)
+
+    def advance(self, next_id: UserId):
+        number = -((self._first_id - next_id) // self._step)
+        if number <= self._next_number:
+            return
+        if number < self._end_number:
+            self._next_number = number
+        else:
+            # Leased on the next allocation, after number at least.
+            self._next_number = self._end_number = 0
+            self._minimum_number = max(self._minimum_number, number)
+
+    def close(self):
+        self._leases.close()
+
+    def _lease(self, count: int):
+        size = max(count, self._block_size)
+        self._next_number = self._leases.lease(size, self._minimum_number)
+        self._end_number = self._next_number + size
@@ -0,0 +1,31 @@
+from typing import Iterable
+
+from domain.types.user_id import UserId
+from infrastructure.repositories.account.id_allocators.interface import UserIdAllocatorInterface
+
+
+class CountingUserIdAllocator(UserIdAllocatorInterface):
+    """Allocates ids from a counter of the process, from first_id in steps of step.
+
+    Ids are only unique within the process and start over from first_id with it, unless advanced past the ids in use.
+    """
+
+    def __init__(self, first_id: UserId = 0, step: int = 1):
+        self._first_id = first_id
+        self._step = step
+        self._next_id = first_id
+
+    def allocate(self) -> UserId:
+        user_id = self._next_id
+        self._next_id = user_id + self._step
+        return user_id
+
+    def allocate_many(self, count: int) -> Iterable[UserId]:
+        user_ids = range(self._next_id, self._next_id + count * self._step, self._step)
+        self._next_id += count * self._step
+        return user_ids
+
+    def advance(self, next_id: UserId):
+        if next_id > self._next_id:
+            # Rounded up to the next id of the step, so the ids keep the residue of first_id.
+            self._next_id = next_id + (self._first_id - next_id) % self._step
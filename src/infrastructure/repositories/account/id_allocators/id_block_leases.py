@@ -0,0 +1,78 @@
+import abc
+import fcntl
+import os
+import sqlite3
+import struct
+from abc import ABC
+
+_HIGH_WATER_MARK = struct.Struct('<Q')
+_CREATE_LEASES = 'CREATE TABLE IF NOT EXISTS id_leases (sequence INTEGER PRIMARY KEY, next_number INTEGER NOT NULL)'
+_INSERT_LEASES = 'INSERT OR IGNORE INTO id_leases (sequence, next_number) VALUES (?, 0)'
+_LEASE = 'UPDATE id_leases SET next_number = MAX(next_number, ?) + ? WHERE sequence = ? RETURNING next_number - ?'
+
+
+class IdBlockLeasesInterface(ABC):
+    """Persisted end of the blocks of numbers leased, shared by every process leasing from the same store.
+
+    A store keeps several independent sequences of numbers, such as one per shard, selected by their index.
+    """
+
+    @abc.abstractmethod
+    def lease(self, size: int, minimum: int = 0) -> int:
+        """Leases the size numbers following every number leased before, from minimum at least, and returns the first.
+
+        The lease is persisted before it is returned.
+        """
+        pass
+
+    def close(self):
+        pass
+
+
+class FileIdBlockLeases(IdBlockLeasesInterface):
+    """Leases recorded in a file holding the next number to lease of each sequence, locked while a block is leased.
+
+    Every lease is synced to disk, and processes sharing the file must share its filesystem, as for the mmap repository.
+    """
+
+    def __init__(self, path: str, sequence: int = 0):
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._offset = sequence * _HIGH_WATER_MARK.size
+
+    def lease(self, size: int, minimum: int = 0) -> int:
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            data = os.pread(self._fd, _HIGH_WATER_MARK.size, self._offset)
+            # Sequences past the end of the file, or of a file being extended, start at 0.
+            first = max(_HIGH_WATER_MARK.unpack(data)[0] if len(data) == _HIGH_WATER_MARK.size else 0, minimum)
+            os.pwrite(self._fd, _HIGH_WATER_MARK.pack(first + size), self._offset)
+            os.fsync(self._fd)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return first
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class SQLiteIdBlockLeases(IdBlockLeasesInterface):
+    """Leases recorded in the id_leases table of a SQLite database, which may be the one of the SQLite repository.
+
+    Every lease is a single UPDATE, committed with the full synchronization of the connection.
+    """
+
+    def __init__(self, path: str, sequence: int = 0, busy_timeout: float = 5.0):
+        self._sequence = sequence
+        self._connection = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self._connection.execute('PRAGMA synchronous = FULL')
+        self._connection.execute(_CREATE_LEASES)
+        self._connection.execute(_INSERT_LEASES, (sequence,))
+
+    def lease(self, size: int, minimum: int = 0) -> int:
+        (first,), = self._connection.execute(_LEASE, (minimum, size, self._sequence, size)).fetchall()
+        return first
+
+    def close(self):
+        self._connection.close()
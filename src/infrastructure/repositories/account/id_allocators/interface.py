@@ -0,0 +1,29 @@
+import abc
+from abc import ABC
+from typing import Iterable
+
+from domain.types.user_id import UserId
+
+
+class UserIdAllocatorInterface(ABC):
+    """Allocates the ids of new accounts, in increasing order and never twice.
+
+    Allocators are used from the event loop and are not thread-safe.
+    """
+
+    @abc.abstractmethod
+    def allocate(self) -> UserId:
+        pass
+
+    @abc.abstractmethod
+    def allocate_many(self, count: int) -> Iterable[UserId]:
+        """Allocates count ids at once, in increasing order."""
+        pass
+
+    @abc.abstractmethod
+    def advance(self, next_id: UserId):
+        """Never allocates an id below next_id from now on, such as the ids of accounts restored from a backup."""
+        pass
+
+    def close(self):
+        pass
@@ -1,15 +1,21 @@
 import abc
 from abc import ABC
-from typing import List
+from heapq import nlargest
+from typing import AsyncIterator, List, Optional
 
 from domain.aggregates.account import Account
+from domain.types.account_version import AccountVersion
+from domain.types.pagination_size import PaginationSize
 from domain.types.user_id import UserId
+from domain.value_objects.account_query import AccountQuery
 from domain.value_objects.pagination import Pagination
+from infrastructure.data_structures.trigram_index import SIMILARITY_THRESHOLD, similarity, trigrams
 
 
 class AccountRepositoryInterface(ABC):
     @abc.abstractmethod
     async def create_account(self, account: Account) -> Account:
+        """Creates the account with a new id, at version 1."""
         pass
 
     @abc.abstractmethod
@@ -17,13 +23,87 @@ class AccountRepositoryInterface(ABC):
         pass
 
     @abc.abstractmethod
-    async def get_accounts(self, pagination: Pagination) -> List[Account]:
+    async def get_accounts(self, pagination: Pagination, query: AccountQuery = AccountQuery()) -> List[Account]:
+        """Returns the accounts matching the query in its sort order, ties broken by id.
+
+        Pages start after (pagination.after_value, pagination.after_id) when after_id is set, or else at the page
+        offset. after_value is only set, and then must be set, when accounts are not sorted by id.
+        """
         pass
 
     @abc.abstractmethod
-    async def patch_account(self, account: Account) -> Account:
+    async def patch_account(self, account: Account, expected_version: Optional[AccountVersion] = None) -> Account:
+        """Replaces the account and bumps its version.
+
+        With expected_version, the account is only patched if it is still at that version, checked atomically with the
+        write, or else AccountVersionConflictError is raised.
+        """
         pass
 
     @abc.abstractmethod
     async def delete_account(self, user_id: UserId) -> Account:
         pass
+
+    @abc.abstractmethod
+    async def create_accounts(self, accounts: List[Account]) -> List[Account]:
+        """Creates the accounts in a single operation, with ids allocated in the order given, at version 1."""
+        pass
+
+    @abc.abstractmethod
+    async def patch_accounts(self, accounts: List[Account]) -> List[Optional[Account]]:
+        """Patches the accounts in a single operation, bumping their versions.
+
+        Accounts that are not found are returned as None.
+        """
+        pass
+
+    @abc.abstractmethod
+    async def delete_accounts(self, user_ids: List[UserId]) -> List[bool]:
+        """Deletes the accounts in a single operation. Returns whether each of the accounts was found."""
+        pass
+
+    @abc.abstractmethod
+    async def get_accounts_by_ids(self, user_ids: List[UserId]) -> List[Optional[Account]]:
+        """Reads the accounts in a single operation, in the order given. Accounts that are not found are None."""
+        pass
+
+    @abc.abstractmethod
+    async def count_accounts(self, query: AccountQuery = AccountQuery()) -> int:
+        """Returns the number of accounts matching the age bounds of the query.
+
+        Without bounds, the count is kept up to date by every create and delete, so it is O(1) and never a scan.
+        """
+        pass
+
+    async def iter_accounts(self, chunk_size: PaginationSize) -> AsyncIterator[Account]:
+        """Yields every account in id order, fetched in keyset pages of chunk_size.
+
+        Only one page is held at a time and the next one is fetched when the consumer asks for it, so memory stays
+        bounded whatever the number of accounts.
+        """
+        pagination = Pagination(size=chunk_size)
+        while True:
+            accounts = await self.get_accounts(pagination)
+            for account in accounts:
+                yield account
+            if len(accounts) < chunk_size:
+                return
+            pagination = Pagination(size=chunk_size, after_id=accounts[-1].user.id)
+
+    async def search_accounts(self, text: str, limit: PaginationSize) -> List[Account]:
+        """Returns up to limit accounts whose name is the most similar to text, most similar first, ties by id.
+
+        Similarity is measured on the trigrams of the names, and accounts below SIMILARITY_THRESHOLD are left out. This
+        implementation scans every account, repositories with a trigram index override it.
+        """
+        query = trigrams(text)
+        scored = []
+        async for account in self.iter_accounts(PaginationSize(1000)):
+            score = similarity(query, trigrams(account.user.personal_information.name))
+            if score >= SIMILARITY_THRESHOLD:
+                scored.append((score, -account.user.id, account))
+        return [account for _, _, account in nlargest(limit, scored, key=lambda match: match[:2])]
+
+    async def close(self):
+        """Releases the resources held by the repository."""
+        pass
@@ -0,0 +1,150 @@
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from domain.aggregates.account import Account
+from domain.types.account_version import AccountVersion
+from domain.types.pagination_size import PaginationSize
+from domain.types.user_id import UserId
+from domain.value_objects.account_query import AccountQuery
+from domain.value_objects.pagination import Pagination
+from infrastructure.data_structures.lru_cache import CacheStatistics, LRUCache
+from infrastructure.repositories.account.interface import AccountRepositoryInterface
+
+
+class CachingAccountRepository(AccountRepositoryInterface):
+    """Read-through cache in front of any other account repository.
+
+    Accounts read with get_account, and optionally whole pages read with get_accounts, are kept in bounded LRU caches
+    with a time to live. Writes go straight to the wrapped repository and invalidate what they change: the accounts
+    they touch and every cached page. Concurrent misses on the same account share a single fetch from the wrapped
+    repository, and a fetch that races with a write of its account is not cached.
+
+    Callers always receive copies, so mutating a returned aggregate never changes the cached one.
+    """
+
+    def __init__(self, account_repository: AccountRepositoryInterface, max_size: int, ttl: Optional[float] = None,
+                 cache_pages: bool = False):
+        self._account_repository = account_repository
+        self._accounts: LRUCache[UserId, Account] = LRUCache(max_size, ttl)
+        self._pages: Optional[LRUCache[Tuple[Pagination, AccountQuery], List[Account]]] = \
+            LRUCache(max_size, ttl) if cache_pages else None
+        self._loading: Dict[UserId, asyncio.Task] = {}
+        self._pages_generation = 0
+        self._accounts_generation = 0
+
+    @property
+    def statistics(self) -> CacheStatistics:
+        return self._accounts.statistics
+
+    @property
+    def page_statistics(self) -> Optional[CacheStatistics]:
+        return self._pages.statistics if self._pages is not None else None
+
+    async def create_account(self, account_aggregate: Account) -> Account:
+        account_aggregate = await self._account_repository.create_account(account_aggregate)
+        self._invalidate_pages()
+        return account_aggregate
+
+    async def get_account(self, user_id: UserId) -> Account:
+        account_aggregate = self._accounts.get(user_id)
+        if account_aggregate is None:
+            task = self._loading.get(user_id)
+            if task is None:
+                task = self._loading[user_id] = asyncio.create_task(self._load(user_id))
+            account_aggregate = await asyncio.shield(task)
+        return account_aggregate.model_copy(deep=True)
+
+    async def get_accounts(self, pagination: Pagination, query: AccountQuery = AccountQuery()) -> List[Account]:
+        if self._pages is None:
+            return await self._account_repository.get_accounts(pagination, query)
+        page = self._pages.get((pagination, query))
+        if page is None:
+            generation = self._pages_generation
+            page = await self._account_repository.get_accounts(pagination, query)
+            if generation == self._pages_generation:
+                self._pages.set((pagination, query), page)
+        return [account_aggregate.model_copy(deep=True) for account_aggregate in page]
+
+    def iter_accounts(self, chunk_size: PaginationSize) -> AsyncIterator[Account]:
+        # A full scan would only evict the hot pages.
+        return self._account_repository.iter_accounts(chunk_size)
+
+    async def search_accounts(self, text: str, limit: PaginationSize) -> List[Account]:
+        return await self._account_repository.search_accounts(text, limit)
+
+    async def count_accounts(self, query: AccountQuery = AccountQuery()) -> int:
+        return await self._account_repository.count_accounts(query)
+
+    async def delete_account(self, user_id: UserId):
+        try:
+            await self._account_repository.delete_account(user_id)
+        finally:
+            self._invalidate(user_id)
+
+    async def patch_account(self, account_aggregate: Account,
+                            expected_version: Optional[AccountVersion] = None) -> Account:
+        try:
+            return await self._account_repository.patch_account(account_aggregate, expected_version)
+        finally:
+            self._invalidate(account_aggregate.user.id)
+
+    async def create_accounts(self, account_aggregates: List[Account]) -> List[Account]:
+        account_aggregates = await self._account_repository.create_accounts(account_aggregates)
+        self._invalidate_pages()
+        return account_aggregates
+
+    async def patch_accounts(self, account_aggregates: List[Account]) -> List[Optional[Account]]:
+        try:
+            return await self._account_repository.patch_accounts(account_aggregates)
+        finally:
+            for account_aggregate in account_aggregates:
+                self._invalidate(account_aggregate.user.id)
+
+    async def delete_accounts(self, user_ids: List[UserId]) -> List[bool]:
+        try:
+            return await self._account_repository.delete_accounts(user_ids)
+        finally:
+            for user_id in user_ids:
+                self._invalidate(user_id)
+
+    async def get_accounts_by_ids(self, user_ids: List[UserId]) -> List[Optional[Account]]:
+        """Reads the cached accounts from the cache and the others from the wrapped repository, in one call."""
+        results = [self._accounts.get(user_id) for user_id in user_ids]
+        missing = [user_id for user_id, account_aggregate in zip(user_ids, results) if account_aggregate is None]
+        if missing:
+            generation = self._accounts_generation
+            loaded = dict(zip(missing, await self._account_repository.get_accounts_by_ids(missing)))
+            for user_id, account_aggregate in loaded.items():
+                # A write during the read may have changed the account, so it is not cached then.
+                if account_aggregate is not None and generation == self._accounts_generation:
+                    self._accounts.set(user_id, account_aggregate)
+            results = [loaded[user_id] if account_aggregate is None else account_aggregate
+                       for user_id, account_aggregate in zip(user_ids, results)]
+        return [account_aggregate.model_copy(deep=True) if account_aggregate is not None else None
+                for account_aggregate in results]
+
+    async def close(self):
+        await self._account_repository.close()
+
+    async def _load(self, user_id: UserId) -> Account:
+        task = asyncio.current_task()
+        try:
+            account_aggregate = await self._account_repository.get_account(user_id)
+            if self._loading.get(user_id) is task:
+                self._accounts.set(user_id, account_aggregate)
+            return account_aggregate
+        finally:
+            if self._loading.get(user_id) is task:
+                del self._loading[user_id]
+
+    def _invalidate(self, user_id: UserId):
+        self._accounts_generation += 1
+        self._accounts.pop(user_id)
+        # An ongoing fetch may have read the previous state, so it must not reach the cache.
+        self._loading.pop(user_id, None)
+        self._invalidate_pages()
+
+    def _invalidate_pages(self):
+        if self._pages is not None:
+            self._pages_generation += 1
+            self._pages.clear()
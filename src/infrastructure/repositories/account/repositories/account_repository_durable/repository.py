@@ -0,0 +1,295 @@
+import asyncio
+import logging
+import struct
+from bisect import bisect_left
+from contextlib import suppress
+from itertools import compress
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from domain.aggregates.account import Account
+from domain.types.account_version import AccountVersion
+from domain.types.pagination_size import PaginationSize
+from domain.types.personal_age import PersonalAge
+from domain.types.personal_name import PersonalName
+from domain.types.user_id import UserId
+from domain.value_objects.account_query import AccountQuery
+from domain.value_objects.pagination import Pagination
+from infrastructure.repositories.account.interface import AccountRepositoryInterface
+from infrastructure.repositories.account.repositories.account_repository_durable.snapshot import Snapshot, \
+    SnapshotWriter, read_snapshot
+from infrastructure.repositories.account.repositories.account_repository_durable.write_ahead_log import \
+    WriteAheadLog, read_segment, segments
+from infrastructure.repositories.account.repositories.account_repository_in_memory.repository import \
+    AccountRepositoryInMemory
+
+_logger = logging.getLogger(__name__)
+
+# Operation, id, age and version of a log record, followed by the UTF-8 name for puts.
+_RECORD = struct.Struct('<BQqQ')
+_PUT = 1
+_DELETE = 2
+
+# Name, age and version an account is left with by the log tail.
+_Change = Tuple[PersonalName, PersonalAge, AccountVersion]
+# Id of an account written, with the row it had before and the one it was left with, None when it has no account.
+_Undo = Tuple[UserId, Optional[_Change], Optional[_Change]]
+
+
+class DurableAccountRepository(AccountRepositoryInterface):
+    """In-memory accounts made durable by a write-ahead log and periodic snapshots kept in a directory.
+
+    Every write is applied in memory, then appended to the log as the full row it left, or as a delete; the call
+    returns once the log is on disk, and concurrent writes share their fsyncs. Writes must reach the log in the order
+    they were applied, which holds because the in-memory repository never suspends within an operation. Readers can
+    see a write before it is durable.
+
+    A write whose log append fails is rolled back in memory before its error is raised, putting back the rows it
+    replaced, unless a later write changed them since. The log then fails every later write, newest first so they roll
+    back in reverse order, and the repository stays read-only until it is opened again. Snapshots wait for the writes
+    they copied to be durable, so they never hold a write that was rolled back.
+
+    Every snapshot_interval seconds with writes, a snapshot copies the accounts in chunks while writes go on, after
+    starting a new log segment. Replaying the segments from that one over the snapshot gives back the latest state,
+    as records are whole rows or deletes, and the older segments are removed once the snapshot is written. A snapshot
+    is also written on close, so a clean restart has no log to replay.
+
+    On startup the snapshot is read column by column from a memory map, the log tail is replayed over its rows, and
+    the in-memory indexes are built in bulk from them, without building an aggregate per account.
+    """
+    _SNAPSHOT_CHUNK = 10_000
+
+    def __init__(self, account_repository: AccountRepositoryInMemory, directory: str, snapshot_interval: float):
+        self._account_repository = account_repository
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._snapshot_interval = snapshot_interval
+        self._next_id, sequence = self._restore()
+        self._log = WriteAheadLog(self._directory, sequence)
+        self._writes_since_snapshot = 0
+        self._snapshot_lock = asyncio.Lock()
+        self._snapshot_task: Optional[asyncio.Task] = None
+
+    async def create_account(self, account_aggregate: Account) -> Account:
+        account_aggregate = await self._account_repository.create_account(account_aggregate)
+        await self._log_puts([account_aggregate], [None])
+        return account_aggregate
+
+    async def get_account(self, user_id: UserId) -> Account:
+        return await self._account_repository.get_account(user_id)
+
+    async def get_accounts(self, pagination: Pagination, query: AccountQuery = AccountQuery()) -> List[Account]:
+        return await self._account_repository.get_accounts(pagination, query)
+
+    async def patch_account(self, account_aggregate: Account,
+                            expected_version: Optional[AccountVersion] = None) -> Account:
+        before = self._account_repository.rows_by_ids([account_aggregate.user.id])
+        account_aggregate = await self._account_repository.patch_account(account_aggregate, expected_version)
+        await self._log_puts([account_aggregate], before)
+        return account_aggregate
+
+    async def delete_account(self, user_id: UserId):
+        before = self._account_repository.rows_by_ids([user_id])
+        await self._account_repository.delete_account(user_id)
+        await self._log_deletes([user_id], before)
+
+    async def create_accounts(self, account_aggregates: List[Account]) -> List[Account]:
+        account_aggregates = await self._account_repository.create_accounts(account_aggregates)
+        await self._log_puts(account_aggregates, [None] * len(account_aggregates))
+        return account_aggregates
+
+    async def patch_accounts(self, account_aggregates: List[Account]) -> List[Optional[Account]]:
+        before = self._account_repository.rows_by_ids([account_aggregate.user.id
+                                                       for account_aggregate in account_aggregates])
+        results = await self._account_repository.patch_accounts(account_aggregates)
+        # An id patched twice in the batch had the row of its first patch before its second.
+        before = _chained(account_aggregates, before)
+        patched = [(account_aggregate, row) for account_aggregate, row in zip(results, before)
+                   if account_aggregate is not None]
+        await self._log_puts([account_aggregate for account_aggregate, _ in patched], [row for _, row in patched])
+        return results
+
+    async def delete_accounts(self, user_ids: List[UserId]) -> List[bool]:
+        before = self._account_repository.rows_by_ids(user_ids)
+        results = await self._account_repository.delete_accounts(user_ids)
+        deleted = [(user_id, row) for user_id, row, result in zip(user_ids, before, results) if result]
+        await self._log_deletes([user_id for user_id, _ in deleted], [row for _, row in deleted])
+        return results
+
+    async def get_accounts_by_ids(self, user_ids: List[UserId]) -> List[Optional[Account]]:
+        return await self._account_repository.get_accounts_by_ids(user_ids)
+
+    async def count_accounts(self, query: AccountQuery = AccountQuery()) -> int:
+        return await self._account_repository.count_accounts(query)
+
+    async def search_accounts(self, text: str, limit: PaginationSize) -> List[Account]:
+        return await self._account_repository.search_accounts(text, limit)
+
+    async def snapshot(self):
+        """Writes a snapshot of every account and removes the log segments it replaces."""
+        async with self._snapshot_lock:
+            sequence = self._log.rotate()
+            writes, self._writes_since_snapshot = self._writes_since_snapshot, 0
+            try:
+                writer = SnapshotWriter()
+                after_id = None
+                while True:
+                    rows = self._account_repository.rows(after_id, self._SNAPSHOT_CHUNK)
+                    writer.extend(rows)
+                    if len(rows) < self._SNAPSHOT_CHUNK:
+                        break
+                    after_id = rows[-1][0]
+                    # Lets the writes go on between chunks.
+                    await asyncio.sleep(0)
+                # The writes copied must be durable before the snapshot is, and the snapshot fails when one is not.
+                await self._log.flush()
+                write = asyncio.get_running_loop().run_in_executor(None, writer.write, self._directory,
+                                                                   self._next_id, sequence)
+                try:
+                    await asyncio.shield(write)
+                except asyncio.CancelledError:
+                    # The write goes on in its thread, so the lock is held until it is done, and no other snapshot
+                    # writes or removes segments meanwhile.
+                    await asyncio.wait([write])
+                    raise
+            except BaseException:
+                self._writes_since_snapshot += writes
+                raise
+            self._log.remove_segments_before(sequence)
+
+    async def close(self):
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._snapshot_task
+        # Waits for a snapshot in flight, started by another caller, before writing the last one.
+        async with self._snapshot_lock:
+            pass
+        try:
+            if self._writes_since_snapshot:
+                await self.snapshot()
+        finally:
+            try:
+                await self._log.close()
+            finally:
+                await self._account_repository.close()
+
+    def _restore(self) -> Tuple[UserId, int]:
+        """Loads the snapshot and the log tail into the in-memory repository. Returns the next id and segment."""
+        snapshot = read_snapshot(self._directory)
+        next_id, sequence = snapshot.next_id, snapshot.sequence
+        # Last row, or None once deleted, of every account the log tail writes.
+        changes: Dict[UserId, Optional[_Change]] = {}
+        for segment_sequence, path in segments(self._directory):
+            if segment_sequence < snapshot.sequence:
+                continue
+            for payload in read_segment(path):
+                operation, user_id, age, version = _RECORD.unpack_from(payload)
+                if operation == _PUT:
+                    changes[user_id] = (payload[_RECORD.size:].decode(), age, version)
+                    next_id = max(next_id, user_id + 1)
+                else:
+                    changes[user_id] = None
+            sequence = segment_sequence + 1
+        self._account_repository.load(*_apply_changes(snapshot, changes), next_id)
+        return next_id, sequence
+
+    async def _log_puts(self, account_aggregates: List[Account], before: List[Optional[_Change]]):
+        """Logs the rows the accounts were left with, each having had the row of before, None for a creation."""
+        payloads = []
+        undo = []
+        for account_aggregate, row in zip(account_aggregates, before):
+            user = account_aggregate.user
+            payloads.append(_RECORD.pack(_PUT, user.id, user.personal_information.age, account_aggregate.version)
+                            + user.personal_information.name.encode())
+            undo.append((user.id, row, (user.personal_information.name, user.personal_information.age,
+                                        account_aggregate.version)))
+            self._next_id = max(self._next_id, user.id + 1)
+        await self._append(payloads, undo)
+
+    async def _log_deletes(self, user_ids: List[UserId], before: List[Optional[_Change]]):
+        await self._append([_RECORD.pack(_DELETE, user_id, 0, 0) for user_id in user_ids],
+                           [(user_id, row, None) for user_id, row in zip(user_ids, before)])
+
+    async def _append(self, payloads: List[bytes], undo: List[_Undo]):
+        if not payloads:
+            return
+        self._writes_since_snapshot += len(payloads)
+        if self._snapshot_task is None:
+            self._snapshot_task = asyncio.create_task(self._snapshot_periodically())
+        written = self._log.append(payloads)
+        try:
+            await asyncio.shield(written)
+        except asyncio.CancelledError:
+            # The records are still written whatever happens to the caller, and rolled back if that fails.
+            def roll_back_if_failed(future: asyncio.Future):
+                if future.exception() is not None:
+                    self._roll_back(undo)
+
+            written.add_done_callback(roll_back_if_failed)
+            raise
+        except Exception:
+            self._roll_back(undo)
+            raise
+
+    def _roll_back(self, undo: List[_Undo]):
+        """Puts back the rows replaced by writes that are not durable, newest first, unless changed again since."""
+        for user_id, before, after in reversed(undo):
+            if self._account_repository.rows_by_ids([user_id]) == [after]:
+                self._account_repository.put_rows([(user_id, before)])
+
+    async def _snapshot_periodically(self):
+        while True:
+            await asyncio.sleep(self._snapshot_interval)
+            if self._writes_since_snapshot:
+                try:
+                    await self.snapshot()
+                except Exception:
+                    _logger.exception('Account snapshot failed, the write-ahead log keeps growing until one succeeds.')
+
+
+def _chained(account_aggregates: List[Account], before: List[Optional[_Change]]) -> List[Optional[_Change]]:
+    """Row every account of a batch of patches had before its own patch, which an earlier one of the batch may set."""
+    rows = []
+    last: Dict[UserId, Optional[_Change]] = {}
+    for account_aggregate, row in zip(account_aggregates, before):
+        user_id = account_aggregate.user.id
+        rows.append(last.get(user_id, row))
+        if row is not None or user_id in last:
+            last[user_id] = (account_aggregate.user.personal_information.name,
+                             account_aggregate.user.personal_information.age, account_aggregate.version)
+    return rows
+
+
+def _apply_changes(snapshot: Snapshot, changes: Dict[UserId, Optional[_Change]]) \
+        -> Tuple[List[UserId], List[PersonalName], List[PersonalAge], List[AccountVersion]]:
+    """Columns of the snapshot with the changes applied, in id order, at a cost in proportion to the changes.
+
+    Changed accounts are found by bisecting the ids, and accounts created after the snapshot are appended, as their
+    ids are greater than the ones it holds; they are merged with a sort otherwise.
+    """
+    user_ids, names, ages, versions = snapshot.user_ids, snapshot.names, snapshot.ages, snapshot.versions
+    kept = None
+    created = []
+    for user_id, row in changes.items():
+        position = bisect_left(user_ids, user_id)
+        if position < len(user_ids) and user_ids[position] == user_id:
+            if row is None:
+                if kept is None:
+                    kept = bytearray(b'\x01') * len(user_ids)
+                kept[position] = 0
+            else:
+                names[position], ages[position], versions[position] = row
+        elif row is not None:
+            created.append((user_id, *row))
+    if kept is not None:
+        user_ids, names, ages, versions = (list(compress(column, kept)) for column in (user_ids, names, ages, versions))
+    if created:
+        created.sort()
+        if user_ids and created[0][0] < user_ids[-1]:
+            created = sorted([*zip(user_ids, names, ages, versions), *created])
+            user_ids, names, ages, versions = [], [], [], []
+        created_ids, created_names, created_ages, created_versions = zip(*created)
+        user_ids, names = user_ids + list(created_ids), names + list(created_names)
+        ages, versions = ages + list(created_ages), versions + list(created_versions)
+    return user_ids, names, ages, versions
@@ -0,0 +1,106 @@
+"""Binary snapshots of every account, stored as columns."""
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from contextlib import suppress
+from itertools import accumulate
+from pathlib import Path
+from typing import List, NamedTuple, Tuple
+
+from domain.types.account_version import AccountVersion
+from domain.types.personal_age import PersonalAge
+from domain.types.personal_name import PersonalName
+from domain.types.user_id import UserId
+
+# Magic, next id, sequence of the first log segment to replay, number of accounts.
+_HEADER = struct.Struct('<8sQQQ')
+_MAGIC = b'ACCSNAP2'
+SNAPSHOT_NAME = 'snapshot'
+
+
+class Snapshot(NamedTuple):
+    next_id: UserId
+    # Sequence of the first log segment written after the snapshot started, from which the log is replayed.
+    sequence: int
+    user_ids: List[UserId]
+    names: List[PersonalName]
+    ages: List[PersonalAge]
+    versions: List[AccountVersion]
+
+
+class SnapshotWriter:
+    """Accumulates (id, name, age, version) rows as columns: names as UTF-8 and the rest as int arrays."""
+
+    def __init__(self):
+        self._ids = array('q')
+        self._ages = array('q')
+        self._versions = array('q')
+        self._name_lengths = array('I')
+        self._names = bytearray()
+
+    def extend(self, rows: List[Tuple[UserId, PersonalName, PersonalAge, AccountVersion]]):
+        for user_id, name, age, version in rows:
+            encoded = name.encode()
+            self._ids.append(user_id)
+            self._ages.append(age)
+            self._versions.append(version)
+            self._name_lengths.append(len(encoded))
+            self._names += encoded
+
+    def write(self, directory: Path, next_id: UserId, sequence: int):
+        """Writes the snapshot to a temporary file and renames it over the previous one once it is durable.
+
+        The temporary file has a name of its own, so a write never shares it with another one still running.
+        """
+        path = directory / SNAPSHOT_NAME
+        descriptor, temporary_path = tempfile.mkstemp(prefix=f'{SNAPSHOT_NAME}.', suffix='.tmp', dir=directory)
+        try:
+            with open(descriptor, 'wb') as file:
+                file.write(_HEADER.pack(_MAGIC, next_id, sequence, len(self._ids)))
+                for column in (self._ids, self._ages, self._versions, self._name_lengths, self._names):
+                    file.write(column)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary_path, path)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.unlink(temporary_path)
+            raise
+        directory_file = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_file)
+        finally:
+            os.close(directory_file)
+
+
+def read_snapshot(directory: Path) -> Snapshot:
+    """Reads the snapshot of the directory, an empty one starting at the first segment when there is none yet.
+
+    The file is memory-mapped and every column is copied out of it in one go, then converted to a list.
+    """
+    path = directory / SNAPSHOT_NAME
+    if not path.exists():
+        return Snapshot(UserId(0), 0, [], [], [], [])
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        magic, next_id, sequence, size = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError(f'{path} is not an account snapshot.')
+        columns = []
+        position = _HEADER.size
+        for typecode in 'qqqI':
+            column = array(typecode)
+            column.frombytes(data[position:position + size * column.itemsize])
+            columns.append(column)
+            position += size * column.itemsize
+        names = data[position:]
+    user_ids, ages, versions, name_lengths = columns
+    ends = accumulate(name_lengths)
+    if names.isascii():
+        # Byte offsets are character offsets, so the names are sliced out of a single decoded string.
+        text = names.decode()
+        decoded = [text[end - length:end] for end, length in zip(ends, name_lengths)]
+    else:
+        decoded = [names[end - length:end].decode() for end, length in zip(ends, name_lengths)]
+    return Snapshot(next_id, sequence, user_ids.tolist(), decoded, ages.tolist(), versions.tolist())
@@ -0,0 +1,162 @@
+"""Append-only log of records, split in numbered segment files and made durable by group commit."""
+import asyncio
+import os
+import struct
+import zlib
+from collections import deque
+from pathlib import Path
+from typing import Deque, Iterator, List, Optional, Tuple
+
+# Length and CRC-32 of the payload that follows.
+_FRAME = struct.Struct('<II')
+_SEGMENT_PREFIX = 'wal.'
+
+
+def segments(directory: Path) -> List[Tuple[int, Path]]:
+    """(sequence, path) of the segments of the directory, oldest first."""
+    found = []
+    for path in directory.glob(f'{_SEGMENT_PREFIX}*'):
+        suffix = path.name[len(_SEGMENT_PREFIX):]
+        if suffix.isdigit():
+            found.append((int(suffix), path))
+    return sorted(found)
+
+
+def read_segment(path: Path) -> Iterator[bytes]:
+    """Yields the payloads of the segment, up to its first torn or corrupted record, which a crash may leave last."""
+    data = path.read_bytes()
+    position = 0
+    while position + _FRAME.size <= len(data):
+        length, checksum = _FRAME.unpack_from(data, position)
+        payload = data[position + _FRAME.size:position + _FRAME.size + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            return
+        yield payload
+        position += _FRAME.size + length
+
+
+class WriteAheadLog:
+    """Records appended to the current segment of a directory, each acknowledged once it is on disk.
+
+    Records appended while a write is in flight are batched and written together, with a single fsync, when it
+    completes, so concurrent writers share the cost of an fsync instead of each paying for one. Writes run in the
+    default executor, off the event loop.
+
+    rotate() starts a new segment: records appended before it still go to the previous one, so once a snapshot covers
+    them, every segment before the new one can be removed.
+
+    A write that fails may leave a torn record, after which no record of the segment is replayed. The log then fails
+    the records of that write and of every later one, newest first, and every later call, until it is opened again.
+    """
+
+    def __init__(self, directory: Path, sequence: int):
+        self._directory = directory
+        self._sequence = sequence
+        self._file = self._open(sequence)
+        self._buffer = bytearray()
+        self._waiters: List[asyncio.Future] = []
+        # (file, data, waiters, whether to close the file once written), in write order.
+        self._batches: Deque[Tuple[int, bytes, List[asyncio.Future], bool]] = deque()
+        self._writer: Optional[asyncio.Task] = None
+        self._error: Optional[Exception] = None
+
+    @property
+    def sequence(self) -> int:
+        """Sequence of the current segment."""
+        return self._sequence
+
+    def append(self, payloads: List[bytes]) -> 'asyncio.Future[None]':
+        """Appends the payloads, in order. The returned future is done once they are all durable."""
+        waiter = asyncio.get_running_loop().create_future()
+        if self._error is not None:
+            waiter.set_exception(self._error)
+            return waiter
+        for payload in payloads:
+            self._buffer += _FRAME.pack(len(payload), zlib.crc32(payload))
+            self._buffer += payload
+        self._waiters.append(waiter)
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_batches())
+        return waiter
+
+    def rotate(self) -> int:
+        """Starts a new segment and returns its sequence."""
+        if self._error is not None:
+            raise self._error
+        self._seal(close=True)
+        self._sequence += 1
+        self._file = self._open(self._sequence)
+        return self._sequence
+
+    def remove_segments_before(self, sequence: int):
+        for segment_sequence, path in segments(self._directory):
+            if segment_sequence < sequence:
+                path.unlink()
+
+    async def flush(self):
+        """Waits until every record appended so far is durable. Raises the error of the log once a write failed."""
+        if self._buffer or self._batches:
+            if self._writer is None or self._writer.done():
+                self._writer = asyncio.create_task(self._write_batches())
+            await asyncio.shield(self._writer)
+        if self._error is not None:
+            raise self._error
+
+    async def close(self):
+        try:
+            await self.flush()
+        finally:
+            os.close(self._file)
+
+    def _open(self, sequence: int) -> int:
+        return os.open(self._directory / f'{_SEGMENT_PREFIX}{sequence:010d}', os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+                       0o644)
+
+    def _seal(self, close: bool = False):
+        """Queues the buffered records for a write to the current segment."""
+        if self._buffer or close:
+            self._batches.append((self._file, bytes(self._buffer), self._waiters, close))
+            self._buffer = bytearray()
+            self._waiters = []
+
+    async def _write_batches(self):
+        loop = asyncio.get_running_loop()
+        while self._batches or self._buffer:
+            if not self._batches:
+                self._seal()
+            file, data, waiters, close = self._batches.popleft()
+            try:
+                await loop.run_in_executor(None, _write, file, data, close)
+            except Exception as error:
+                self._fail(error, waiters)
+                return
+            else:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(None)
+
+    def _fail(self, error: Exception, waiters: List[asyncio.Future]):
+        """Fails the waiters of the failed write and of every later record, newest first, and every later call."""
+        self._error = error
+        self._seal()
+        while self._batches:
+            file, _, batch_waiters, close = self._batches.popleft()
+            waiters = waiters + batch_waiters
+            if close:
+                os.close(file)
+        # Newest first, so the writers undoing their records wake up in the reverse order of the records.
+        for waiter in reversed(waiters):
+            if not waiter.done():
+                waiter.set_exception(error)
+
+
+def _write(file: int, data: bytes, close: bool):
+    try:
+        if data:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(file, view):]
+            os.fsync(file)
+    finally:
+        if close:
+            os.close(file)
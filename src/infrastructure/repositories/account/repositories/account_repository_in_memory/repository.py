@@ -1,77 +1,311 @@
-from itertools import count
-from typing import Dict, List, Union
+from heapq import merge, nsmallest
+from itertools import islice
+from operator import itemgetter
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from domain.aggregates.account import Account
 from domain.entities.user import User
+from domain.types.account_version import AccountVersion
+from domain.types.pagination_size import PaginationSize
 from domain.types.personal_age import PersonalAge
 from domain.types.personal_name import PersonalName
 from domain.types.user_id import UserId
+from domain.value_objects.account_query import AccountQuery
 from domain.value_objects.pagination import Pagination
 from domain.value_objects.personal_information import PersonalInformation
+from infrastructure.data_structures.ordered_id_index import OrderedIdIndex
+from infrastructure.data_structures.sorted_index import SortedIndex
+from infrastructure.data_structures.trigram_index import TrigramIndex
 from infrastructure.repositories.account.exceptions.account_not_found_error import AccountNotFoundError
+from infrastructure.repositories.account.exceptions.account_version_conflict_error import \
+    AccountVersionConflictError
+from infrastructure.repositories.account.id_allocators.counting import CountingUserIdAllocator
+from infrastructure.repositories.account.id_allocators.interface import UserIdAllocatorInterface
 from infrastructure.repositories.account.interface import AccountRepositoryInterface
 from infrastructure.repositories.account.repositories.account_repository_in_memory.alias import ItemData
 
 
 class AccountRepositoryInMemory(AccountRepositoryInterface):
+    """Accounts kept in process memory.
+
+    Records are indexed by id in a dict, so point operations are O(1). Pagination order is kept by an OrderedIdIndex,
+    which serves a page in O(log n + size), by offset or after an id, and lets deletes leave the rest of the accounts
+    untouched.
+
+    Secondary indexes of (age, id) and (name, id) keys serve the pages sorted by age or name in O(log n + size), and an
+    age range by bisecting the age index, which also counts the accounts of a range in O(log n). Pages sorted by id and
+    filtered by age merge the runs of each age of the range, which are already in id order, in O(a log n + size log a)
+    for a distinct ages. Pages sorted by name and filtered by age either select among the accounts of the age range,
+    when they are fewer than one in _SELECTIVE_RANGE, or walk the name index skipping the others, which then visits
+    about _SELECTIVE_RANGE accounts on average per account returned. Offset pages of filtered listings also pay for the
+    accounts they skip.
+
+    With search_index, a TrigramIndex of the names serves search_accounts without scanning every account, at the cost
+    of about as much memory again as the accounts themselves.
+
+    Ids are allocated by id_allocator, a CountingUserIdAllocator from 0 by default.
+    """
     _USER_ID_FIELD_NAME = 'id'
     _USER_NAME_FIELD_NAME = 'name'
     _USER_AGE_FIELD_NAME = 'age'
+    _ACCOUNT_VERSION_FIELD_NAME = 'version'
+    _SELECTIVE_RANGE = 8
 
-    def __init__(self):
-        self._counter = count()
-        self._data: List[Dict[str, Union[str, int]]] = []
+    def __init__(self, search_index: bool = True, id_allocator: Optional[UserIdAllocatorInterface] = None):
+        self._id_allocator = CountingUserIdAllocator() if id_allocator is None else id_allocator
+        self._data: Dict[UserId, ItemData] = {}
+        self._order = OrderedIdIndex()
+        self._by_age: SortedIndex[Tuple[PersonalAge, UserId]] = SortedIndex()
+        self._by_name: SortedIndex[Tuple[PersonalName, UserId]] = SortedIndex()
+        self._search_index = TrigramIndex() if search_index else None
 
     async def create_account(self, account_aggregate: Account) -> Account:
-        account_aggregate.user.id = self._counter.__next__()
-        self._data.append(self._aggregate_to_dict_factory(account_aggregate))
+        account_aggregate.user.id = self._id_allocator.allocate()
+        account_aggregate.version = 1
+        self._index(self._aggregate_to_dict_factory(account_aggregate))
+        self._order.append(account_aggregate.user.id)
         return account_aggregate
 
     async def get_account(self, user_id: UserId) -> Account:
         user_data = await self._find_user_data(user_id)
         return self._dict_to_aggregate_factory(user_data)
 
-    async def get_accounts(self, pagination: Pagination) -> List[Account]:
-        start = pagination.page * pagination.size
-        end = start + pagination.size
-        return [self._dict_to_aggregate_factory(user_data) for user_data in self._data[start:end]]
+    async def get_accounts(self, pagination: Pagination, query: AccountQuery = AccountQuery()) -> List[Account]:
+        if query.sort == 'id' and not query.filtered:
+            if pagination.after_id is not None:
+                user_ids = self._order.after(pagination.after_id, pagination.size)
+            else:
+                user_ids = self._order.slice(pagination.page * pagination.size, pagination.size)
+        else:
+            user_ids = self._select(pagination, query)
+        name, age = query.includes('name'), query.includes('age')
+        return [self._dict_to_aggregate_factory(self._data[user_id], name, age) for user_id in user_ids]
 
     async def delete_account(self, user_id: UserId):
-        index = await self._find_user_index(user_id)
-        self._data.pop(index)
+        self._unindex(await self._find_user_data(user_id))
+        self._order.remove(user_id)
 
-    async def patch_account(self, account_aggregate: Account) -> Account:
-        index = await self._find_user_index(account_aggregate.user.id)
-        self._data[index] = self._aggregate_to_dict_factory(account_aggregate)
+    async def patch_account(self, account_aggregate: Account,
+                            expected_version: Optional[AccountVersion] = None) -> Account:
+        user_data = await self._find_user_data(account_aggregate.user.id)
+        version = user_data[self._ACCOUNT_VERSION_FIELD_NAME]
+        if expected_version is not None and version != expected_version:
+            raise AccountVersionConflictError(
+                f"Account with id {account_aggregate.user.id} is at version {version}, not {expected_version}.")
+        self._unindex(user_data)
+        account_aggregate.version = version + 1
+        self._index(self._aggregate_to_dict_factory(account_aggregate))
         return account_aggregate
 
+    async def create_accounts(self, account_aggregates: List[Account]) -> List[Account]:
+        user_ids = self._id_allocator.allocate_many(len(account_aggregates))
+        for account_aggregate, user_id in zip(account_aggregates, user_ids):
+            account_aggregate.user.id = user_id
+            account_aggregate.version = 1
+            self._index(self._aggregate_to_dict_factory(account_aggregate))
+            self._order.append(user_id)
+        return account_aggregates
+
+    async def patch_accounts(self, account_aggregates: List[Account]) -> List[Optional[Account]]:
+        results = []
+        for account_aggregate in account_aggregates:
+            user_data = self._data.get(account_aggregate.user.id)
+            if user_data is not None:
+                self._unindex(user_data)
+                account_aggregate.version = user_data[self._ACCOUNT_VERSION_FIELD_NAME] + 1
+                self._index(self._aggregate_to_dict_factory(account_aggregate))
+                results.append(account_aggregate)
+            else:
+                results.append(None)
+        return results
+
+    async def delete_accounts(self, user_ids: List[UserId]) -> List[bool]:
+        results = []
+        for user_id in user_ids:
+            user_data = self._data.get(user_id)
+            if user_data is not None:
+                self._unindex(user_data)
+                self._order.remove(user_id)
+            results.append(user_data is not None)
+        return results
+
+    async def get_accounts_by_ids(self, user_ids: List[UserId]) -> List[Optional[Account]]:
+        results = []
+        for user_id in user_ids:
+            user_data = self._data.get(user_id)
+            results.append(self._dict_to_aggregate_factory(user_data) if user_data is not None else None)
+        return results
+
+    async def count_accounts(self, query: AccountQuery = AccountQuery()) -> int:
+        if not query.filtered:
+            return len(self._data)
+        first, last = self._age_range(query)
+        return last - first
+
+    async def search_accounts(self, text: str, limit: PaginationSize) -> List[Account]:
+        if self._search_index is None:
+            return await super().search_accounts(text, limit)
+        return [self._dict_to_aggregate_factory(self._data[user_id])
+                for _, user_id in self._search_index.search(text, limit)]
+
+    def rows(self, after_id: Optional[UserId],
+             size: int) -> List[Tuple[UserId, PersonalName, PersonalAge, AccountVersion]]:
+        """Returns up to size (id, name, age, version) rows of the accounts with an id above after_id, in id order.
+
+        Rows are read without building aggregates, for the callers that copy many accounts at once.
+        """
+        user_ids = self._order.slice(0, size) if after_id is None else self._order.after(after_id, size)
+        rows = []
+        for user_id in user_ids:
+            user_data = self._data[user_id]
+            rows.append((user_id, user_data[self._USER_NAME_FIELD_NAME], user_data[self._USER_AGE_FIELD_NAME],
+                         user_data[self._ACCOUNT_VERSION_FIELD_NAME]))
+        return rows
+
+    def rows_by_ids(self, user_ids: List[UserId]) -> List[Optional[Tuple[PersonalName, PersonalAge, AccountVersion]]]:
+        """Returns the (name, age, version) row of every id, or None for the ones without an account."""
+        rows = []
+        for user_id in user_ids:
+            user_data = self._data.get(user_id)
+            rows.append(None if user_data is None else (user_data[self._USER_NAME_FIELD_NAME],
+                                                        user_data[self._USER_AGE_FIELD_NAME],
+                                                        user_data[self._ACCOUNT_VERSION_FIELD_NAME]))
+        return rows
+
+    def put_rows(self, rows: List[Tuple[UserId, Optional[Tuple[PersonalName, PersonalAge, AccountVersion]]]]):
+        """Sets every account to its (name, age, version) row as given, or removes it for None, to undo writes.
+
+        Accounts put back after a removal regain their place in id order.
+        """
+        for user_id, row in rows:
+            user_data = self._data.get(user_id)
+            if user_data is not None:
+                self._unindex(user_data)
+                if row is None:
+                    self._order.remove(user_id)
+            if row is not None:
+                name, age, version = row
+                self._index({self._USER_ID_FIELD_NAME: user_id, self._USER_NAME_FIELD_NAME: name,
+                             self._USER_AGE_FIELD_NAME: age, self._ACCOUNT_VERSION_FIELD_NAME: version})
+                if user_data is None:
+                    self._order.restore(user_id)
+
+    def load(self, user_ids: List[UserId], names: List[PersonalName], ages: List[PersonalAge],
+             versions: List[AccountVersion], next_id: UserId):
+        """Replaces every account with the columns given, in id order, and allocates ids from next_id on.
+
+        The indexes are built in bulk from sorted keys, instead of one insert per account.
+        """
+        self._id_allocator.advance(next_id)
+        self._data = {user_id: {self._USER_ID_FIELD_NAME: user_id, self._USER_NAME_FIELD_NAME: name,
+                                self._USER_AGE_FIELD_NAME: age, self._ACCOUNT_VERSION_FIELD_NAME: version}
+                      for user_id, name, age, version in zip(user_ids, names, ages, versions)}
+        self._order = OrderedIdIndex.build(user_ids)
+        # Ids are in order, so a stable sort on the first field alone leaves the keys sorted on (field, id), and
+        # compares ints or strs instead of tuples.
+        self._by_age = SortedIndex.build(sorted(zip(ages, user_ids), key=itemgetter(0)))
+        self._by_name = SortedIndex.build(sorted(zip(names, user_ids), key=itemgetter(0)))
+        if self._search_index is not None:
+            self._search_index = TrigramIndex()
+            for user_id, name in zip(user_ids, names):
+                self._search_index.add(user_id, name)
+
+    async def close(self):
+        self._id_allocator.close()
+
+    def _index(self, user_data: ItemData):
+        user_id = user_data[self._USER_ID_FIELD_NAME]
+        self._data[user_id] = user_data
+        self._by_age.add((user_data[self._USER_AGE_FIELD_NAME], user_id))
+        self._by_name.add((user_data[self._USER_NAME_FIELD_NAME], user_id))
+        if self._search_index is not None:
+            self._search_index.add(user_id, user_data[self._USER_NAME_FIELD_NAME])
+
+    def _unindex(self, user_data: ItemData):
+        user_id = user_data[self._USER_ID_FIELD_NAME]
+        del self._data[user_id]
+        self._by_age.remove((user_data[self._USER_AGE_FIELD_NAME], user_id))
+        self._by_name.remove((user_data[self._USER_NAME_FIELD_NAME], user_id))
+        if self._search_index is not None:
+            self._search_index.remove(user_id, user_data[self._USER_NAME_FIELD_NAME])
+
+    def _select(self, pagination: Pagination, query: AccountQuery) -> List[UserId]:
+        """Ids of the page of a sorted or filtered listing."""
+        first, last = self._age_range(query)
+        keyset = pagination.after_id is not None
+        offset = 0 if keyset else pagination.page * pagination.size
+
+        if query.sort == 'age':
+            after_key = (pagination.after_value, pagination.after_id)
+            start = max(first, self._by_age.bisect_right(after_key)) if keyset else first + offset
+            return [user_id for _, user_id in
+                    islice(self._by_age.iter_from(start), max(0, min(pagination.size, last - start)))]
+
+        if query.sort == 'id':
+            return list(islice(merge(*self._age_runs(first, last, pagination.after_id)),
+                               offset, offset + pagination.size))
+
+        after_key = (pagination.after_value, pagination.after_id)
+        if query.filtered and (last - first) * self._SELECTIVE_RANGE < len(self._data):
+            keys = ((self._data[user_id][self._USER_NAME_FIELD_NAME], user_id)
+                    for _, user_id in islice(self._by_age.iter_from(first), last - first))
+            if keyset:
+                keys = (key for key in keys if key > after_key)
+            return [user_id for _, user_id in nsmallest(offset + pagination.size, keys)[offset:]]
+
+        start = self._by_name.bisect_right(after_key) if keyset else 0
+        if not query.filtered:
+            start, offset = start + offset, 0
+        user_ids: Iterator[UserId] = (user_id for _, user_id in self._by_name.iter_from(start))
+        if query.filtered:
+            user_ids = (user_id for user_id in user_ids
+                        if query.matches(self._data[user_id][self._USER_AGE_FIELD_NAME]))
+        return list(islice(user_ids, offset, offset + pagination.size))
+
+    def _age_range(self, query: AccountQuery) -> Tuple[int, int]:
+        """Positions of the age index between which the ages are within the bounds of the query."""
+        first = 0 if query.min_age is None else self._by_age.bisect_left((query.min_age,))
+        last = len(self._by_age) if query.max_age is None else self._by_age.bisect_left((query.max_age + 1,))
+        return first, last
+
+    def _age_runs(self, first: int, last: int, after_id: Optional[UserId]) -> List[Iterator[UserId]]:
+        """Ids of each age between the positions first and last of the age index, each in id order."""
+        runs = []
+        while first < last:
+            age, _ = self._by_age[first]
+            end = min(last, self._by_age.bisect_left((age + 1,)))
+            start = first if after_id is None else max(first, self._by_age.bisect_right((age, after_id)))
+            runs.append(user_id for _, user_id in islice(self._by_age.iter_from(start), end - start))
+            first = end
+        return runs
+
     async def _find_user_data(self, account_id: UserId) -> ItemData:
         try:
-            return filter(lambda x: x[self._USER_ID_FIELD_NAME] == account_id, self._data).__next__()
-        except StopIteration:
+            return self._data[account_id]
+        except KeyError:
             raise AccountNotFoundError(f"Account with id {account_id} is not found.")
 
-    async def _find_user_index(self, account_id: UserId) -> int:
-        try:
-            index, _ = filter(lambda x: x[1][self._USER_ID_FIELD_NAME] == account_id, enumerate(self._data)).__next__()
-        except StopIteration:
-            raise AccountNotFoundError(f"Account with id {account_id} is not found.")
-        return index
-
-    def _dict_to_aggregate_factory(self, user_data: ItemData) -> Account:
-        return Account(
-            user=User(
-                id=user_data[self._USER_ID_FIELD_NAME],
-                personal_information=PersonalInformation(
-                    age=PersonalAge(user_data[self._USER_AGE_FIELD_NAME]),
-                    name=PersonalName(user_data[self._USER_NAME_FIELD_NAME])
-                )
-            )
+    def _dict_to_aggregate_factory(self, user_data: ItemData, name: bool = True, age: bool = True) -> Account:
+        """Account of user_data, without its name or age when not asked for, see AccountQuery.fields."""
+        if name and age:
+            personal_information = PersonalInformation.trusted(age=user_data[self._USER_AGE_FIELD_NAME],
+                                                               name=user_data[self._USER_NAME_FIELD_NAME])
+        else:
+            personal_information = PersonalInformation.partial(
+                age=user_data[self._USER_AGE_FIELD_NAME] if age else None,
+                name=user_data[self._USER_NAME_FIELD_NAME] if name else None)
+        return Account.trusted(
+            user=User.trusted(
+                user_id=user_data[self._USER_ID_FIELD_NAME],
+                personal_information=personal_information
+            ),
+            version=user_data[self._ACCOUNT_VERSION_FIELD_NAME]
         )
 
     def _aggregate_to_dict_factory(self, account_aggregate: Account) -> ItemData:
         return {
             self._USER_ID_FIELD_NAME: account_aggregate.user.id,
             self._USER_NAME_FIELD_NAME: account_aggregate.user.personal_information.name,
-            self._USER_AGE_FIELD_NAME: account_aggregate.user.personal_information.age
+            self._USER_AGE_FIELD_NAME: account_aggregate.user.personal_information.age,
+            self._ACCOUNT_VERSION_FIELD_NAME: account_aggregate.version
         }
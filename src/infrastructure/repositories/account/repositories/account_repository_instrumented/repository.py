@@ -0,0 +1,81 @@
+from typing import List, Optional
+
+from domain.aggregates.account import Account
+from domain.types.account_version import AccountVersion
+from domain.types.pagination_size import PaginationSize
+from domain.types.user_id import UserId
+from domain.value_objects.account_query import AccountQuery
+from domain.value_objects.pagination import Pagination
+from infrastructure.metrics.registry import MetricsRegistry
+from infrastructure.repositories.account.interface import AccountRepositoryInterface
+
+
+class InstrumentedAccountRepository(AccountRepositoryInterface):
+    """Records how long every call to the wrapped account repository takes, per method.
+
+    iter_accounts is left to the default implementation, so each page it fetches is recorded as a get_accounts call.
+    """
+
+    def __init__(self, account_repository: AccountRepositoryInterface, registry: MetricsRegistry):
+        self._account_repository = account_repository
+        duration = registry.histogram('account_repository_duration_seconds',
+                                      'Time spent in account repository calls.', ('method',))
+        self._create_account = duration.labels('create_account')
+        self._get_account = duration.labels('get_account')
+        self._get_accounts = duration.labels('get_accounts')
+        self._patch_account = duration.labels('patch_account')
+        self._delete_account = duration.labels('delete_account')
+        self._create_accounts = duration.labels('create_accounts')
+        self._patch_accounts = duration.labels('patch_accounts')
+        self._delete_accounts = duration.labels('delete_accounts')
+        self._get_accounts_by_ids = duration.labels('get_accounts_by_ids')
+        self._count_accounts = duration.labels('count_accounts')
+        self._search_accounts = duration.labels('search_accounts')
+
+    async def create_account(self, account_aggregate: Account) -> Account:
+        with self._create_account.time():
+            return await self._account_repository.create_account(account_aggregate)
+
+    async def get_account(self, user_id: UserId) -> Account:
+        with self._get_account.time():
+            return await self._account_repository.get_account(user_id)
+
+    async def get_accounts(self, pagination: Pagination, query: AccountQuery = AccountQuery()) -> List[Account]:
+        with self._get_accounts.time():
+            return await self._account_repository.get_accounts(pagination, query)
+
+    async def patch_account(self, account_aggregate: Account,
+                            expected_version: Optional[AccountVersion] = None) -> Account:
+        with self._patch_account.time():
+            return await self._account_repository.patch_account(account_aggregate, expected_version)
+
+    async def delete_account(self, user_id: UserId):
+        with self._delete_account.time():
+            await self._account_repository.delete_account(user_id)
+
+    async def create_accounts(self, account_aggregates: List[Account]) -> List[Account]:
+        with self._create_accounts.time():
+            return await self._account_repository.create_accounts(account_aggregates)
+
+    async def patch_accounts(self, account_aggregates: List[Account]) -> List[Optional[Account]]:
+        with self._patch_accounts.time():
+            return await self._account_repository.patch_accounts(account_aggregates)
+
+    async def delete_accounts(self, user_ids: List[UserId]) -> List[bool]:
+        with self._delete_accounts.time():
+            return await self._account_repository.delete_accounts(user_ids)
+
+    async def get_accounts_by_ids(self, user_ids: List[UserId]) -> List[Optional[Account]]:
+        with self._get_accounts_by_ids.time():
+            return await self._account_repository.get_accounts_by_ids(user_ids)
+
+    async def count_accounts(self, query: AccountQuery = AccountQuery()) -> int:
+        with self._count_accounts.time():
+            return await self._account_repository.count_accounts(query)
+
+    async def search_accounts(self, text: str, limit: PaginationSize) -> List[Account]:
+        with self._search_accounts.time():
+            return await self._account_repository.search_accounts(text, limit)
+
+    async def close(self):
+        await self._account_repository.close()
@@ -0,0 +1,336 @@
+import fcntl
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+from heapq import nsmallest
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+
+from domain.aggregates.account import Account
+from domain.entities.user import User
+from domain.types.account_version import AccountVersion
+from domain.types.user_id import UserId
+from domain.value_objects.account_query import AccountQuery
+from domain.value_objects.pagination import Pagination
+from domain.value_objects.personal_information import PersonalInformation
+from infrastructure.repositories.account.exceptions.account_not_found_error import AccountNotFoundError
+from infrastructure.repositories.account.exceptions.account_version_conflict_error import \
+    AccountVersionConflictError
+from infrastructure.repositories.account.interface import AccountRepositoryInterface
+
+# Magic, next id, bytes used by names, bytes of the names that are no longer referenced, live accounts.
+_HEADER = struct.Struct('<8sQQQQ')
+_HEADER_SIZE = 64
+_MAGIC = b'ACCMMAP3'
+# Files written before the header counted the accounts, which are counted once when they are opened.
+_UNCOUNTED_MAGIC = b'ACCMMAP2'
+# Alive flag, name length, age, name offset, version.
+_SLOT = struct.Struct('<B3xIqQQ')
+# (id, age, name offset, name length, version) of a live account.
+_Row = Tuple[int, int, int, int, int]
+
+
+class AccountRepositoryMmap(AccountRepositoryInterface):
+    """Accounts stored in memory-mapped files, shared by every process of the host that opens the same path.
+
+    The slots file starts with a header holding the next id and the number of accounts, followed by one fixed-size slot
+    per id, so an account is found at the offset of its id and id pages are a sequential read. Names are appended to a
+    second file, path with a .names suffix, and referenced by offset and length. Patches overwrite a name in place when
+    the new one fits, and names no slot references are compacted away once they outnumber the others.
+
+    Every operation holds a flock on the slots file, shared to read and exclusive to write, so the worker processes
+    of a server see one consistent table and allocate ids from the same header. Files only grow; a process remaps
+    them when the header shows another one grew them. Put the files under /dev/shm to keep them in shared memory,
+    without writebacks to disk. Locks are taken in the event loop, which only blocks as long as another process
+    holds the lock for a single operation.
+
+    Listings and counts of an age range scan the slots like the columnar repository does, without secondary indexes,
+    while the header keeps the number of accounts. A cache in front of this repository is per process, so it only sees
+    the writes of other workers once its entries expire.
+    """
+    _INITIAL_SLOTS = 1024
+    _INITIAL_NAME_BYTES = 64 * 1024
+    _SCAN_CHUNK = 4096
+    _COMPACTION_MIN_NAME_BYTES = 64 * 1024
+
+    def __init__(self, path: str):
+        self._path = path
+        self._open()
+
+    async def create_account(self, account_aggregate: Account) -> Account:
+        with self._locked(fcntl.LOCK_EX):
+            account_aggregate.user.id = self._allocate_ids(1)
+            account_aggregate.version = 1
+            self._write_slot(account_aggregate.user.id, account_aggregate)
+        return account_aggregate
+
+    async def get_account(self, user_id: UserId) -> Account:
+        with self._locked(fcntl.LOCK_SH):
+            return self._row_to_aggregate_factory(self._find_row(user_id))
+
+    async def get_accounts(self, pagination: Pagination, query: AccountQuery = AccountQuery()) -> List[Account]:
+        name, age = query.includes('name'), query.includes('age')
+        with self._locked(fcntl.LOCK_SH):
+            if query.sort != 'id':
+                return [self._row_to_aggregate_factory(row, name, age) for row in self._sorted_rows(pagination, query)]
+            if pagination.after_id is not None:
+                rows = self._rows(pagination.after_id + 1)
+            elif query.filtered:
+                rows = self._rows()
+            else:
+                rows = self._rows(skip=pagination.page * pagination.size)
+            if query.filtered:
+                rows = (row for row in rows if query.matches(row[1]))
+                if pagination.after_id is None:
+                    rows = islice(rows, pagination.page * pagination.size, None)
+            return [self._row_to_aggregate_factory(row, name, age) for row in islice(rows, pagination.size)]
+
+    async def delete_account(self, user_id: UserId):
+        with self._locked(fcntl.LOCK_EX):
+            self._delete_row(self._find_row(user_id))
+            self._compact_if_needed()
+
+    async def patch_account(self, account_aggregate: Account,
+                            expected_version: Optional[AccountVersion] = None) -> Account:
+        with self._locked(fcntl.LOCK_EX):
+            row = self._find_row(account_aggregate.user.id)
+            if expected_version is not None and row[4] != expected_version:
+                raise AccountVersionConflictError(f"Account with id {row[0]} is at version {row[4]}, "
+                                                  f"not {expected_version}.")
+            self._update_row(row, account_aggregate)
+            self._compact_if_needed()
+        return account_aggregate
+
+    async def create_accounts(self, account_aggregates: List[Account]) -> List[Account]:
+        if not account_aggregates:
+            return account_aggregates
+        with self._locked(fcntl.LOCK_EX):
+            first_id = self._allocate_ids(len(account_aggregates))
+            for user_id, account_aggregate in enumerate(account_aggregates, start=first_id):
+                account_aggregate.user.id = user_id
+                account_aggregate.version = 1
+                self._write_slot(user_id, account_aggregate)
+        return account_aggregates
+
+    async def patch_accounts(self, account_aggregates: List[Account]) -> List[Optional[Account]]:
+        results = []
+        with self._locked(fcntl.LOCK_EX):
+            for account_aggregate in account_aggregates:
+                row = self._lookup_row(account_aggregate.user.id)
+                if row is None:
+                    results.append(None)
+                else:
+                    self._update_row(row, account_aggregate)
+                    results.append(account_aggregate)
+            self._compact_if_needed()
+        return results
+
+    async def delete_accounts(self, user_ids: List[UserId]) -> List[bool]:
+        results = []
+        with self._locked(fcntl.LOCK_EX):
+            for user_id in user_ids:
+                row = self._lookup_row(user_id)
+                if row is not None:
+                    self._delete_row(row)
+                results.append(row is not None)
+            self._compact_if_needed()
+        return results
+
+    async def get_accounts_by_ids(self, user_ids: List[UserId]) -> List[Optional[Account]]:
+        with self._locked(fcntl.LOCK_SH):
+            rows = [self._lookup_row(user_id) for user_id in user_ids]
+            return [self._row_to_aggregate_factory(row) if row is not None else None for row in rows]
+
+    async def count_accounts(self, query: AccountQuery = AccountQuery()) -> int:
+        with self._locked(fcntl.LOCK_SH):
+            if not query.filtered:
+                return self._header()[3]
+            return sum(1 for row in self._rows() if query.matches(row[1]))
+
+    async def close(self):
+        self._close()
+
+    def _open(self):
+        self._pid = os.getpid()
+        self._slots_file = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._names_file = os.open(f'{self._path}.names', os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._slots_file, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._slots_file).st_size == 0:
+                os.ftruncate(self._slots_file, _HEADER_SIZE + self._INITIAL_SLOTS * _SLOT.size)
+                os.ftruncate(self._names_file, self._INITIAL_NAME_BYTES)
+                os.pwrite(self._slots_file, _HEADER.pack(_MAGIC, 0, 0, 0, 0), 0)
+            self._slots = mmap.mmap(self._slots_file, 0)
+            self._names = mmap.mmap(self._names_file, 0)
+            if self._slots[:len(_UNCOUNTED_MAGIC)] == _UNCOUNTED_MAGIC:
+                next_id, name_bytes, dead_name_bytes, _ = self._header()
+                alive = self._slots[_HEADER_SIZE:_HEADER_SIZE + next_id * _SLOT.size:_SLOT.size].count(1)
+                self._write_header(next_id, name_bytes, dead_name_bytes, alive)
+        finally:
+            fcntl.flock(self._slots_file, fcntl.LOCK_UN)
+        if self._slots[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f'{self._path} is not an account file.')
+
+    def _close(self):
+        self._slots.close()
+        self._names.close()
+        os.close(self._slots_file)
+        os.close(self._names_file)
+
+    @contextmanager
+    def _locked(self, operation: int) -> Iterator[None]:
+        if self._pid != os.getpid():
+            # A forked process shares the open files of its parent, and so its locks, so it opens its own.
+            self._close()
+            self._open()
+        fcntl.flock(self._slots_file, operation)
+        try:
+            next_id, name_bytes, _, _ = self._header()
+            if self._slot_capacity() < next_id:
+                self._slots = self._remap(self._slots, self._slots_file)
+            if len(self._names) < name_bytes:
+                self._names = self._remap(self._names, self._names_file)
+            yield
+        finally:
+            fcntl.flock(self._slots_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _remap(mapping: mmap.mmap, file: int, size: int = 0) -> mmap.mmap:
+        if size:
+            os.ftruncate(file, size)
+        mapping.close()
+        return mmap.mmap(file, 0)
+
+    def _slot_capacity(self) -> int:
+        return (len(self._slots) - _HEADER_SIZE) // _SLOT.size
+
+    def _header(self) -> Tuple[int, int, int, int]:
+        """Next id, bytes used by names, bytes of the unreferenced names and number of live accounts."""
+        return _HEADER.unpack_from(self._slots)[1:]
+
+    def _write_header(self, next_id: int, name_bytes: int, dead_name_bytes: int, accounts: int):
+        _HEADER.pack_into(self._slots, 0, _MAGIC, next_id, name_bytes, dead_name_bytes, accounts)
+
+    def _allocate_ids(self, count: int) -> int:
+        next_id, name_bytes, dead_name_bytes, accounts = self._header()
+        capacity = self._slot_capacity()
+        if next_id + count > capacity:
+            size = _HEADER_SIZE + max(next_id + count, 2 * capacity) * _SLOT.size
+            self._slots = self._remap(self._slots, self._slots_file, size)
+        self._write_header(next_id + count, name_bytes, dead_name_bytes, accounts + count)
+        return next_id
+
+    def _append_name(self, name: bytes) -> int:
+        next_id, name_bytes, dead_name_bytes, accounts = self._header()
+        if name_bytes + len(name) > len(self._names):
+            self._names = self._remap(self._names, self._names_file, max(name_bytes + len(name), 2 * len(self._names)))
+        self._names[name_bytes:name_bytes + len(name)] = name
+        self._write_header(next_id, name_bytes + len(name), dead_name_bytes, accounts)
+        return name_bytes
+
+    def _write_slot(self, user_id: int, account_aggregate: Account):
+        personal_information = account_aggregate.user.personal_information
+        name = personal_information.name.encode()
+        _SLOT.pack_into(self._slots, _HEADER_SIZE + user_id * _SLOT.size, 1, len(name), personal_information.age,
+                        self._append_name(name), account_aggregate.version)
+
+    def _update_row(self, row: _Row, account_aggregate: Account):
+        user_id, _, offset, length, version = row
+        personal_information = account_aggregate.user.personal_information
+        name = personal_information.name.encode()
+        if len(name) <= length:
+            self._names[offset:offset + len(name)] = name
+            self._add_dead_name_bytes(length - len(name))
+        else:
+            offset = self._append_name(name)
+            self._add_dead_name_bytes(length)
+        account_aggregate.version = version + 1
+        _SLOT.pack_into(self._slots, _HEADER_SIZE + user_id * _SLOT.size, 1, len(name), personal_information.age,
+                        offset, account_aggregate.version)
+
+    def _delete_row(self, row: _Row):
+        user_id, _, _, length, _ = row
+        _SLOT.pack_into(self._slots, _HEADER_SIZE + user_id * _SLOT.size, 0, 0, 0, 0, 0)
+        next_id, name_bytes, dead_name_bytes, accounts = self._header()
+        self._write_header(next_id, name_bytes, dead_name_bytes + length, accounts - 1)
+
+    def _add_dead_name_bytes(self, count: int):
+        next_id, name_bytes, dead_name_bytes, accounts = self._header()
+        self._write_header(next_id, name_bytes, dead_name_bytes + count, accounts)
+
+    def _lookup_row(self, user_id: UserId) -> Optional[_Row]:
+        if not 0 <= user_id < self._header()[0]:
+            return None
+        alive, length, age, offset, version = _SLOT.unpack_from(self._slots, _HEADER_SIZE + user_id * _SLOT.size)
+        return (user_id, age, offset, length, version) if alive else None
+
+    def _find_row(self, user_id: UserId) -> _Row:
+        row = self._lookup_row(user_id)
+        if row is None:
+            raise AccountNotFoundError(f"Account with id {user_id} is not found.")
+        return row
+
+    def _rows(self, start: int = 0, skip: int = 0) -> Iterator[_Row]:
+        """Yields the live rows in id order, from id start and past the first skip ones, a chunk of slots at a time.
+
+        Chunks with no more live rows than are left to skip are counted from their alive flags, without unpacking.
+        """
+        end = self._header()[0]
+        for chunk_start in range(start, end, self._SCAN_CHUNK):
+            chunk_end = min(chunk_start + self._SCAN_CHUNK, end)
+            chunk = self._slots[_HEADER_SIZE + chunk_start * _SLOT.size:_HEADER_SIZE + chunk_end * _SLOT.size]
+            if skip:
+                alive = chunk[::_SLOT.size].count(1)
+                if alive <= skip:
+                    skip -= alive
+                    continue
+            for user_id, (alive, length, age, offset, version) in enumerate(_SLOT.iter_unpack(chunk), chunk_start):
+                if alive:
+                    if skip:
+                        skip -= 1
+                    else:
+                        yield user_id, age, offset, length, version
+
+    def _sorted_rows(self, pagination: Pagination, query: AccountQuery) -> List[_Row]:
+        keys: Iterator[tuple] = ((row[1] if query.sort == 'age' else self._name(row), row[0], row)
+                                 for row in self._rows() if query.matches(row[1]))
+        offset = pagination.page * pagination.size
+        if pagination.after_id is not None:
+            after_key = (pagination.after_value, pagination.after_id)
+            keys = (key for key in keys if key[:2] > after_key)
+        return [row for _, _, row in nsmallest(offset + pagination.size, keys)[offset:]]
+
+    def _name(self, row: _Row) -> str:
+        _, _, offset, length, _ = row
+        return self._names[offset:offset + length].decode()
+
+    def _compact_if_needed(self):
+        next_id, name_bytes, dead_name_bytes, accounts = self._header()
+        if name_bytes >= self._COMPACTION_MIN_NAME_BYTES and dead_name_bytes * 2 > name_bytes:
+            self._compact_names(next_id, accounts)
+
+    def _compact_names(self, next_id: int, accounts: int):
+        """Rewrites the referenced names at the start of the names file, in id order."""
+        names = bytearray()
+        for user_id, age, offset, length, version in list(self._rows()):
+            _SLOT.pack_into(self._slots, _HEADER_SIZE + user_id * _SLOT.size, 1, length, age, len(names), version)
+            names += self._names[offset:offset + length]
+        self._names[:len(names)] = names
+        self._write_header(next_id, len(names), 0, accounts)
+
+    def _row_to_aggregate_factory(self, row: _Row, name: bool = True, age: bool = True) -> Account:
+        """Account of row, without decoding its name or keeping its age when not asked for, see AccountQuery.fields."""
+        user_id, row_age, _, _, version = row
+        if name and age:
+            personal_information = PersonalInformation.trusted(age=row_age, name=self._name(row))
+        else:
+            personal_information = PersonalInformation.partial(age=row_age if age else None,
+                                                               name=self._name(row) if name else None)
+        return Account.trusted(
+            user=User.trusted(
+                user_id=user_id,
+                personal_information=personal_information
+            ),
+            version=version
+        )
@@ -0,0 +1,176 @@
+import asyncio
+from heapq import heapify, heappop, heapreplace, nlargest
+from itertools import chain
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from domain.aggregates.account import Account
+from domain.types.account_sort import AccountSort
+from domain.types.account_version import AccountVersion
+from domain.types.pagination_size import PaginationSize
+from domain.types.user_id import UserId
+from domain.value_objects.account_query import AccountQuery
+from domain.value_objects.pagination import Pagination
+from infrastructure.data_structures.trigram_index import similarity, trigrams
+from infrastructure.repositories.account.interface import AccountRepositoryInterface
+
+_Item = TypeVar('_Item')
+_Result = TypeVar('_Result')
+
+# Order of the accounts of a listing for each sort, ties broken by id.
+_SORT_KEYS: Dict[AccountSort, Callable[[Account], Any]] = {
+    'id': lambda account: account.user.id,
+    'age': lambda account: (account.user.personal_information.age, account.user.id),
+    'name': lambda account: (account.user.personal_information.name, account.user.id),
+}
+
+
+class ShardedAccountRepository(AccountRepositoryInterface):
+    """Accounts partitioned by id across shards, each a repository of its own, with its own lock.
+
+    An account lives in the shard at its id modulo the number of shards n, so shard i must allocate the ids i, i + n,
+    i + 2n and so on, as the in-memory and columnar repositories do when their id_allocator has a first_id of i and a
+    step of n, such as CountingUserIdAllocator(i, n). New accounts are dealt to the shards in turn, so ids keep being
+    allocated in sequence.
+
+    Point operations go to the shard of the id. Writes hold the lock of their shard: writes to different shards run
+    concurrently, while those to one shard apply one at a time, in the order they were made, even when the shard
+    suspends within an operation. Reads take no lock. Batches are split by shard and the parts run on every shard at
+    once, each in a single operation of its shard, so a batch is not atomic across shards.
+
+    Listings ask every shard for its page at once with asyncio.gather, then k-way merge the pages, each already sorted,
+    in the order of the query. Keyset pages are passed to the shards as they are. As accounts are spread evenly, each
+    shard is first asked for its share of the page and a few more, and only the shards whose accounts ran out before
+    the page was complete are asked for more. Offset pages are merged from the start of the listing, so they pay for
+    the depth of the page on every shard.
+    """
+    _SHARE_MARGIN = 4
+
+    def __init__(self, shards: Sequence[AccountRepositoryInterface]):
+        self._shards = list(shards)
+        self._locks = [asyncio.Lock() for _ in self._shards]
+        self._next_shard = 0
+
+    async def create_account(self, account_aggregate: Account) -> Account:
+        return await self._write(self._deal(1), lambda shard: shard.create_account(account_aggregate))
+
+    async def get_account(self, user_id: UserId) -> Account:
+        return await self._shard(user_id).get_account(user_id)
+
+    async def get_accounts(self, pagination: Pagination, query: AccountQuery = AccountQuery()) -> List[Account]:
+        offset = pagination.page * pagination.size
+        wanted = offset + pagination.size
+        key = _SORT_KEYS[query.sort]
+        share = min(wanted, wanted // len(self._shards) + self._SHARE_MARGIN)
+        pages = list(await asyncio.gather(*(shard.get_accounts(Pagination(
+            size=PaginationSize(share), after_id=pagination.after_id, after_value=pagination.after_value), query)
+            for shard in self._shards)))
+        more = [len(page) == share for page in pages]
+        positions = [0] * len(self._shards)
+        accounts: List[Account] = []
+        while True:
+            # A shard that returned a full page may hold more accounts, which all sort after the last one it returned,
+            # so the accounts up to the first of those last ones are known to be in their final order.
+            bound = min((key(page[-1]) for page, has_more in zip(pages, more) if has_more), default=None)
+            heap = [(key(page[position]), shard) for shard, (page, position) in enumerate(zip(pages, positions))
+                    if position < len(page)]
+            heapify(heap)
+            while heap and len(accounts) < wanted and (bound is None or heap[0][0] <= bound):
+                shard = heap[0][1]
+                accounts.append(pages[shard][positions[shard]])
+                positions[shard] += 1
+                if positions[shard] < len(pages[shard]):
+                    heapreplace(heap, (key(pages[shard][positions[shard]]), shard))
+                else:
+                    heappop(heap)
+            if len(accounts) == wanted or bound is None:
+                return accounts[offset:]
+            # The shards whose accounts were all taken while they may hold more are asked for the rest of the page.
+            size = PaginationSize(wanted - len(accounts))
+            refills = [shard for shard, has_more in enumerate(more)
+                       if has_more and positions[shard] == len(pages[shard])]
+            refilled = await asyncio.gather(*(self._shards[shard].get_accounts(
+                self._after(pages[shard][-1], size, query.sort), query) for shard in refills))
+            for shard, page in zip(refills, refilled):
+                pages[shard], positions[shard], more[shard] = page, 0, len(page) == size
+
+    async def patch_account(self, account_aggregate: Account,
+                            expected_version: Optional[AccountVersion] = None) -> Account:
+        return await self._write(account_aggregate.user.id % len(self._shards),
+                                 lambda shard: shard.patch_account(account_aggregate, expected_version))
+
+    async def delete_account(self, user_id: UserId):
+        await self._write(user_id % len(self._shards), lambda shard: shard.delete_account(user_id))
+
+    async def create_accounts(self, account_aggregates: List[Account]) -> List[Account]:
+        first_shard = self._deal(len(account_aggregates))
+        return await self._fan_out(account_aggregates, range(first_shard, first_shard + len(account_aggregates)),
+                                   lambda shard, items: shard.create_accounts(items), write=True)
+
+    async def patch_accounts(self, account_aggregates: List[Account]) -> List[Optional[Account]]:
+        return await self._fan_out(account_aggregates,
+                                   [account_aggregate.user.id for account_aggregate in account_aggregates],
+                                   lambda shard, items: shard.patch_accounts(items), write=True)
+
+    async def delete_accounts(self, user_ids: List[UserId]) -> List[bool]:
+        return await self._fan_out(user_ids, user_ids, lambda shard, items: shard.delete_accounts(items), write=True)
+
+    async def get_accounts_by_ids(self, user_ids: List[UserId]) -> List[Optional[Account]]:
+        return await self._fan_out(user_ids, user_ids, lambda shard, items: shard.get_accounts_by_ids(items),
+                                   write=False)
+
+    async def count_accounts(self, query: AccountQuery = AccountQuery()) -> int:
+        return sum(await asyncio.gather(*(shard.count_accounts(query) for shard in self._shards)))
+
+    async def search_accounts(self, text: str, limit: PaginationSize) -> List[Account]:
+        results = await asyncio.gather(*(shard.search_accounts(text, limit) for shard in self._shards))
+        query = trigrams(text)
+        return nlargest(limit, chain.from_iterable(results), key=lambda account: (
+            similarity(query, trigrams(account.user.personal_information.name)), -account.user.id))
+
+    async def close(self):
+        await asyncio.gather(*(shard.close() for shard in self._shards))
+
+    def _shard(self, user_id: UserId) -> AccountRepositoryInterface:
+        return self._shards[user_id % len(self._shards)]
+
+    @staticmethod
+    def _after(account: Account, size: PaginationSize, sort: AccountSort) -> Pagination:
+        """Keyset page of size accounts after account in the sort order."""
+        after_value = None if sort == 'id' else getattr(account.user.personal_information, sort)
+        return Pagination(size=size, after_id=account.user.id, after_value=after_value)
+
+    def _deal(self, count: int) -> int:
+        """Shard of the first of count new accounts, the others going to the following shards in turn."""
+        shard = self._next_shard
+        self._next_shard = (shard + count) % len(self._shards)
+        return shard
+
+    async def _write(self, shard: int,
+                     operation: Callable[[AccountRepositoryInterface], Awaitable[_Result]]) -> _Result:
+        async with self._locks[shard]:
+            return await operation(self._shards[shard])
+
+    async def _fan_out(self, items: List[_Item], keys: Sequence[int],
+                       operation: Callable[[AccountRepositoryInterface, List[_Item]], Awaitable[List[_Result]]],
+                       write: bool) -> List[_Result]:
+        """Runs operation once per shard with the items whose key it holds, on every shard at once.
+
+        Results are returned at the positions of their items.
+        """
+        positions: List[List[int]] = [[] for _ in self._shards]
+        for position, key in enumerate(keys):
+            positions[key % len(self._shards)].append(position)
+        results: List[Any] = [None] * len(items)
+
+        async def run(shard: int, shard_positions: List[int]):
+            shard_items = [items[position] for position in shard_positions]
+            if write:
+                shard_results = await self._write(shard, lambda repository: operation(repository, shard_items))
+            else:
+                shard_results = await operation(self._shards[shard], shard_items)
+            for position, result in zip(shard_positions, shard_results):
+                results[position] = result
+
+        await asyncio.gather(*(run(shard, shard_positions) for shard, shard_positions in enumerate(positions)
+                               if shard_positions))
+        return results
@@ -0,0 +1,3 @@
+from typing import Tuple
+
+Row = Tuple[int, str, int, int]
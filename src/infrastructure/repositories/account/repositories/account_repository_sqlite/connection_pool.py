@@ -0,0 +1,67 @@
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from queue import SimpleQueue
+from typing import Callable, TypeVar
+
+_T = TypeVar('_T')
+
+
+class SQLiteConnectionPool:
+    """Bounded pool of SQLite connections whose work runs in a dedicated thread pool.
+
+    The executor has as many threads as there are connections, so a worker always finds a free connection and the event
+    loop never waits on SQLite. Each connection keeps its own prepared statement cache, keyed by the SQL text.
+    """
+
+    def __init__(self, path: str, size: int, busy_timeout_ms: int = 5000):
+        self._connections: SimpleQueue[sqlite3.Connection] = SimpleQueue()
+        self._all_connections = []
+        for _ in range(size):
+            connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            connection.execute(f'PRAGMA busy_timeout = {int(busy_timeout_ms)}')
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            self._connections.put(connection)
+            self._all_connections.append(connection)
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='sqlite')
+
+    async def run(self, operation: Callable[[sqlite3.Connection], _T]) -> _T:
+        """Runs operation with a connection of the pool, outside the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._run, operation)
+
+    async def transaction(self, operation: Callable[[sqlite3.Connection], _T]) -> _T:
+        """Runs operation inside a write transaction, committed when it returns and rolled back when it raises."""
+        return await self.run(lambda connection: self._run_transaction(connection, operation))
+
+    def run_sync(self, operation: Callable[[sqlite3.Connection], _T]) -> _T:
+        return self._run(operation)
+
+    def transaction_sync(self, operation: Callable[[sqlite3.Connection], _T]) -> _T:
+        return self._run(lambda connection: self._run_transaction(connection, operation))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for connection in self._all_connections:
+            connection.close()
+        self._all_connections.clear()
+
+    def _run(self, operation: Callable[[sqlite3.Connection], _T]) -> _T:
+        connection = self._connections.get()
+        try:
+            return operation(connection)
+        finally:
+            self._connections.put(connection)
+
+    @staticmethod
+    def _run_transaction(connection: sqlite3.Connection, operation: Callable[[sqlite3.Connection], _T]) -> _T:
+        # IMMEDIATE takes the write lock upfront, so concurrent writers wait on busy_timeout instead of failing to
+        # upgrade a read transaction.
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            result = operation(connection)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return result
@@ -0,0 +1,76 @@
+"""SQL statements of the SQLite account repository.
+
+Statements are kept as constants so every connection reuses the prepared statement cached for the same text.
+"""
+from functools import lru_cache
+
+from domain.types.account_sort import AccountSort
+
+SCHEMA = (
+    ('CREATE TABLE IF NOT EXISTS accounts (id INTEGER PRIMARY KEY, name TEXT NOT NULL, age INTEGER NOT NULL, '
+     'version INTEGER NOT NULL DEFAULT 1)'),
+    'CREATE TABLE IF NOT EXISTS account_sequence (id INTEGER PRIMARY KEY CHECK (id = 0), next_id INTEGER NOT NULL)',
+    'INSERT OR IGNORE INTO account_sequence (id, next_id) VALUES (0, 0)',
+    'CREATE INDEX IF NOT EXISTS accounts_by_age ON accounts (age, id)',
+    'CREATE INDEX IF NOT EXISTS accounts_by_name ON accounts (name, id)',
+    # Number of accounts, kept by triggers as COUNT(*) scans the table. Databases created before it are counted once.
+    'CREATE TABLE IF NOT EXISTS account_count (id INTEGER PRIMARY KEY CHECK (id = 0), accounts INTEGER NOT NULL)',
+    'INSERT OR IGNORE INTO account_count (id, accounts) SELECT 0, COUNT(*) FROM accounts',
+    ('CREATE TRIGGER IF NOT EXISTS accounts_count_insert AFTER INSERT ON accounts '
+     'BEGIN UPDATE account_count SET accounts = accounts + 1; END'),
+    ('CREATE TRIGGER IF NOT EXISTS accounts_count_delete AFTER DELETE ON accounts '
+     'BEGIN UPDATE account_count SET accounts = accounts - 1; END'),
+)
+# Columns of the accounts table, to add the ones missing from databases created before them.
+ACCOUNT_COLUMNS = "SELECT name FROM pragma_table_info('accounts')"
+ADD_VERSION_COLUMN = 'ALTER TABLE accounts ADD COLUMN version INTEGER NOT NULL DEFAULT 1'
+
+NEXT_ID = 'UPDATE account_sequence SET next_id = next_id + 1 RETURNING next_id - 1'
+NEXT_ID_RANGE = 'UPDATE account_sequence SET next_id = next_id + ? RETURNING next_id - ?'
+# Keeps the sequence past the ids allocated by an id allocator, so they are not allocated again without it.
+ADVANCE_SEQUENCE = 'UPDATE account_sequence SET next_id = MAX(next_id, ?)'
+SELECT_NEXT_ID = 'SELECT next_id FROM account_sequence'
+INSERT_ACCOUNT = 'INSERT INTO accounts (id, name, age) VALUES (?, ?, ?)'
+SELECT_ACCOUNT = 'SELECT id, name, age, version FROM accounts WHERE id = ?'
+# Ids are bound as a single JSON array, so any number of them shares one prepared statement.
+SELECT_ACCOUNTS_BY_IDS = 'SELECT id, name, age, version FROM accounts WHERE id IN (SELECT value FROM json_each(?))'
+SELECT_VERSION = 'SELECT version FROM accounts WHERE id = ?'
+UPDATE_ACCOUNT = 'UPDATE accounts SET name = ?, age = ?, version = version + 1 WHERE id = ? RETURNING version'
+UPDATE_ACCOUNT_AT_VERSION = ('UPDATE accounts SET name = ?, age = ?, version = version + 1 '
+                             'WHERE id = ? AND version = ? RETURNING version')
+DELETE_ACCOUNT = 'DELETE FROM accounts WHERE id = ?'
+COUNT_ACCOUNTS = 'SELECT accounts FROM account_count'
+
+
+@lru_cache(maxsize=None)
+def select_accounts_query(sort: AccountSort, min_age: bool, max_age: bool, keyset: bool, name: bool = True,
+                          age: bool = True) -> str:
+    """Listing sorted by sort with the given age bounds, after a sort key when keyset or else at an offset.
+
+    Parameters are the age bounds given, the sort key to start after when keyset, then the limit and else the offset.
+    Names and ages are selected as NULL when not asked for, so rows keep the same columns without reading them.
+    There are few variants, so each is built once and keeps a single text, and thus a single prepared statement.
+    """
+    columns = 'id' if sort == 'id' else f'{sort}, id'
+    conditions = []
+    if min_age:
+        conditions.append('age >= ?')
+    if max_age:
+        conditions.append('age <= ?')
+    if keyset:
+        conditions.append('id > ?' if sort == 'id' else f'({columns}) > (?, ?)')
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+    paging = 'LIMIT ?' if keyset else 'LIMIT ? OFFSET ?'
+    selected = f"id, {'name' if name else 'NULL'}, {'age' if age else 'NULL'}, version"
+    return f'SELECT {selected} FROM accounts{where} ORDER BY {columns} {paging}'
+
+
+@lru_cache(maxsize=None)
+def count_accounts_query(min_age: bool, max_age: bool) -> str:
+    """Count of the accounts within the given age bounds, read from the age index. Parameters are the bounds given."""
+    conditions = []
+    if min_age:
+        conditions.append('age >= ?')
+    if max_age:
+        conditions.append('age <= ?')
+    return f"SELECT COUNT(*) FROM accounts WHERE {' AND '.join(conditions)}"
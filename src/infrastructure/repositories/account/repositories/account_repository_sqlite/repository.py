@@ -0,0 +1,232 @@
+import json
+import sqlite3
+from functools import partial
+from typing import List, Optional, Tuple
+
+from domain.aggregates.account import Account
+from domain.entities.user import User
+from domain.types.account_version import AccountVersion
+from domain.types.personal_age import PersonalAge
+from domain.types.personal_name import PersonalName
+from domain.types.user_id import UserId
+from domain.value_objects.account_query import AccountQuery
+from domain.value_objects.pagination import Pagination
+from domain.value_objects.personal_information import PersonalInformation
+from infrastructure.repositories.account.exceptions.account_not_found_error import AccountNotFoundError
+from infrastructure.repositories.account.exceptions.account_version_conflict_error import \
+    AccountVersionConflictError
+from infrastructure.repositories.account.id_allocators.interface import UserIdAllocatorInterface
+from infrastructure.repositories.account.interface import AccountRepositoryInterface
+from infrastructure.repositories.account.repositories.account_repository_sqlite import queries
+from infrastructure.repositories.account.repositories.account_repository_sqlite.alias import Row
+from infrastructure.repositories.account.repositories.account_repository_sqlite.connection_pool import \
+    SQLiteConnectionPool
+
+
+class AccountRepositorySQLite(AccountRepositoryInterface):
+    """Accounts stored in a SQLite database file in WAL mode.
+
+    The id is the rowid of the accounts table, so point operations and keyset pages walk its b-tree directly. Ids come
+    from a sequence row instead of MAX(id), so they are never reused after a delete or a restart. Indexes on
+    (age, id) and (name, id) serve the listings filtered by age or sorted by another field, and the counts of an age
+    range. The number of accounts is a row kept by triggers on every insert and delete.
+
+    With an id_allocator, ids are allocated by it in the event loop instead of read from the sequence row. Creations
+    still move the sequence row past their ids in their transaction, so they keep updating it, but without reading
+    it first, and databases opened without an allocator never reuse those ids. The allocator is advanced past the
+    sequence when opened.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4, id_allocator: Optional[UserIdAllocatorInterface] = None):
+        self._pool = SQLiteConnectionPool(path, pool_size)
+        self._pool.transaction_sync(self._create_schema)
+        self._id_allocator = id_allocator
+        if id_allocator is not None:
+            (next_id,), = self._pool.run_sync(lambda connection: connection.execute(queries.SELECT_NEXT_ID).fetchall())
+            id_allocator.advance(next_id)
+
+    async def create_account(self, account_aggregate: Account) -> Account:
+        personal_information = account_aggregate.user.personal_information
+        user_id = None if self._id_allocator is None else self._id_allocator.allocate()
+        account_aggregate.user.id = await self._pool.transaction(
+            partial(self._insert, name=personal_information.name, age=personal_information.age, user_id=user_id))
+        account_aggregate.version = 1
+        return account_aggregate
+
+    async def get_account(self, user_id: UserId) -> Account:
+        row = await self._pool.run(partial(self._select_one, user_id=user_id))
+        if row is None:
+            raise AccountNotFoundError(f"Account with id {user_id} is not found.")
+        return self._row_to_aggregate_factory(row)
+
+    async def get_accounts(self, pagination: Pagination, query: AccountQuery = AccountQuery()) -> List[Account]:
+        keyset = pagination.after_id is not None
+        name, age = query.includes('name'), query.includes('age')
+        statement = queries.select_accounts_query(query.sort, query.min_age is not None, query.max_age is not None,
+                                                  keyset, name, age)
+        parameters = [age for age in (query.min_age, query.max_age) if age is not None]
+        if keyset:
+            parameters += [pagination.after_id] if query.sort == 'id' else [pagination.after_value, pagination.after_id]
+            parameters.append(pagination.size)
+        else:
+            parameters += [pagination.size, pagination.page * pagination.size]
+        rows = await self._pool.run(lambda connection: connection.execute(statement, parameters).fetchall())
+        if name and age:
+            return [self._row_to_aggregate_factory(row) for row in rows]
+        return [self._row_to_partial_aggregate_factory(row) for row in rows]
+
+    async def delete_account(self, user_id: UserId):
+        deleted = await self._pool.transaction(
+            lambda connection: connection.execute(queries.DELETE_ACCOUNT, (user_id,)).rowcount)
+        if not deleted:
+            raise AccountNotFoundError(f"Account with id {user_id} is not found.")
+
+    async def patch_account(self, account_aggregate: Account,
+                            expected_version: Optional[AccountVersion] = None) -> Account:
+        user = account_aggregate.user
+        parameters = (user.personal_information.name, user.personal_information.age, user.id)
+        account_aggregate.version = await self._pool.transaction(
+            partial(self._update, parameters=parameters, expected_version=expected_version))
+        return account_aggregate
+
+    async def create_accounts(self, account_aggregates: List[Account]) -> List[Account]:
+        if not account_aggregates:
+            return account_aggregates
+        rows = [(account_aggregate.user.personal_information.name, account_aggregate.user.personal_information.age)
+                for account_aggregate in account_aggregates]
+        if self._id_allocator is None:
+            first_id = await self._pool.transaction(partial(self._insert_many, rows=rows))
+            user_ids = range(first_id, first_id + len(rows))
+        else:
+            user_ids = list(self._id_allocator.allocate_many(len(rows)))
+            await self._pool.transaction(partial(self._insert_many_with_ids, rows=rows, user_ids=user_ids))
+        for user_id, account_aggregate in zip(user_ids, account_aggregates):
+            account_aggregate.user.id = user_id
+            account_aggregate.version = 1
+        return account_aggregates
+
+    async def patch_accounts(self, account_aggregates: List[Account]) -> List[Optional[Account]]:
+        parameters = [(account_aggregate.user.personal_information.name,
+                       account_aggregate.user.personal_information.age,
+                       account_aggregate.user.id) for account_aggregate in account_aggregates]
+        versions = await self._pool.transaction(partial(self._update_each, parameters=parameters))
+        results = []
+        for account_aggregate, version in zip(account_aggregates, versions):
+            if version is not None:
+                account_aggregate.version = version
+            results.append(account_aggregate if version is not None else None)
+        return results
+
+    async def delete_accounts(self, user_ids: List[UserId]) -> List[bool]:
+        return await self._pool.transaction(partial(self._execute_each, query=queries.DELETE_ACCOUNT,
+                                                    parameters=[(user_id,) for user_id in user_ids]))
+
+    async def get_accounts_by_ids(self, user_ids: List[UserId]) -> List[Optional[Account]]:
+        rows = await self._pool.run(lambda connection: connection.execute(queries.SELECT_ACCOUNTS_BY_IDS,
+                                                                          (json.dumps(user_ids),)).fetchall())
+        accounts = {row[0]: row for row in rows}
+        return [self._row_to_aggregate_factory(accounts[user_id]) if user_id in accounts else None
+                for user_id in user_ids]
+
+    async def count_accounts(self, query: AccountQuery = AccountQuery()) -> int:
+        if not query.filtered:
+            statement, parameters = queries.COUNT_ACCOUNTS, []
+        else:
+            statement = queries.count_accounts_query(query.min_age is not None, query.max_age is not None)
+            parameters = [age for age in (query.min_age, query.max_age) if age is not None]
+        (count,), = await self._pool.run(lambda connection: connection.execute(statement, parameters).fetchall())
+        return count
+
+    async def close(self):
+        self._pool.close()
+        if self._id_allocator is not None:
+            self._id_allocator.close()
+
+    @staticmethod
+    def _create_schema(connection: sqlite3.Connection):
+        for statement in queries.SCHEMA:
+            connection.execute(statement)
+        if ('version',) not in connection.execute(queries.ACCOUNT_COLUMNS).fetchall():
+            connection.execute(queries.ADD_VERSION_COLUMN)
+
+    @staticmethod
+    def _insert(connection: sqlite3.Connection, name: PersonalName, age: PersonalAge,
+                user_id: Optional[UserId] = None) -> UserId:
+        if user_id is None:
+            (user_id,), = connection.execute(queries.NEXT_ID).fetchall()
+        else:
+            connection.execute(queries.ADVANCE_SEQUENCE, (user_id + 1,))
+        connection.execute(queries.INSERT_ACCOUNT, (user_id, name, age))
+        return user_id
+
+    @staticmethod
+    def _insert_many(connection: sqlite3.Connection, rows: List[Tuple[PersonalName, PersonalAge]]) -> UserId:
+        (first_id,), = connection.execute(queries.NEXT_ID_RANGE, (len(rows), len(rows))).fetchall()
+        connection.executemany(queries.INSERT_ACCOUNT,
+                               [(user_id, name, age) for user_id, (name, age) in enumerate(rows, start=first_id)])
+        return first_id
+
+    @staticmethod
+    def _insert_many_with_ids(connection: sqlite3.Connection, rows: List[Tuple[PersonalName, PersonalAge]],
+                              user_ids: List[UserId]):
+        connection.executemany(queries.INSERT_ACCOUNT,
+                               [(user_id, name, age) for user_id, (name, age) in zip(user_ids, rows)])
+        connection.execute(queries.ADVANCE_SEQUENCE, (max(user_ids) + 1,))
+
+    @staticmethod
+    def _update(connection: sqlite3.Connection, parameters: tuple,
+                expected_version: Optional[AccountVersion]) -> AccountVersion:
+        """Updates the row at parameters, if it is at expected_version when given, and returns its new version."""
+        if expected_version is None:
+            row = connection.execute(queries.UPDATE_ACCOUNT, parameters).fetchone()
+        else:
+            row = connection.execute(queries.UPDATE_ACCOUNT_AT_VERSION, (*parameters, expected_version)).fetchone()
+        if row is None:
+            user_id = parameters[-1]
+            current = connection.execute(queries.SELECT_VERSION, (user_id,)).fetchone()
+            if current is None:
+                raise AccountNotFoundError(f"Account with id {user_id} is not found.")
+            raise AccountVersionConflictError(f"Account with id {user_id} is at version {current[0]}, "
+                                              f"not {expected_version}.")
+        return row[0]
+
+    @staticmethod
+    def _update_each(connection: sqlite3.Connection, parameters: List[tuple]) -> List[Optional[AccountVersion]]:
+        """Updates the row at each parameters and returns its new version, or None when it is not found."""
+        versions = []
+        for row_parameters in parameters:
+            row = connection.execute(queries.UPDATE_ACCOUNT, row_parameters).fetchone()
+            versions.append(row[0] if row is not None else None)
+        return versions
+
+    @staticmethod
+    def _execute_each(connection: sqlite3.Connection, query: str, parameters: List[tuple]) -> List[bool]:
+        """Executes query once per parameters and returns whether each execution changed a row."""
+        return [connection.execute(query, row_parameters).rowcount > 0 for row_parameters in parameters]
+
+    @staticmethod
+    def _select_one(connection: sqlite3.Connection, user_id: UserId) -> Row:
+        return connection.execute(queries.SELECT_ACCOUNT, (user_id,)).fetchone()
+
+    @staticmethod
+    def _row_to_aggregate_factory(row: Row) -> Account:
+        user_id, name, age, version = row
+        return Account.trusted(
+            user=User.trusted(
+                user_id=user_id,
+                personal_information=PersonalInformation.trusted(age=age, name=name)
+            ),
+            version=version
+        )
+
+    @staticmethod
+    def _row_to_partial_aggregate_factory(row: Row) -> Account:
+        """Account of a row without the name or age it was not asked for, selected as NULL, see AccountQuery.fields."""
+        user_id, name, age, version = row
+        return Account.trusted(
+            user=User.trusted(
+                user_id=user_id,
+                personal_information=PersonalInformation.partial(age=age, name=name)
+            ),
+            version=version
+        )
@@ -1,6 +1,116 @@
-from fastapi import FastAPI
+"""Entry point of the application.
 
-from application.use_case.accounts.views import accounts_router
+create_app builds the application from settings, which ASGI servers can call with their factory option, and app is
+the application built from the environment, created when it is first accessed, so importing this module is cheap and
+has no side effect.
+"""
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional, Sequence, Tuple
 
-app = FastAPI()
-app.include_router(accounts_router)
+from settings import Settings
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+
+_logger = logging.getLogger(__name__)
+
+
+class _StartupTimer:
+    """Durations of the named steps of the startup, following the steps given."""
+
+    def __init__(self, steps: Sequence[Tuple[str, float]] = ()):
+        self.steps: List[Tuple[str, float]] = list(steps)
+        self._last = time.perf_counter()
+
+    def step(self, name: str):
+        """Ends the step started by the previous one, or by the creation of the timer."""
+        now = time.perf_counter()
+        self.steps.append((name, now - self._last))
+        self._last = now
+
+    def log(self):
+        total = sum(duration for _, duration in self.steps)
+        _logger.info('Started in %.1f ms: %s.', total * 1000,
+                     ', '.join(f'{name} {duration * 1000:.1f} ms' for name, duration in self.steps))
+
+
+def create_app(settings: Optional[Settings] = None) -> 'FastAPI':
+    """Builds the application, with the account repository selected by settings, read from the environment by default.
+
+    Only the modules the settings need are imported. The repository is opened in the lifespan startup, which also
+    builds the OpenAPI document and runs a first serialization of an account, so the first requests do not pay for
+    them, then logs how long every step of the startup took.
+    """
+    build_timer = _StartupTimer()
+    settings = settings if settings is not None else Settings.from_env()
+    from fastapi import FastAPI
+
+    from application.services.account_importer import AccountImporter
+    from application.services.account_service import AccountService
+    from application.use_case.accounts.views import accounts_router
+    from domain.trusted import set_trusted_validation
+    from infrastructure.metrics.registry import REGISTRY, NullMetricsRegistry
+    from infrastructure.repositories.account.factory import build_account_repository
+    set_trusted_validation(settings.domain_validate_trusted)
+    build_timer.step('imports')
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        # Every startup is logged with the steps that built the application, but not the time since.
+        timer = _StartupTimer(build_timer.steps)
+        account_repository = build_account_repository(settings)
+        account_importer = None
+        # Opened right after the repository, so a later startup step that fails still closes it.
+        try:
+            registry = REGISTRY if settings.metrics_enabled else NullMetricsRegistry()
+            app.state.account_service = AccountService(account_repository, registry,
+                                                       get_account_window=settings.account_get_coalescing_window,
+                                                       change_feed_capacity=settings.account_change_feed_capacity)
+            app.state.account_importer = account_importer = AccountImporter(
+                app.state.account_service, settings.account_import_workers, settings.account_import_chunk_size)
+            timer.step('repository')
+            app.openapi()
+            timer.step('openapi')
+            _warm_up_serialization()
+            timer.step('serialization')
+            timer.log()
+            yield
+        finally:
+            if account_importer is not None:
+                account_importer.close()
+            await account_repository.close()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(accounts_router)
+    if settings.response_compression_minimum_size is not None:
+        from infrastructure.compression.middleware import CompressionMiddleware
+        app.add_middleware(CompressionMiddleware, minimum_size=settings.response_compression_minimum_size)
+    # Added last, so it wraps the others and measures the bodies as they are sent.
+    if settings.metrics_enabled:
+        from application.use_case.metrics.views import metrics_router
+        from infrastructure.metrics.middleware import MetricsMiddleware
+        app.add_middleware(MetricsMiddleware, registry=REGISTRY)
+        app.include_router(metrics_router)
+    build_timer.step('routes')
+    return app
+
+
+def _warm_up_serialization():
+    """Validates and serializes an account once, as requests do, to initialize what pydantic builds on first use."""
+    from application.use_case.accounts.models import AccountPage
+    from application.use_case.accounts.responses import AccountJSONResponse, AccountPageJSONResponse, \
+        AccountsJSONResponse
+    from domain.aggregates.account import Account
+    account = Account.model_validate_json(b'{"user": {"id": 0, "personal_information": {"age": 0, "name": "name"}}}')
+    AccountJSONResponse(account)
+    AccountsJSONResponse([account])
+    AccountPageJSONResponse(AccountPage(items=[account], total=1))
+
+
+def __getattr__(name: str):
+    if name == 'app':
+        app = globals()['app'] = create_app()
+        return app
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
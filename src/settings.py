@@ -0,0 +1,69 @@
+"""Application settings."""
+import os
+from typing import Literal, Mapping, Optional
+
+from pydantic import BaseModel, ConfigDict, NonNegativeFloat, NonNegativeInt, PositiveFloat, PositiveInt, \
+    model_validator
+
+
+class Settings(BaseModel):
+    """Deployment settings. Every field can be set from the environment variable of the same name in upper case."""
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
+    account_repository: Literal['in_memory', 'columnar', 'sqlite', 'mmap'] = 'in_memory'
+    account_sqlite_path: str = 'accounts.sqlite3'
+    account_sqlite_pool_size: PositiveInt = 4
+    # Files shared by every worker process with the mmap repository, in the working directory by default. Pointing it
+    # under /dev/shm keeps them in memory only.
+    account_mmap_path: str = 'accounts.mmap'
+    # Accounts kept by the read-through cache in front of the repository, 0 disables it.
+    account_cache_size: NonNegativeInt = 0
+    account_cache_ttl: Optional[PositiveFloat] = 60.0
+    account_cache_pages: bool = False
+    # Trigram index of the names kept by the in-memory repository for searches.
+    account_search_index: bool = True
+    # Directory of the write-ahead log and snapshots of the in-memory repository, which only lives in memory without.
+    account_wal_directory: Optional[str] = None
+    account_snapshot_interval: PositiveFloat = 300.0
+    # Shards the in-memory or columnar accounts are partitioned across by id, each with its own lock, 1 for none.
+    account_shards: PositiveInt = 1
+    # Store the ids of new accounts are leased from, in blocks of account_id_block_size, so no two processes sharing it
+    # allocate the same id, nor one after a restart: a file or a SQLite database at account_id_lease_path. None
+    # allocates the ids within each process. The mmap repository allocates its own.
+    account_id_leases: Optional[Literal['file', 'sqlite']] = None
+    account_id_lease_path: str = 'account_ids'
+    account_id_block_size: PositiveInt = 1000
+    # Seconds during which concurrent get_account calls are coalesced into one repository read, 0 for the current event
+    # loop iteration only and None to read them one by one. Pays off with the sqlite repository.
+    account_get_coalescing_window: Optional[NonNegativeFloat] = None
+    # Processes validating the rows of imports, None for one per CPU and 0 to validate them in the event loop.
+    account_import_workers: Optional[NonNegativeInt] = None
+    # Lines of an import validated together and created in a single repository call.
+    account_import_chunk_size: PositiveInt = 5000
+    # Last changes of the accounts kept for the subscribers of /api/account/changes to catch up from.
+    account_change_feed_capacity: PositiveInt = 10000
+    # Validates the accounts repositories read back too, which are otherwise trusted, see domain.trusted. For debugging.
+    domain_validate_trusted: bool = False
+    # Responses of at least this many bytes, or streamed, are compressed with brotli, when the brotli package is
+    # installed, or gzip, as the request accepts. None disables compression.
+    response_compression_minimum_size: Optional[NonNegativeInt] = 1000
+    # Request, service and repository metrics, served on /metrics.
+    metrics_enabled: bool = True
+
+    @model_validator(mode='after')
+    def _check_shards(self) -> 'Settings':
+        if self.account_shards > 1 and (self.account_repository not in ('in_memory', 'columnar')
+                                        or self.account_wal_directory is not None):
+            raise ValueError('account_shards only applies to the in_memory and columnar repositories, without a '
+                             'write-ahead log.')
+        return self
+
+    @model_validator(mode='after')
+    def _check_id_leases(self) -> 'Settings':
+        if self.account_id_leases is not None and self.account_repository == 'mmap':
+            raise ValueError('account_id_leases does not apply to the mmap repository.')
+        return self
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> 'Settings':
+        return cls.model_validate({name: environ[name.upper()] for name in cls.model_fields if name.upper() in environ})
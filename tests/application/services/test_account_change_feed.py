@@ -0,0 +1,68 @@
+"""Module related with AccountChangeFeed tests"""
+import asyncio
+from typing import AsyncIterator, List
+
+import pytest
+
+from application.services.account_change_feed import AccountChangeFeed
+from application.services.exceptions.account_changes_expired_error import AccountChangesExpiredError
+from domain.aggregates.account import Account
+from domain.events.account_change import AccountChange
+from domain.types.user_id import UserId
+
+
+async def _read(subscription: AsyncIterator[List[AccountChange]]) -> List[AccountChange]:
+    return await asyncio.wait_for(subscription.__anext__(), 1)
+
+
+async def test_account_change_feed_subscribe(account_1: Account):
+    """Test subscribers catch up from since, then receive the changes as they are published, as copies."""
+    feed = AccountChangeFeed(capacity=10)
+    feed.publish('created', UserId(0), account_1)
+    feed.publish('deleted', UserId(1))
+    from_start = feed.subscribe(0)
+    from_now = feed.subscribe()
+    caught_up = await _read(from_start)
+    account_1.version = 7
+    waiting = asyncio.create_task(_read(from_now))
+    await asyncio.sleep(0)
+    feed.publish('patched', UserId(0), account_1)
+
+    assert [(change.sequence, change.type, change.user_id) for change in caught_up] == [(1, 'created', 0),
+                                                                                        (2, 'deleted', 1)]
+    assert (caught_up[0].account.version, caught_up[1].account) == (0, None)
+    assert [change.sequence for change in await waiting] == [3]
+    assert [change.sequence for change in await _read(from_start)] == [3]
+
+
+async def test_account_change_feed_slow_subscriber(account_1: Account):
+    """Test publishing never waits on a subscriber, which expires once it falls more than the capacity behind."""
+    feed = AccountChangeFeed(capacity=3)
+    slow = feed.subscribe()
+    for user_id in range(3):
+        feed.publish('patched', UserId(user_id), account_1)
+    behind = await _read(slow)
+    for user_id in range(4):
+        feed.publish('deleted', UserId(user_id))
+
+    assert len(behind) == 3
+    with pytest.raises(AccountChangesExpiredError):
+        await _read(slow)
+
+
+@pytest.mark.parametrize('since', [-1, 1, 5])
+def test_account_change_feed_subscribe_not_kept(since: int):
+    """Test subscribing after changes that are no longer kept, or were not published yet, fails right away."""
+    feed = AccountChangeFeed(capacity=2)
+    for user_id in range(4):
+        feed.publish('deleted', UserId(user_id))
+
+    with pytest.raises(AccountChangesExpiredError):
+        feed.subscribe(since)
+
+
+async def test_account_change_feed_keep_alive():
+    """Test empty batches are yielded while no change is published, with keep_alive."""
+    subscription = AccountChangeFeed().subscribe(keep_alive=0.01)
+
+    assert await _read(subscription) == []
@@ -0,0 +1,128 @@
+"""Module related with AccountImporter tests"""
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, List
+
+import pytest
+
+from application.services.account_importer import AccountImporter
+from application.services.account_service import AccountService
+from domain.aggregates.account import Account
+from domain.types.pagination_size import PaginationSize
+from infrastructure.metrics.registry import MetricsRegistry
+from infrastructure.repositories.account.repositories.account_repository_in_memory.repository import \
+    AccountRepositoryInMemory
+
+
+class _BlockedAccountService(AccountService):
+    """Account service whose creations wait until released, as a slow repository would."""
+
+    def __init__(self):
+        super().__init__(AccountRepositoryInMemory(), MetricsRegistry())
+        self.released = asyncio.Event()
+
+    async def create_accounts(self, account_aggregations: List[Account]) -> List[Account]:
+        await self.released.wait()
+        return await super().create_accounts(account_aggregations)
+
+
+async def _body(data: bytes, size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def _names(account_service: AccountService) -> List[str]:
+    return [account.user.personal_information.name
+            async for account in account_service.iter_accounts(PaginationSize(100))]
+
+
+@pytest.fixture
+def account_service() -> AccountService:
+    return AccountService(AccountRepositoryInMemory(), MetricsRegistry())
+
+
+async def test_account_importer_csv(account_service: AccountService):
+    """Test CSV rows are created in order across chunks and reads, and invalid ones reported by line."""
+    importer = AccountImporter(account_service, workers=0, chunk_size=2)
+    body = b'id,age,name\r\n7,30,Ann\r\n8,-1,Bob\r\n\r\n9,31,"Doe, Jane"\n10,x,Eve\n11,40\n12,41,Fay'
+
+    summary = await importer.import_accounts(_body(body, 5), 'csv')
+
+    assert (summary.created, summary.failed) == (3, 3)
+    assert [error.line for error in summary.errors] == [3, 6, 7]
+    assert summary.errors[0].detail.startswith('age: ')
+    assert await _names(account_service) == ['Ann', 'Doe, Jane', 'Fay']
+
+
+async def test_account_importer_csv_leading_blank_lines(account_service: AccountService):
+    """Test blank lines before the CSV header are skipped, across chunks, and rows keep their line numbers."""
+    importer = AccountImporter(account_service, workers=0, chunk_size=2)
+    body = b'\r\n\n \r\nname,age\r\nAnn,30\r\nBob,x\r\n'
+
+    summary = await importer.import_accounts(_body(body, 3), 'csv')
+
+    assert (summary.created, summary.failed) == (1, 1)
+    assert [error.line for error in summary.errors] == [6]
+    assert await _names(account_service) == ['Ann']
+
+
+async def test_account_importer_csv_header(account_service: AccountService):
+    """Test a CSV header without a name and an age column is rejected."""
+    with pytest.raises(ValueError):
+        await AccountImporter(account_service, workers=0).import_accounts(_body(b'id,name\n1,Ann\n', 100), 'csv')
+
+
+async def test_account_importer_ndjson_workers(account_service: AccountService, account_1: Account):
+    """Test NDJSON lines are validated by worker processes, and the errors kept up to max_errors."""
+    importer = AccountImporter(account_service, workers=2, chunk_size=3, max_errors=2)
+    body = b'\n'.join([account_1.model_dump_json().encode()] * 4 + [b'{"user": {}}', b'not json', b'{}'])
+
+    try:
+        summary = await importer.import_accounts(_body(body, 64), 'ndjson')
+    finally:
+        importer.close()
+
+    assert (summary.created, summary.failed) == (4, 3)
+    assert [error.line for error in summary.errors] == [5, 6]
+    assert await _names(account_service) == [account_1.user.personal_information.name] * 4
+
+
+async def test_account_importer_broken_pool(account_service: AccountService):
+    """Test an import whose worker died fails, and the next one starts a new pool."""
+    importer = AccountImporter(account_service, workers=1)
+    body = b'name,age\nAnn,30\n'
+
+    try:
+        assert (await importer.import_accounts(_body(body, 64), 'csv')).created == 1
+        for process in list(importer._executor._processes.values()):
+            process.kill()
+            process.join()
+        with pytest.raises(BrokenProcessPool):
+            await importer.import_accounts(_body(body, 64), 'csv')
+        assert (await importer.import_accounts(_body(body, 64), 'csv')).created == 1
+    finally:
+        importer.close()
+
+    assert await _names(account_service) == ['Ann', 'Ann']
+
+
+async def test_account_importer_backpressure():
+    """Test the body is only read a bounded number of chunks ahead of the accounts being created."""
+    account_service = _BlockedAccountService()
+    importer = AccountImporter(account_service, workers=0, chunk_size=1)
+    read = []
+
+    async def body() -> AsyncIterator[bytes]:
+        yield b'name,age\n'
+        for index in range(10):
+            read.append(index)
+            yield f'name {index},{index}\n'.encode()
+
+    task = asyncio.create_task(importer.import_accounts(body(), 'csv'))
+    for _ in range(10):
+        await asyncio.sleep(0)
+    read_while_blocked = len(read)
+    account_service.released.set()
+
+    assert read_while_blocked <= 3
+    assert (await task).created == 10
@@ -0,0 +1,80 @@
+"""Module related with AccountLoader tests"""
+import asyncio
+from typing import List, Optional
+
+import pytest
+
+from application.services.account_loader import AccountLoader
+from domain.aggregates.account import Account
+from domain.types.user_id import UserId
+from infrastructure.repositories.account.exceptions.account_not_found_error import AccountNotFoundError
+from infrastructure.repositories.account.repositories.account_repository_in_memory.repository import \
+    AccountRepositoryInMemory
+
+
+class _RecordingAccountRepository(AccountRepositoryInMemory):
+    def __init__(self):
+        super().__init__()
+        self.calls: List[List[UserId]] = []
+
+    async def get_accounts_by_ids(self, user_ids: List[UserId]) -> List[Optional[Account]]:
+        self.calls.append(user_ids)
+        return await super().get_accounts_by_ids(user_ids)
+
+
+@pytest.fixture
+async def recording_repository(account_1: Account, account_2: Account) -> _RecordingAccountRepository:
+    repo = _RecordingAccountRepository()
+    await repo.create_accounts([account_1, account_2])
+    return repo
+
+
+async def test_account_loader_coalesces(recording_repository: _RecordingAccountRepository):
+    """Test calls of the same iteration are read in one call, each id once, and not found only fails its callers."""
+    loader = AccountLoader(recording_repository)
+
+    first, second, missing, again = await asyncio.gather(
+        loader.load(UserId(0)), loader.load(UserId(1)), loader.load(UserId(9)), loader.load(UserId(0)),
+        return_exceptions=True)
+
+    assert recording_repository.calls == [[0, 1, 9]]
+    assert [first.user.id, second.user.id, again.user.id] == [0, 1, 0]
+    assert first == again and first is not again
+    assert isinstance(missing, AccountNotFoundError)
+
+
+async def test_account_loader_window(recording_repository: _RecordingAccountRepository):
+    """Test calls spread over a window are read in one call, and the next calls in another one."""
+    loader = AccountLoader(recording_repository, window=0.05)
+
+    async def load_later(user_id: UserId) -> Account:
+        await asyncio.sleep(0.01)
+        return await loader.load(user_id)
+
+    await asyncio.gather(loader.load(UserId(0)), load_later(UserId(1)))
+    await loader.load(UserId(1))
+
+    assert recording_repository.calls == [[0, 1], [1]]
+
+
+async def test_account_loader_max_batch_size(recording_repository: _RecordingAccountRepository):
+    """Test a batch is sent as soon as it is full."""
+    loader = AccountLoader(recording_repository, max_batch_size=2)
+
+    await asyncio.gather(*(loader.load(UserId(user_id % 2)) for user_id in range(5)))
+
+    assert recording_repository.calls == [[0, 1], [0, 1], [0]]
+
+
+async def test_account_loader_error(recording_repository: _RecordingAccountRepository,
+                                    monkeypatch: pytest.MonkeyPatch):
+    """Test a failed read fails every caller of the batch."""
+    async def fail(user_ids: List[UserId]) -> List[Optional[Account]]:
+        raise ConnectionError('unreachable')
+
+    monkeypatch.setattr(recording_repository, 'get_accounts_by_ids', fail)
+    loader = AccountLoader(recording_repository)
+
+    results = await asyncio.gather(loader.load(UserId(0)), loader.load(UserId(1)), return_exceptions=True)
+
+    assert [type(result) for result in results] == [ConnectionError, ConnectionError]
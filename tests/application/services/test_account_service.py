@@ -1,4 +1,5 @@
 """Module related with Account service tests"""
+import asyncio
 
 import pytest
 
@@ -11,7 +12,9 @@ from domain.types.personal_name import PersonalName
 from domain.types.user_id import UserId
 from domain.value_objects.pagination import Pagination
 from domain.value_objects.personal_information import PersonalInformation
+from infrastructure.metrics.registry import MetricsRegistry
 from infrastructure.repositories.account.exceptions.account_not_found_error import AccountNotFoundError
+from infrastructure.repositories.account.interface import AccountRepositoryInterface
 
 
 async def test_account_service_in_memory_create(account_service_mock: AccountService, account_1: Account):
@@ -90,3 +93,43 @@ async def test_account_service_in_memory_delete_not_found(account_service_mock:
     """Test service delete workflow when account is not found."""
     with pytest.raises(AccountNotFoundError):
         await account_service_mock.delete_account(UserId(-1))
+
+
+async def test_account_service_in_memory_batch(account_service_mock: AccountService, account_1: Account,
+                                               account_2: Account):
+    """Test service batch workflow."""
+    created = await account_service_mock.create_accounts([account_1, account_2])
+    account_2.user.personal_information = PersonalInformation(age=PersonalAge(7), name=PersonalName("batch"))
+    patched = await account_service_mock.patch_accounts([account_2])
+    deleted = await account_service_mock.delete_accounts([UserId(4), UserId(4)])
+
+    assert [account.user.id for account in created] == [4, 5]
+    assert patched == [account_2]
+    assert (await account_service_mock.get_account(UserId(5))).user.personal_information.name == "batch"
+    assert deleted == [True, False]
+
+
+async def test_account_service_in_memory_get_coalesced(account_repository_mock: AccountRepositoryInterface,
+                                                       account_3: Account):
+    """Test service get workflow with concurrent reads coalesced."""
+    account_service = AccountService(account_repository_mock, MetricsRegistry(), get_account_window=0)
+
+    account, missing = await asyncio.gather(account_service.get_account(UserId(2)),
+                                            account_service.get_account(UserId(-1)), return_exceptions=True)
+
+    assert account.user.personal_information == account_3.user.personal_information
+    assert isinstance(missing, AccountNotFoundError)
+
+
+async def test_account_service_in_memory_changes(account_service_mock: AccountService, account_1: Account):
+    """Test service publishes the changes it makes, and only those that applied."""
+    changes = account_service_mock.subscribe_changes()
+    created = await account_service_mock.create_account(account_1)
+    await account_service_mock.patch_account(created)
+    await account_service_mock.patch_accounts([account_1.model_copy(update={'user': account_1.user.model_copy(
+        update={'id': UserId(99)})})])
+    await account_service_mock.delete_accounts([UserId(4), UserId(4)])
+    await account_service_mock.delete_account(UserId(0))
+
+    assert [(change.type, change.user_id) for change in await changes.__anext__()] == [
+        ('created', 4), ('patched', 4), ('deleted', 4), ('deleted', 0)]
@@ -0,0 +1,39 @@
+"""Module related with accounts responses tests."""
+import json
+from typing import AsyncIterator, List
+
+from application.services.exceptions.account_changes_expired_error import AccountChangesExpiredError
+from application.use_case.accounts.responses import AccountJSONResponse, AccountsJSONResponse, \
+    account_change_events
+from domain.aggregates.account import Account
+from domain.events.account_change import AccountChange
+
+
+def test_account_json_response(account_1: Account):
+    response = AccountJSONResponse(account_1)
+
+    assert response.media_type == 'application/json'
+    assert Account.model_validate_json(response.body) == account_1
+
+
+def test_accounts_json_response(account_1: Account, account_2: Account):
+    response = AccountsJSONResponse([account_1, account_2], headers={'X-Test': 'yes'})
+
+    assert json.loads(response.body) == [account_1.model_dump(), account_2.model_dump()]
+    assert response.headers['X-Test'] == 'yes'
+
+
+async def test_account_change_events(account_1: Account):
+    async def changes() -> AsyncIterator[List[AccountChange]]:
+        yield [AccountChange(sequence=1, type='created', user_id=0, account=account_1),
+               AccountChange(sequence=2, type='deleted', user_id=0)]
+        yield []
+        raise AccountChangesExpiredError('expired')
+
+    events = [event async for event in account_change_events(changes())]
+
+    assert events[0] == (b'id: 1\nevent: created\ndata: ' + AccountChange(sequence=1, type='created', user_id=0,
+                                                                         account=account_1).model_dump_json().encode()
+                         + b'\n\nid: 2\nevent: deleted\ndata: {"sequence":2,"type":"deleted","user_id":0,'
+                           b'"account":null}\n\n')
+    assert events[1:] == [b': keep-alive\n\n', b'event: expired\ndata: expired\n\n']
@@ -1,11 +1,14 @@
+import asyncio
 from typing import List
 
 from pydantic import  TypeAdapter
 from starlette.testclient import TestClient
 
+from application.services.account_service import AccountService
 from domain.aggregates.account import Account
 from domain.types.personal_age import PersonalAge
 from domain.types.personal_name import PersonalName
+from domain.types.user_id import UserId
 from domain.value_objects.personal_information import PersonalInformation
 
 
@@ -62,6 +65,37 @@ def test_patch(test_client: TestClient, account_1: Account):
     assert test_client.patch('/api/account/-1', json=account_1.model_dump()).status_code == 404
 
 
+def test_get_etag(test_client: TestClient, account_1: Account):
+    response = test_client.get('/api/account/0')
+    etag = response.headers['ETag']
+
+    not_modified = test_client.get('/api/account/0', headers={'If-None-Match': f'"other", W/{etag}'})
+    modified = test_client.get('/api/account/0', headers={'If-None-Match': '"other"'})
+
+    assert etag == f'"{Account.model_validate_json(response.content).version}"'
+    assert not_modified.status_code == 304
+    assert not_modified.content == b''
+    assert not_modified.headers['ETag'] == etag
+    assert modified.status_code == 200
+
+
+def test_patch_if_match(test_client: TestClient, account_1: Account):
+    response = test_client.get('/api/account/0')
+    etag, version = response.headers['ETag'], Account.model_validate_json(response.content).version
+    account_1.user.personal_information = PersonalInformation(name=PersonalName("patched"), age=PersonalAge(1))
+
+    patch = test_client.patch('/api/account/0', json=account_1.model_dump(), headers={'If-Match': etag})
+    stale = test_client.patch('/api/account/0', json=account_1.model_dump(), headers={'If-Match': etag})
+    invalid = test_client.patch('/api/account/0', json=account_1.model_dump(), headers={'If-Match': 'W/"1"'})
+    unconditional = test_client.patch('/api/account/0', json=account_1.model_dump(), headers={'If-Match': '*'})
+
+    assert patch.status_code == 200
+    assert patch.headers['ETag'] == f'"{version + 1}"'
+    assert stale.status_code == 412
+    assert invalid.status_code == 412
+    assert unconditional.headers['ETag'] == test_client.get('/api/account/0').headers['ETag']
+
+
 def test_delete(test_client: TestClient):
     validator = TypeAdapter(List[Account])
     accounts_pre = validator.validate_python(test_client.get('/api/account/?page=0&size=9999').json())
@@ -77,3 +111,161 @@ def test_delete_404(test_client: TestClient):
 
 
 
+def test_list_cursor(test_client: TestClient):
+    validator = TypeAdapter(List[Account])
+    ids = []
+    response = test_client.get('/api/account/?size=3')
+    while True:
+        ids.extend(account.user.id for account in validator.validate_python(response.json()))
+        if 'X-Next-Cursor' not in response.headers:
+            break
+        response = test_client.get(f'/api/account/?size=3&cursor={response.headers["X-Next-Cursor"]}')
+
+    assert ids == [0, 1, 2, 3]
+
+
+def test_list_cursor_400(test_client: TestClient):
+    assert test_client.get('/api/account/?cursor=invalid').status_code == 400
+    assert test_client.get('/api/account/?page=1&cursor=eyJhZnRlcl9pZCI6MH0').status_code == 400
+
+
+def test_list_sorted_cursor(test_client: TestClient):
+    validator = TypeAdapter(List[Account])
+    accounts = []
+    url = '/api/account/?size=1&sort=name&min_age=0'
+    response = test_client.get(url)
+    while True:
+        accounts.extend(validator.validate_python(response.json()))
+        if 'X-Next-Cursor' not in response.headers:
+            break
+        response = test_client.get(f'{url}&cursor={response.headers["X-Next-Cursor"]}')
+
+    keys = [(account.user.personal_information.name, account.user.id) for account in accounts]
+    assert len(keys) == 4
+    assert keys == sorted(keys)
+
+
+def test_list_query_400(test_client: TestClient):
+    cursor = test_client.get('/api/account/?size=1').headers['X-Next-Cursor']
+
+    assert test_client.get(f'/api/account/?size=1&sort=age&cursor={cursor}').status_code == 400
+    assert test_client.get('/api/account/?sort=age&cursor=eyJhZnRlcl9pZCI6MSwic29ydCI6ImFnZSJ9').status_code == 400
+    assert test_client.get('/api/account/?min_age=5&max_age=4').status_code == 400
+    assert test_client.get('/api/account/?sort=email').status_code == 400
+
+
+def test_list_envelope(test_client: TestClient):
+    first = test_client.get('/api/account/?size=3&envelope=true').json()
+    last = test_client.get(f'/api/account/?size=3&envelope=true&cursor={first["next"]}').json()
+    filtered = test_client.get('/api/account/?min_age=1&envelope=true').json()
+
+    assert [account['user']['id'] for account in first['items'] + last['items']] == [0, 1, 2, 3]
+    assert (first['total'], last['total'], last['next']) == (4, 4, None)
+    assert filtered == {'items': [], 'total': 0, 'next': None}
+
+
+def test_list_fields(test_client: TestClient):
+    accounts = test_client.get('/api/account/?size=2&sort=age&fields=id,name').json()
+    page = test_client.get('/api/account/?size=1&envelope=true&fields=version').json()
+
+    assert accounts == [{'user': {'id': 0, 'personal_information': {'name': 'Alex'}}},
+                        {'user': {'id': 1, 'personal_information': {'name': 'Alex2'}}}]
+    assert page == {'items': [{'version': 1}], 'total': 4, 'next': page['next']}
+    assert test_client.get('/api/account/?fields=id,email').status_code == 400
+    assert test_client.get('/api/account/?fields=').status_code == 400
+
+
+def test_get_fields(test_client: TestClient):
+    response = test_client.get('/api/account/1?fields=age, version')
+
+    assert response.json() == {'user': {'personal_information': {'age': 0}}, 'version': 1}
+    assert response.headers['ETag'] == '"1"'
+    assert test_client.get('/api/account/1?fields=email').status_code == 400
+
+
+async def test_changes(test_client: TestClient, account_service_mock: AccountService):
+    sent = []
+    disconnected = asyncio.Event()
+
+    async def receive() -> dict:
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message: dict):
+        sent.append(message)
+        if message.get('body'):
+            disconnected.set()
+
+    await account_service_mock.delete_account(UserId(3))
+    await asyncio.wait_for(test_client.app({
+        'type': 'http', 'http_version': '1.1', 'method': 'GET', 'scheme': 'http', 'path': '/api/account/changes',
+        'root_path': '', 'query_string': b'', 'headers': [(b'last-event-id', b'0')], 'server': ('test', 80),
+    }, receive, send), 1)
+
+    assert (sent[0]['status'], dict(sent[0]['headers'])[b'content-type']) == (200, b'text/event-stream; charset=utf-8')
+    assert sent[1]['body'].startswith(b'id: 1\nevent: deleted\ndata: {"sequence":1,')
+
+
+def test_changes_errors(test_client: TestClient):
+    assert test_client.get('/api/account/changes?since=99').status_code == 410
+    assert test_client.get('/api/account/changes', headers={'Last-Event-ID': 'last'}).status_code == 400
+
+
+def test_import(test_client: TestClient):
+    response = test_client.post('/api/account/import', content=b'name,age\nAnn,30\nBob,-1\n',
+                                headers={'Content-Type': 'text/csv; charset=utf-8'})
+    summary = response.json()
+
+    assert (summary['created'], summary['failed'], summary['errors'][0]['line']) == (1, 1, 3)
+    assert test_client.get('/api/account/4').json()['user']['personal_information'] == {'age': 30, 'name': 'Ann'}
+    assert test_client.post('/api/account/import', content=b'name\nAnn\n',
+                            headers={'Content-Type': 'text/csv'}).status_code == 400
+    assert test_client.post('/api/account/import', content=b'{}',
+                            headers={'Content-Type': 'text/plain'}).status_code == 415
+
+
+def test_search(test_client: TestClient):
+    validator = TypeAdapter(List[Account])
+    accounts = validator.validate_python(test_client.get('/api/account/search?q=alec&limit=2').json())
+
+    assert [account.user.personal_information.name for account in accounts] == ['Alex', 'Alex']
+    assert test_client.get('/api/account/search?q=alex&limit=0').status_code == 400
+    assert test_client.get('/api/account/search').status_code == 422
+
+
+def test_batch(test_client: TestClient, account_1: Account, account_2: Account):
+    data = [account_1.model_dump(), account_2.model_dump()]
+    created = test_client.post('/api/account/batch', json=data).json()
+    assert [item['account']['user']['id'] for item in created] == [4, 5]
+
+    data[0]['user']['id'] = 5
+    data[1]['user']['id'] = 99
+    data[0]['user']['personal_information']['name'] = 'patched'
+    patched = test_client.patch('/api/account/batch', json=data).json()
+    assert [item['status_code'] for item in patched] == [200, 404]
+    assert Account.model_validate(test_client.get('/api/account/5').json()).user.personal_information.name == 'patched'
+
+    deleted = test_client.request('DELETE', '/api/account/batch', json=[4, 99]).json()
+    assert [item['status_code'] for item in deleted] == [200, 404]
+    assert test_client.get('/api/account/4').status_code == 404
+
+
+def test_batch_patch_without_id(test_client: TestClient, account_1: Account):
+    data = account_1.model_dump()
+    data['user']['id'] = None
+
+    assert test_client.patch('/api/account/batch', json=[data]).json()[0]['status_code'] == 400
+
+
+def test_export(test_client: TestClient, account_1: Account, account_2: Account, account_3: Account):
+    response = test_client.get('/api/account/export?chunk_size=3')
+    accounts = [Account.model_validate_json(line) for line in response.text.splitlines()]
+
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert [account.user.id for account in accounts] == [0, 1, 2, 3]
+    for api, mock in zip(accounts, [account_1, account_2, account_3, account_1]):
+        assert api.user.personal_information == mock.user.personal_information
+
+
+def test_export_400(test_client: TestClient):
+    assert test_client.get('/api/account/export?chunk_size=0').status_code == 400
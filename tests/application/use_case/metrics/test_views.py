@@ -0,0 +1,13 @@
+"""Module related with metrics views tests"""
+from starlette.testclient import TestClient
+
+
+def test_metrics(test_client: TestClient):
+    """Test the metrics endpoint exposes the requests served and the account service calls."""
+    test_client.get('/api/account/0')
+    response = test_client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    assert 'http_requests_total{method="GET",route="/api/account/{user_id}",status="200"}' in response.text
+    assert 'account_service_duration_seconds_count{method="get_account"}' in response.text
@@ -1,8 +1,9 @@
 import pytest
 from starlette.testclient import TestClient
 
+from application.services.account_importer import AccountImporter
 from application.services.account_service import AccountService
-from application.use_case.accounts.views import account_service_callable
+from application.use_case.accounts.views import account_importer_callable, account_service_callable
 from domain.aggregates.account import Account
 from domain.entities.user import User
 from domain.types.personal_age import PersonalAge
@@ -102,4 +103,5 @@ async def test_client(account_1: Account, account_2, account_3, account_service_
 
     client = TestClient(app)
     app.dependency_overrides[account_service_callable] = call
+    app.dependency_overrides[account_importer_callable] = lambda: AccountImporter(account_service_mock, workers=0)
     return client
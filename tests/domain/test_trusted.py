@@ -0,0 +1,61 @@
+"""Module related with trusted construction tests"""
+from typing import Iterator
+
+import pytest
+from pydantic import ValidationError
+
+from domain.aggregates.account import Account
+from domain.entities.user import User
+from domain.trusted import set_trusted_validation
+from domain.types.personal_age import PersonalAge
+from domain.types.personal_name import PersonalName
+from domain.types.user_id import UserId
+from domain.value_objects.personal_information import PersonalInformation
+
+
+@pytest.fixture
+def trusted_validation() -> Iterator[None]:
+    set_trusted_validation(True)
+    yield
+    set_trusted_validation(False)
+
+
+def _trusted_account(age: int, name: str) -> Account:
+    return Account.trusted(User.trusted(UserId(1), PersonalInformation.trusted(age, name)), 2)
+
+
+def test_trusted_construction(account_1: Account):
+    """Test trusted models equal, dump and copy like validated ones."""
+    personal_information = account_1.user.personal_information
+    validated = Account(user=User(id=UserId(1), personal_information=personal_information), version=2)
+    trusted = _trusted_account(personal_information.age, personal_information.name)
+    copy = trusted.model_copy(deep=True)
+    copy.user.id = UserId(3)
+
+    assert trusted == validated
+    assert trusted.model_dump_json() == validated.model_dump_json()
+    assert trusted.model_fields_set == validated.model_fields_set
+    assert trusted.user.id == 1
+    with pytest.raises(ValidationError):
+        trusted.user.personal_information.age = PersonalAge(3)
+
+
+def test_trusted_construction_skips_validation():
+    """Test trusted models are not validated by default."""
+    assert _trusted_account(-1, '').user.personal_information.name == PersonalName('')
+
+
+def test_trusted_construction_validation(trusted_validation: None):
+    """Test trusted models are validated once turned on."""
+    assert _trusted_account(30, 'Ann').user.personal_information.age == 30
+    with pytest.raises(ValidationError):
+        _trusted_account(-1, 'Ann')
+
+
+def test_partial_construction(trusted_validation: None):
+    """Test partial models are never validated, and serialize with the fields they hold."""
+    account = Account.trusted(User.trusted(UserId(1), PersonalInformation.partial(None, 'Ann')), 2)
+
+    assert account.user.personal_information.age is None
+    assert account.model_dump_json(include={'user': {'personal_information': {'name'}}}) == \
+        '{"user":{"personal_information":{"name":"Ann"}}}'
@@ -0,0 +1,30 @@
+"""Module related with account query tests."""
+import pytest
+from pydantic import ValidationError
+
+from domain.value_objects.account_query import AccountQuery
+
+
+def test_account_query_matches():
+    """Test age bounds are inclusive."""
+    query = AccountQuery(min_age=3, max_age=5)
+
+    assert query.filtered
+    assert [age for age in range(8) if query.matches(age)] == [3, 4, 5]
+    assert not AccountQuery(sort='name').filtered
+
+
+def test_account_query_includes():
+    """Test listings always include the id and the sort field, and every field without fields."""
+    query = AccountQuery(sort='age', fields={'name'})
+
+    assert [field for field in ('id', 'version', 'name', 'age') if query.includes(field)] == ['id', 'name', 'age']
+    assert all(AccountQuery().includes(field) for field in ('id', 'version', 'name', 'age'))
+
+
+@pytest.mark.parametrize('values', [{'min_age': 5, 'max_age': 4}, {'min_age': -1}, {'sort': 'email'},
+                                    {'fields': {'email'}}])
+def test_account_query_invalid(values: dict):
+    """Test invalid queries are rejected."""
+    with pytest.raises(ValidationError):
+        AccountQuery(**values)
@@ -5,6 +5,7 @@ from pydantic import ValidationError
 from domain.value_objects.pagination import Pagination
 from domain.types.pagination_page import PaginationPage
 from domain.types.pagination_size import PaginationSize
+from domain.types.user_id import UserId
 
 
 def test_pagination_correct_validation():
@@ -16,7 +17,8 @@ def test_pagination_correct_validation():
 
 
 def test_pagination_invalid_pagination_page():
-    """Test with invalid pagination page. Note this test should be removed when Annotations will be replaced by Classes.
+    """Test with invalid pagination page. Note this test should be removed when Annotations will be replaced by
+    Classes.
     """
 
     with pytest.raises(ValidationError):
@@ -24,8 +26,30 @@ def test_pagination_invalid_pagination_page():
 
 
 def test_pagination_invalid_pagination_size():
-    """Test with invalid pagination size. Note this test should be removed when Annotations will be replaced by Classes.
+    """Test with invalid pagination size. Note this test should be removed when Annotations will be replaced by
+    Classes.
     """
 
     with pytest.raises(ValidationError):
         Pagination(page=PaginationPage(0), size=PaginationSize(0))
+
+
+def test_pagination_after_id():
+    """Test keyset pagination."""
+    pagination = Pagination(size=PaginationSize(1), after_id=UserId(3))
+    assert pagination.page == 0
+    assert pagination.after_id == 3
+
+
+def test_pagination_after_id_with_page():
+    """Test keyset pagination can not be combined with a page."""
+
+    with pytest.raises(ValidationError):
+        Pagination(page=PaginationPage(1), size=PaginationSize(1), after_id=UserId(3))
+
+
+def test_pagination_after_value_without_after_id():
+    """Test keyset pagination on another sort needs the id of the last account too."""
+
+    with pytest.raises(ValidationError):
+        Pagination(size=PaginationSize(1), after_value=3)
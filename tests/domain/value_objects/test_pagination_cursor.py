@@ -0,0 +1,47 @@
+"""Module related with pagination cursor tests."""
+import json
+from base64 import urlsafe_b64encode
+
+import pytest
+
+from domain.aggregates.account import Account
+from domain.types.user_id import UserId
+from domain.value_objects.pagination_cursor import PaginationCursor
+
+
+def test_pagination_cursor_round_trip():
+    """Test a cursor decodes to the position it was encoded from."""
+    cursor = PaginationCursor(after_id=UserId(42))
+
+    assert PaginationCursor.decode(cursor.encode()) == cursor
+
+
+@pytest.mark.parametrize('cursor', ['', 'not a cursor', 'eyJhZnRlcl9pZCI6IC0xfQ'])
+def test_pagination_cursor_invalid(cursor: str):
+    """Test invalid cursors are rejected."""
+    with pytest.raises(ValueError):
+        PaginationCursor.decode(cursor)
+
+
+def test_pagination_cursor_after_account(account_1: Account):
+    """Test a cursor keeps the sorted field of the last account, except for the id sort."""
+    account_1.user.id = UserId(7)
+
+    assert PaginationCursor.after_account(account_1, 'id') == PaginationCursor(after_id=UserId(7))
+    cursor = PaginationCursor.decode(PaginationCursor.after_account(account_1, 'name').encode())
+    assert (cursor.after_id, cursor.sort, cursor.after_value) == (7, 'name', 'Alex')
+
+
+@pytest.mark.parametrize('fields', [
+    {'after_id': 1, 'sort': 'age'},
+    {'after_id': 1, 'sort': 'name'},
+    {'after_id': 1, 'sort': 'id', 'after_value': 5},
+    {'after_id': 1, 'sort': 'age', 'after_value': 'Alex'},
+    {'after_id': 1, 'sort': 'name', 'after_value': 5},
+])
+def test_pagination_cursor_after_value_mismatch(fields: dict):
+    """Test cursors whose after_value does not match their sort are rejected."""
+    cursor = urlsafe_b64encode(json.dumps(fields).encode()).decode()
+
+    with pytest.raises(ValueError):
+        PaginationCursor.decode(cursor)
@@ -0,0 +1,63 @@
+"""Module related with CompressionMiddleware tests."""
+import zlib
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from starlette.testclient import TestClient
+from starlette.types import Message, Receive, Scope, Send
+
+from infrastructure.compression.middleware import CompressionMiddleware
+
+
+def _test_client() -> TestClient:
+    app = FastAPI()
+
+    @app.get('/text')
+    async def _text(size: int):
+        return PlainTextResponse('a' * size)
+
+    @app.get('/encoded')
+    async def _encoded():
+        return PlainTextResponse('a' * 100, headers={'Content-Encoding': 'identity'})
+
+    app.add_middleware(CompressionMiddleware, minimum_size=50)
+    return TestClient(app)
+
+
+def test_compression_middleware():
+    """Test bodies of at least minimum_size bytes are compressed with gzip when accepted, others sent as they are."""
+    test_client = _test_client()
+
+    large = test_client.get('/text?size=50', headers={'Accept-Encoding': 'gzip'})
+    small = test_client.get('/text?size=49', headers={'Accept-Encoding': 'gzip'})
+    refused = test_client.get('/text?size=50', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+    encoded = test_client.get('/encoded', headers={'Accept-Encoding': 'gzip'})
+
+    assert (large.headers['Content-Encoding'], large.headers['Vary']) == ('gzip', 'Accept-Encoding')
+    assert large.text == 'a' * 50
+    assert int(large.headers['Content-Length']) < 50
+    assert 'Content-Encoding' not in small.headers and small.text == 'a' * 49
+    assert 'Content-Encoding' not in refused.headers
+    assert encoded.headers['Content-Encoding'] == 'identity'
+
+
+async def test_compression_middleware_stream():
+    """Test streamed bodies are compressed message by message, each one being decodable once received."""
+    sent: List[Message] = []
+
+    async def app(scope: Scope, receive: Receive, send: Send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [(b'content-length', b'13')]})
+        await send({'type': 'http.response.body', 'body': b'first\n', 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b'second\n'})
+
+    async def send(message: Message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'headers': [(b'accept-encoding', b'deflate, gzip')]}
+    await CompressionMiddleware(app, minimum_size=50)(scope, None, send)
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    assert sent[0]['headers'] == [(b'content-encoding', b'gzip'), (b'vary', b'Accept-Encoding')]
+    assert decompressor.decompress(sent[1]['body']) == b'first\n'
+    assert (decompressor.decompress(sent[2]['body']), decompressor.eof) == (b'second\n', True)
@@ -0,0 +1,36 @@
+"""Module related with FenwickTree tests."""
+from infrastructure.data_structures.fenwick_tree import FenwickTree
+
+
+def test_fenwick_tree_prefix_sum():
+    """Prefix sums follow the appended and updated counters."""
+    values = [3, 0, 1, 4, 1, 5, 9, 2, 6]
+    tree = FenwickTree()
+    for value in values:
+        tree.append(value)
+    tree.add(4, 2)
+    values[4] += 2
+
+    assert len(tree) == len(values)
+    for end in range(len(values) + 1):
+        assert tree.prefix_sum(end) == sum(values[:end])
+
+
+def test_fenwick_tree_find():
+    """Find returns the position holding the rank-th unit."""
+    tree = FenwickTree()
+    for value in [1, 0, 1, 1, 0, 1]:
+        tree.append(value)
+
+    assert [tree.find(rank) for rank in range(4)] == [0, 2, 3, 5]
+    assert tree.find(4) == 6
+
+
+def test_fenwick_tree_build():
+    """A built tree matches one made by appending the same values."""
+    values = [3, 0, 1, 4, 1, 5, 9, 2, 6, 5, 3]
+    appended = FenwickTree()
+    for value in values:
+        appended.append(value)
+
+    assert FenwickTree.build(values)._tree == appended._tree
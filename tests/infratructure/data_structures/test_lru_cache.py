@@ -0,0 +1,30 @@
+"""Module related with LRUCache tests."""
+from infrastructure.data_structures.lru_cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """The least recently read value is evicted first."""
+    cache = LRUCache(max_size=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert (cache.statistics.hits, cache.statistics.misses, cache.statistics.evictions) == (3, 1, 1)
+
+
+def test_lru_cache_ttl():
+    """Values expire once their time to live has passed."""
+    now = [0.0]
+    cache = LRUCache(max_size=2, ttl=10, clock=lambda: now[0])
+    cache.set('a', 1)
+
+    now[0] = 9.9
+    assert cache.get('a') == 1
+    now[0] = 10
+    assert cache.get('a') is None
+    assert len(cache) == 0
+    assert cache.statistics.evictions == 1
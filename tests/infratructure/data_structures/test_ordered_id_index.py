@@ -0,0 +1,73 @@
+"""Module related with OrderedIdIndex tests."""
+from infrastructure.data_structures.ordered_id_index import OrderedIdIndex
+
+
+def test_ordered_id_index_slice():
+    """Slices follow insertion order and skip removed ids."""
+    index = OrderedIdIndex()
+    for user_id in range(10):
+        index.append(user_id)
+    index.remove(0)
+    index.remove(4)
+
+    assert len(index) == 8
+    assert 4 not in index
+    assert index.slice(0, 3) == [1, 2, 3]
+    assert index.slice(3, 3) == [5, 6, 7]
+    assert index.slice(6, 3) == [8, 9]
+    assert index.slice(8, 3) == []
+
+
+def test_ordered_id_index_compaction():
+    """Order is preserved once tombstones are compacted away."""
+    index = OrderedIdIndex()
+    for user_id in range(5000):
+        index.append(user_id)
+    for user_id in range(0, 5000, 3):
+        index.remove(user_id)
+    for user_id in range(1, 5000, 3):
+        index.remove(user_id)
+
+    expected = list(range(2, 5000, 3))
+    assert len(index) == len(expected)
+    assert index.slice(0, len(expected)) == expected
+    assert index.slice(100, 2) == expected[100:102]
+
+
+def test_ordered_id_index_iter_after():
+    """Iteration yields the live ids after an id, or all of them."""
+    index = OrderedIdIndex()
+    for user_id in range(6):
+        index.append(user_id)
+    index.remove(3)
+
+    assert list(index.iter_after()) == [0, 1, 2, 4, 5]
+    assert list(index.iter_after(2)) == [4, 5]
+    assert list(index.iter_after(5)) == []
+
+
+def test_ordered_id_index_build():
+    """An index built from increasing ids slices and accepts updates like one built id by id."""
+    index = OrderedIdIndex.build([1, 3, 5, 7])
+    index.append(9)
+    index.remove(3)
+
+    assert len(index) == 4
+    assert index.slice(1, 2) == [5, 7]
+    assert index.after(5, 10) == [7, 9]
+
+
+def test_ordered_id_index_restore():
+    """Removed ids are put back at their place in id order, whether their tombstone was compacted away or not."""
+    index = OrderedIdIndex()
+    for user_id in range(3000):
+        index.append(user_id)
+    index.remove(5)
+    index.restore(5)
+    for user_id in range(0, 2000):
+        index.remove(user_id)
+    index.restore(10)
+
+    assert index.slice(0, 3) == [10, 2000, 2001]
+    assert index.after(5, 2) == [10, 2000]
+    assert len(index) == 1001
@@ -0,0 +1,28 @@
+"""Module related with RingBuffer tests."""
+import pytest
+
+from infrastructure.data_structures.ring_buffer import RingBuffer
+
+
+def test_ring_buffer_after():
+    """Items are read after a sequence number, up to a limit, the oldest ones being overwritten once full."""
+    ring_buffer = RingBuffer(3)
+    empty = ring_buffer.after(0, 10)
+    sequences = [ring_buffer.append(item) for item in 'abcde']
+
+    assert (empty, sequences) == ([], [1, 2, 3, 4, 5])
+    assert (ring_buffer.first_sequence, ring_buffer.last_sequence) == (3, 5)
+    assert ring_buffer.after(2, 10) == ['c', 'd', 'e']
+    assert ring_buffer.after(3, 1) == ['d']
+    assert ring_buffer.after(5, 10) == []
+
+
+@pytest.mark.parametrize('sequence', [0, 1, 6])
+def test_ring_buffer_after_not_kept(sequence: int):
+    """Reading after overwritten items, or after items not appended yet, fails."""
+    ring_buffer = RingBuffer(3)
+    for item in 'abcde':
+        ring_buffer.append(item)
+
+    with pytest.raises(IndexError):
+        ring_buffer.after(sequence, 10)
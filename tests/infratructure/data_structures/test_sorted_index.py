@@ -0,0 +1,46 @@
+"""Module related with SortedIndex tests."""
+import random
+from bisect import bisect_left, bisect_right
+
+from infrastructure.data_structures.sorted_index import SortedIndex
+
+
+def test_sorted_index_matches_sorted_list(monkeypatch):
+    """Searches and iterations match a sorted list through bucket splits and removals."""
+    monkeypatch.setattr(SortedIndex, '_LOAD', 4)
+    generator = random.Random(0)
+    index = SortedIndex()
+    keys = []
+    for step in range(3000):
+        if keys and generator.random() < 0.4:
+            key = keys.pop(generator.randrange(len(keys)))
+            index.remove(key)
+        else:
+            key = (generator.randrange(50), step)
+            keys.append(key)
+            index.add(key)
+        keys.sort()
+        probe = (generator.randrange(52), generator.randrange(3000))
+        position = generator.randrange(len(keys) + 2)
+
+        assert len(index) == len(keys)
+        assert index.bisect_left(probe) == bisect_left(keys, probe)
+        assert index.bisect_right(probe) == bisect_right(keys, probe)
+        assert index.bisect_left(probe[:1]) == bisect_left(keys, probe[:1])
+        assert list(index.iter_from(position)) == keys[position:]
+
+
+def test_sorted_index_build(monkeypatch):
+    """An index built from sorted keys searches and accepts updates like one built key by key."""
+    monkeypatch.setattr(SortedIndex, '_LOAD', 4)
+    keys = sorted((age, user_id) for user_id, age in enumerate([3, 1, 2] * 10))
+    index = SortedIndex.build(list(keys))
+    index.add((2, 100))
+    index.remove(keys[0])
+    expected = sorted(keys[1:] + [(2, 100)])
+
+    assert len(index) == len(expected)
+    assert list(index.iter_from(0)) == expected
+    assert [index[position] for position in range(len(expected))] == expected
+    assert index.bisect_left((3,)) == expected.index((3, 0))
+    assert list(SortedIndex.build([]).iter_from(0)) == []
@@ -0,0 +1,36 @@
+"""Module related with TrigramIndex tests."""
+import random
+import string
+
+from infrastructure.data_structures.trigram_index import TrigramIndex, similarity, trigrams
+
+
+def test_trigrams():
+    """Words are lower cased and padded, so their starts weigh more than their ends."""
+    assert trigrams('Ab cD') == {'  a', ' ab', 'ab ', '  c', ' cd', 'cd '}
+    assert trigrams('   ') == frozenset()
+    assert similarity(trigrams('alex'), trigrams('alex')) == 1
+    assert similarity(trigrams('alex'), trigrams('')) == 0
+
+
+def test_trigram_index_matches_linear_scan():
+    """Searches return the same ranking as scoring every text, through updates and removals."""
+    generator = random.Random(0)
+    texts = {user_id: ''.join(generator.choices('abcde', k=generator.randint(2, 6))) for user_id in range(500)}
+    index = TrigramIndex()
+    for user_id, text in texts.items():
+        index.add(user_id, text)
+    for user_id in generator.sample(range(500), 100):
+        index.remove(user_id, texts.pop(user_id))
+    for user_id in generator.sample(sorted(texts), 100):
+        index.remove(user_id, texts[user_id])
+        texts[user_id] = ''.join(generator.choices(string.ascii_lowercase, k=4))
+        index.add(user_id, texts[user_id])
+
+    for query in ('abc', 'eeaa', 'b', 'xyz', 'ab cd', 'zzzz'):
+        for limit in (1, 5, 50):
+            scores = [(similarity(trigrams(query), trigrams(text)), user_id) for user_id, text in texts.items()]
+            expected = sorted((match for match in scores if match[0] >= 0.3), key=lambda match: (-match[0], match[1]))
+
+            assert index.search(query, limit) == expected[:limit]
+    assert len(index) == 400
@@ -0,0 +1,30 @@
+"""Module related with MetricsMiddleware tests."""
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from infrastructure.metrics.middleware import UNMATCHED_ROUTE, MetricsMiddleware
+from infrastructure.metrics.registry import MetricsRegistry
+
+
+def test_metrics_middleware():
+    """Requests are recorded under the path template of their route, with their status and body sizes."""
+    registry = MetricsRegistry()
+    app = FastAPI()
+
+    @app.post('/items/{item_id}')
+    async def _post_item(item_id: int):
+        return 'created'
+
+    app.add_middleware(MetricsMiddleware, registry=registry)
+    test_client = TestClient(app)
+    test_client.post('/items/1', content=b'12345')
+    test_client.post('/items/2')
+    test_client.get('/unknown')
+
+    metrics = registry.render().splitlines()
+    assert 'http_requests_total{method="POST",route="/items/{item_id}",status="200"} 2' in metrics
+    assert f'http_requests_total{{method="GET",route="{UNMATCHED_ROUTE}",status="404"}} 1' in metrics
+    assert 'http_request_duration_seconds_count{method="POST",route="/items/{item_id}"} 2' in metrics
+    assert 'http_request_size_bytes_sum{method="POST",route="/items/{item_id}"} 5.0' in metrics
+    assert 'http_response_size_bytes_sum{method="POST",route="/items/{item_id}"} 18.0' in metrics
+    assert 'http_requests_in_progress 0' in metrics
@@ -0,0 +1,98 @@
+"""Module related with MetricsRegistry tests."""
+import re
+
+import pytest
+
+from infrastructure.metrics.registry import MetricsRegistry, NullMetricsRegistry
+
+
+def test_counter_and_gauge_render():
+    """Counters and gauges are rendered with their labels in the Prometheus text format."""
+    registry = MetricsRegistry()
+    requests = registry.counter('requests', 'Requests.', ('route',))
+    in_progress = registry.gauge('in_progress', 'In progress.')
+    requests.labels('/a"b').inc()
+    requests.labels('/a"b').inc(2)
+    in_progress.labels().inc()
+
+    assert registry.render() == (
+        '# HELP requests_total Requests.\n'
+        '# TYPE requests_total counter\n'
+        'requests_total{route="/a\\"b"} 3\n'
+        '# HELP in_progress In progress.\n'
+        '# TYPE in_progress gauge\n'
+        'in_progress 1\n'
+    )
+
+
+def test_histogram_render():
+    """Histogram buckets are cumulative and end with +Inf."""
+    registry = MetricsRegistry()
+    duration = registry.histogram('duration', 'Duration.', ('method',), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 2):
+        duration.labels('get').observe(value)
+
+    assert registry.render().splitlines()[2:] == [
+        'duration_bucket{method="get",le="0.1"} 2',
+        'duration_bucket{method="get",le="1.0"} 3',
+        'duration_bucket{method="get",le="+Inf"} 4',
+        'duration_sum{method="get"} 2.65',
+        'duration_count{method="get"} 4',
+    ]
+
+
+def test_render_families():
+    """Every sample belongs to a family given HELP and TYPE before it, as Prometheus parses the exposition."""
+    registry = MetricsRegistry()
+    registry.counter('requests', 'Requests.', ('route',)).labels('/').inc()
+    registry.gauge('in_progress', 'In progress.').labels().inc()
+    registry.histogram('duration', 'Duration.', buckets=(0.1,)).labels().observe(0.05)
+
+    helps, types, samples = set(), {}, 0
+    for line in registry.render().splitlines():
+        if line.startswith('# HELP '):
+            helps.add(line.split(' ')[2])
+        elif line.startswith('# TYPE '):
+            _, _, name, metric_type = line.split(' ')
+            types[name] = metric_type
+        else:
+            name = re.match(r'[a-zA-Z_:][a-zA-Z0-9_:]*', line).group()
+            family = re.sub(r'_(bucket|sum|count)$', '', name) if name not in types else name
+            assert family in types and family in helps, line
+            samples += 1
+
+    assert types == {'requests_total': 'counter', 'in_progress': 'gauge', 'duration': 'histogram'}
+    assert samples == 6
+
+
+def test_histogram_time():
+    """The timer observes its block once."""
+    histogram = MetricsRegistry().histogram('duration', 'Duration.').labels()
+    with histogram.time():
+        pass
+
+    assert histogram.count == 1
+    assert histogram.sum >= 0
+
+
+def test_register_twice():
+    """Registering a name again returns the same metric, unless its type or labels differ."""
+    registry = MetricsRegistry()
+    counter = registry.counter('requests', 'Requests.', ('route',))
+
+    assert registry.counter('requests', 'Requests.', ('route',)) is counter
+    with pytest.raises(ValueError):
+        registry.gauge('requests', 'Requests.', ('route',))
+    with pytest.raises(ValueError):
+        counter.labels('a', 'b')
+
+
+def test_null_registry():
+    """Metrics of a null registry accept updates and timers, but record and render nothing."""
+    registry = NullMetricsRegistry()
+    registry.counter('requests', 'Requests.', ('route',)).labels('/').inc()
+    registry.gauge('in_progress', 'In progress.').labels().dec()
+    with registry.histogram('duration', 'Duration.').labels().time():
+        pass
+
+    assert registry.render() == '\n'
@@ -0,0 +1,64 @@
+"""Module related with BlockLeasingUserIdAllocator tests"""
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from infrastructure.repositories.account.id_allocators.block_leasing import BlockLeasingUserIdAllocator
+from infrastructure.repositories.account.id_allocators.id_block_leases import FileIdBlockLeases, \
+    IdBlockLeasesInterface, SQLiteIdBlockLeases
+
+LeasesFactory = Callable[[int], IdBlockLeasesInterface]
+
+
+@pytest.fixture(params=['file', 'sqlite'])
+def leases_factory(request: pytest.FixtureRequest, tmp_path: Path) -> LeasesFactory:
+    """Every store, opened on the same path for a sequence."""
+    leases_class = FileIdBlockLeases if request.param == 'file' else SQLiteIdBlockLeases
+    return lambda sequence: leases_class(str(tmp_path / 'account_ids'), sequence)
+
+
+def test_block_leasing_allocator(leases_factory: LeasesFactory):
+    """Test allocators sharing a store allocate distinct ids, in increasing order, across blocks."""
+    first = BlockLeasingUserIdAllocator(leases_factory(0), block_size=3)
+    second = BlockLeasingUserIdAllocator(leases_factory(0), block_size=3)
+    ids = [first.allocate(), second.allocate(), *first.allocate_many(4), *second.allocate_many(2), first.allocate()]
+    first.close()
+    second.close()
+
+    assert ids == [0, 3, 1, 2, 6, 7, 4, 5, 8]
+
+
+def test_block_leasing_allocator_restart(leases_factory: LeasesFactory):
+    """Test an allocator reopened on the store skips the rest of the blocks leased before."""
+    allocator = BlockLeasingUserIdAllocator(leases_factory(0), block_size=10)
+    allocator.allocate()
+    allocator.close()
+    allocator = BlockLeasingUserIdAllocator(leases_factory(0), block_size=10)
+
+    assert list(allocator.allocate_many(2)) == [10, 11]
+    allocator.close()
+
+
+def test_block_leasing_allocator_sequences(leases_factory: LeasesFactory):
+    """Test allocators of distinct residues lease from their own sequence of the store, so ids stay dense."""
+    allocators = [BlockLeasingUserIdAllocator(leases_factory(shard), 2, shard, 3) for shard in range(3)]
+    ids = [[allocator.allocate() for _ in range(3)] for allocator in allocators]
+    for allocator in allocators:
+        allocator.close()
+
+    assert ids == [[0, 3, 6], [1, 4, 7], [2, 5, 8]]
+
+
+def test_block_leasing_allocator_advance(leases_factory: LeasesFactory):
+    """Test advancing within the block skips ids, and past it leases the next block after next_id."""
+    allocator = BlockLeasingUserIdAllocator(leases_factory(0), block_size=10)
+    allocator.advance(4)
+    within = allocator.allocate()
+    allocator.advance(25)
+    past = allocator.allocate()
+    allocator.close()
+    other = BlockLeasingUserIdAllocator(leases_factory(0), block_size=10)
+
+    assert (within, past, other.allocate()) == (4, 25, 35)
+    other.close()
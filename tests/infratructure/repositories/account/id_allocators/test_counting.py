@@ -0,0 +1,19 @@
+"""Module related with CountingUserIdAllocator tests"""
+from infrastructure.repositories.account.id_allocators.counting import CountingUserIdAllocator
+
+
+def test_counting_allocator():
+    """Test ids are counted from first_id in steps, one by one or many at once."""
+    allocator = CountingUserIdAllocator(1, 3)
+
+    assert [allocator.allocate(), *allocator.allocate_many(3), allocator.allocate()] == [1, 4, 7, 10, 13]
+
+
+def test_counting_allocator_advance():
+    """Test advancing skips to the next id of the residue at or past next_id, and never goes back."""
+    allocator = CountingUserIdAllocator(1, 3)
+    allocator.advance(8)
+    first = allocator.allocate()
+    allocator.advance(2)
+
+    assert (first, allocator.allocate()) == (10, 13)
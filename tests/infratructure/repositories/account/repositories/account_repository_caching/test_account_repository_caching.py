@@ -0,0 +1,117 @@
+"""Module related with CachingAccountRepository tests"""
+import asyncio
+from typing import List, Optional
+
+import pytest
+
+from domain.aggregates.account import Account
+from domain.types.pagination_size import PaginationSize
+from domain.types.personal_name import PersonalName
+from domain.types.user_id import UserId
+from domain.value_objects.account_query import AccountQuery
+from domain.value_objects.pagination import Pagination
+from infrastructure.repositories.account.exceptions.account_not_found_error import AccountNotFoundError
+from infrastructure.repositories.account.repositories.account_repository_caching.repository import \
+    CachingAccountRepository
+from infrastructure.repositories.account.repositories.account_repository_in_memory.repository import \
+    AccountRepositoryInMemory
+
+
+class _SlowAccountRepository(AccountRepositoryInMemory):
+    """In memory repository that counts its reads and takes a while to answer them."""
+
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    async def get_account(self, user_id: UserId) -> Account:
+        self.reads += 1
+        await asyncio.sleep(0.01)
+        return await super().get_account(user_id)
+
+    async def get_accounts(self, pagination: Pagination, query: AccountQuery = AccountQuery()):
+        self.reads += 1
+        return await super().get_accounts(pagination, query)
+
+    async def get_accounts_by_ids(self, user_ids: List[UserId]) -> List[Optional[Account]]:
+        self.reads += 1
+        return await super().get_accounts_by_ids(user_ids)
+
+
+@pytest.fixture
+async def backend(account_1: Account, account_2: Account) -> _SlowAccountRepository:
+    repo = _SlowAccountRepository()
+    await repo.create_accounts([account_1, account_2])
+    return repo
+
+
+async def test_account_repository_caching_hit(backend: _SlowAccountRepository):
+    """Test repeated reads are served from the cache with copies."""
+    repo = CachingAccountRepository(backend, max_size=10)
+    first = await repo.get_account(UserId(0))
+    first.user.id = UserId(42)
+    second = await repo.get_account(UserId(0))
+
+    assert second.user.id == 0
+    assert backend.reads == 1
+    assert (repo.statistics.hits, repo.statistics.misses) == (1, 1)
+
+
+async def test_account_repository_caching_single_fetch(backend: _SlowAccountRepository):
+    """Test concurrent misses on the same account share a single fetch."""
+    repo = CachingAccountRepository(backend, max_size=10)
+    accounts = await asyncio.gather(*(repo.get_account(UserId(1)) for _ in range(10)))
+
+    assert backend.reads == 1
+    assert all(account == accounts[0] for account in accounts)
+
+
+async def test_account_repository_caching_get_accounts_by_ids(backend: _SlowAccountRepository):
+    """Test multi-gets only read the accounts missing from the cache, and cache them."""
+    repo = CachingAccountRepository(backend, max_size=10)
+    await repo.get_account(UserId(0))
+    first = await repo.get_accounts_by_ids([UserId(0), UserId(1), UserId(9)])
+    first[1].user.id = UserId(42)
+    second = await repo.get_accounts_by_ids([UserId(1), UserId(0)])
+
+    assert [account.user.id for account in second] == [1, 0]
+    assert first[2] is None
+    assert backend.reads == 2
+
+
+async def test_account_repository_caching_not_found(backend: _SlowAccountRepository):
+    """Test concurrent misses on a missing account all fail."""
+    repo = CachingAccountRepository(backend, max_size=10)
+    results = await asyncio.gather(*(repo.get_account(UserId(9)) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, AccountNotFoundError) for result in results)
+    assert backend.reads == 1
+
+
+async def test_account_repository_caching_invalidation(backend: _SlowAccountRepository, account_1: Account):
+    """Test patches are visible to the next read, even when they race with an ongoing fetch."""
+    repo = CachingAccountRepository(backend, max_size=10, cache_pages=True)
+    await repo.get_accounts(Pagination(size=PaginationSize(10)))
+    ongoing = asyncio.create_task(repo.get_account(UserId(0)))
+    await asyncio.sleep(0)
+
+    account_1.user.personal_information = account_1.user.personal_information.model_copy(
+        update={'name': PersonalName('patched')})
+    await repo.patch_account(account_1)
+    await ongoing
+
+    assert (await repo.get_account(UserId(0))).user.personal_information.name == 'patched'
+    page = await repo.get_accounts(Pagination(size=PaginationSize(10)))
+    assert page[0].user.personal_information.name == 'patched'
+    assert repo.page_statistics.misses == 2
+
+
+async def test_account_repository_caching_eviction(backend: _SlowAccountRepository):
+    """Test the cache never holds more accounts than its size."""
+    repo = CachingAccountRepository(backend, max_size=1)
+    await repo.get_account(UserId(0))
+    await repo.get_account(UserId(1))
+    await repo.get_account(UserId(0))
+
+    assert backend.reads == 3
+    assert repo.statistics.evictions == 2
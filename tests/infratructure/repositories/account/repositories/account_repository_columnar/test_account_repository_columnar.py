@@ -0,0 +1,47 @@
+"""Module related with AccountRepositoryColumnar tests"""
+from domain.aggregates.account import Account
+from domain.entities.user import User
+from domain.types.pagination_page import PaginationPage
+from domain.types.pagination_size import PaginationSize
+from domain.types.personal_age import PersonalAge
+from domain.types.personal_name import PersonalName
+from domain.types.user_id import UserId
+from domain.value_objects.pagination import Pagination
+from domain.value_objects.personal_information import PersonalInformation
+from infrastructure.repositories.account.repositories.account_repository_columnar.repository import \
+    AccountRepositoryColumnar
+
+
+def _account(name: str, age: int) -> Account:
+    return Account(user=User(id=None, personal_information=PersonalInformation(age=PersonalAge(age),
+                                                                              name=PersonalName(name))))
+
+
+async def test_account_repository_columnar_compaction():
+    """Test rows and names survive the compaction triggered by deletes and growing patches."""
+    repo = AccountRepositoryColumnar()
+    await repo.create_accounts([_account(f'name {index}', index) for index in range(3000)])
+    await repo.delete_accounts([UserId(index) for index in range(3000) if index % 3 != 2])
+    await repo.patch_accounts([Account(user=User(id=UserId(index), personal_information=PersonalInformation(
+        age=PersonalAge(1), name=PersonalName(f'a much longer name {index}')))) for index in range(2, 3000, 6)])
+
+    accounts = await repo.get_accounts(Pagination(size=PaginationSize(3), page=PaginationPage(1)))
+    patched = await repo.get_account(UserId(2996))
+    kept = await repo.get_account(UserId(2999))
+
+    assert len(repo._ids) == 1000
+    assert [account.user.id for account in accounts] == [11, 14, 17]
+    assert patched.user.personal_information == PersonalInformation(age=PersonalAge(1),
+                                                                     name=PersonalName('a much longer name 2996'))
+    assert kept.user.personal_information == PersonalInformation(age=PersonalAge(2999), name=PersonalName('name 2999'))
+
+
+async def test_account_repository_columnar_unicode():
+    """Test names are stored as UTF-8 and shrinking patches reuse their bytes."""
+    repo = AccountRepositoryColumnar()
+    account = await repo.create_account(_account('Zoë Ångström', 30))
+    account.user.personal_information = PersonalInformation(age=PersonalAge(31), name=PersonalName('Zoë'))
+    await repo.patch_account(account)
+
+    assert (await repo.get_account(UserId(0))).user.personal_information.name == 'Zoë'
+    assert len(repo._names) == len('Zoë Ångström'.encode())
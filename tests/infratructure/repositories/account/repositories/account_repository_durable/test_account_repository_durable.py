@@ -0,0 +1,203 @@
+"""Module related with DurableAccountRepository tests"""
+import asyncio
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from domain.aggregates.account import Account
+from domain.entities.user import User
+from domain.types.pagination_size import PaginationSize
+from domain.types.personal_age import PersonalAge
+from domain.types.personal_name import PersonalName
+from domain.types.user_id import UserId
+from domain.value_objects.pagination import Pagination
+from domain.value_objects.personal_information import PersonalInformation
+from infrastructure.repositories.account.repositories.account_repository_durable import snapshot, write_ahead_log
+from infrastructure.repositories.account.repositories.account_repository_durable.repository import \
+    DurableAccountRepository
+from infrastructure.repositories.account.repositories.account_repository_in_memory.repository import \
+    AccountRepositoryInMemory
+
+
+def _account(name: str, age: int, user_id: UserId = None) -> Account:
+    return Account(user=User(id=user_id, personal_information=PersonalInformation(age=PersonalAge(age),
+                                                                                 name=PersonalName(name))))
+
+
+def _open(directory: Path) -> DurableAccountRepository:
+    return DurableAccountRepository(AccountRepositoryInMemory(), str(directory), snapshot_interval=3600)
+
+
+async def _accounts(repo: DurableAccountRepository) -> List[Account]:
+    return await repo.get_accounts(Pagination(size=PaginationSize(1000)))
+
+
+async def test_account_repository_durable_replays_log(tmp_path: Path):
+    """Test writes acknowledged before a crash, without snapshot, are replayed on restart."""
+    repo = _open(tmp_path)
+    await repo.create_accounts([_account('Zoë', 30), _account('Bob', 40), _account('Eve', 50)])
+    await repo.patch_account(_account('Robert', 41, UserId(1)))
+    await repo.delete_account(UserId(2))
+    expected = await _accounts(repo)
+
+    restarted = _open(tmp_path)
+    created = await restarted.create_account(_account('Ann', 20))
+    accounts = await _accounts(restarted)
+    await restarted.close()
+    await repo.close()
+
+    assert accounts == expected + [created]
+    assert created.user.id == 3
+
+
+async def test_account_repository_durable_snapshot(tmp_path: Path):
+    """Test a snapshot replaces the log segments before it, and the log tail is replayed over it."""
+    repo = _open(tmp_path)
+    await repo.create_accounts([_account(f'name {index}', index) for index in range(10)])
+    await repo.snapshot()
+    await repo.delete_accounts([UserId(0), UserId(9)])
+    await repo.patch_accounts([_account('patched', 1, UserId(1))])
+    expected = await _accounts(repo)
+
+    restarted = _open(tmp_path)
+    accounts = await _accounts(restarted)
+    sequences = [sequence for sequence, _ in write_ahead_log.segments(tmp_path)]
+    created = await restarted.create_account(_account('next', 1))
+    await restarted.close()
+    await repo.close()
+
+    assert accounts == expected
+    assert sequences == [1, 2]
+    assert created.user.id == 10
+
+
+async def test_account_repository_durable_close(tmp_path: Path):
+    """Test closing writes a snapshot, so a restart has no log to replay."""
+    repo = _open(tmp_path)
+    await repo.create_accounts([_account(f'name {index}', index) for index in range(5)])
+    expected = await _accounts(repo)
+    await repo.close()
+
+    restarted = _open(tmp_path)
+    accounts = await _accounts(restarted)
+    await restarted.close()
+
+    assert accounts == expected
+    assert all(path.stat().st_size == 0 for _, path in write_ahead_log.segments(tmp_path))
+
+
+async def test_account_repository_durable_close_during_snapshot(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Test closing while a periodic snapshot is being written waits for it instead of writing another alongside."""
+    started = threading.Event()
+    writing = []
+    overlapped = []
+    write = snapshot.SnapshotWriter.write
+
+    def slow_write(*arguments):
+        overlapped.append(bool(writing))
+        writing.append(True)
+        started.set()
+        time.sleep(0.1)
+        write(*arguments)
+        writing.pop()
+
+    monkeypatch.setattr(snapshot.SnapshotWriter, 'write', slow_write)
+    repo = DurableAccountRepository(AccountRepositoryInMemory(), str(tmp_path), snapshot_interval=0.01)
+    await repo.create_accounts([_account('Ann', 20)])
+    await asyncio.get_running_loop().run_in_executor(None, started.wait)
+    await repo.create_account(_account('Bob', 40))
+    await repo.close()
+
+    restarted = _open(tmp_path)
+    accounts = await _accounts(restarted)
+    await restarted.close()
+
+    assert overlapped == [False, False]
+    assert [account.user.personal_information.name for account in accounts] == ['Ann', 'Bob']
+    assert [path.name for path in tmp_path.glob('snapshot*')] == ['snapshot']
+
+
+async def test_account_repository_durable_snapshot_during_writes(tmp_path: Path,
+                                                                 monkeypatch: pytest.MonkeyPatch):
+    """Test a snapshot taken while writes go on, restored with the log tail, gives back the latest state."""
+    monkeypatch.setattr(DurableAccountRepository, '_SNAPSHOT_CHUNK', 3)
+    repo = _open(tmp_path)
+    await repo.create_accounts([_account(f'name {index}', index) for index in range(30)])
+
+    async def write():
+        for index in range(30):
+            await repo.patch_accounts([_account(f'patched {index}', index, UserId(index))])
+            await repo.delete_accounts([UserId((index * 7) % 30)])
+            await repo.create_account(_account(f'created {index}', index))
+
+    await asyncio.gather(repo.snapshot(), write())
+    expected = await _accounts(repo)
+    restarted = _open(tmp_path)
+    accounts = await _accounts(restarted)
+    await restarted.close()
+    await repo.close()
+
+    assert accounts == expected
+
+
+async def test_account_repository_durable_group_commit(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Test concurrent writes share fsyncs."""
+    batches = []
+    write = write_ahead_log._write
+    monkeypatch.setattr(write_ahead_log, '_write', lambda *arguments: batches.append(write(*arguments)))
+    repo = _open(tmp_path)
+
+    await asyncio.gather(*(repo.create_account(_account(f'name {index}', index)) for index in range(50)))
+    await repo.close()
+
+    assert len(await _accounts(_open(tmp_path))) == 50
+    assert len(batches) < 50
+
+
+async def test_account_repository_durable_torn_log(tmp_path: Path):
+    """Test a record torn by a crash in the middle of a write is dropped."""
+    repo = _open(tmp_path)
+    await repo.create_accounts([_account('Ann', 20), _account('Bob', 40)])
+    (_, path), = write_ahead_log.segments(tmp_path)
+    path.write_bytes(path.read_bytes()[:-3])
+
+    restarted = _open(tmp_path)
+    accounts = await _accounts(restarted)
+    await restarted.close()
+    await repo.close()
+
+    assert [account.user.personal_information.name for account in accounts] == ['Ann']
+
+
+async def test_account_repository_durable_failed_write(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Test writes whose log append fails are rolled back, newest first, and every later write fails too."""
+    repo = _open(tmp_path)
+    await repo.create_accounts([_account('Ann', 20), _account('Bob', 40)])
+    expected = await _accounts(repo)
+
+    def failed_write(*arguments):
+        raise OSError('disk failed')
+
+    monkeypatch.setattr(write_ahead_log, '_write', failed_write)
+    results = await asyncio.gather(repo.patch_account(_account('Anna', 21, UserId(0))),
+                                   repo.patch_accounts([_account('Annie', 22, UserId(0))]),
+                                   repo.delete_account(UserId(1)), repo.create_account(_account('Eve', 50)),
+                                   return_exceptions=True)
+    accounts = await _accounts(repo)
+    with pytest.raises(OSError):
+        await repo.create_account(_account('Zoë', 30))
+    with pytest.raises(OSError):
+        await repo.snapshot()
+    with pytest.raises(OSError):
+        await repo.close()
+    monkeypatch.undo()
+    restarted = _open(tmp_path)
+    restored = await _accounts(restarted)
+    await restarted.close()
+
+    assert all(isinstance(result, OSError) for result in results)
+    assert accounts == expected
+    assert restored == expected
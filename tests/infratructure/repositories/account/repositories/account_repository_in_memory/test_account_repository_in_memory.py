@@ -9,6 +9,7 @@ from domain.types.pagination_size import PaginationSize
 from domain.types.personal_age import PersonalAge
 from domain.types.personal_name import PersonalName
 from domain.types.user_id import UserId
+from domain.value_objects.account_query import AccountQuery
 from domain.value_objects.pagination import Pagination
 from domain.value_objects.personal_information import PersonalInformation
 from infrastructure.repositories.account.exceptions.account_not_found_error import AccountNotFoundError
@@ -108,3 +109,39 @@ async def test_account_repository_in_memory_delete_not_found(account_repository:
     """Test repository delete workflow when account is not found."""
     with pytest.raises(AccountNotFoundError):
         await account_repository.delete_account(UserId(-1))
+
+
+async def test_account_repository_in_memory_list_after_delete(account_repository: AccountRepositoryInterface,
+                                                              account_3: Account):
+    """Test repository list workflow keeps insertion order once an account is deleted."""
+    await account_repository.delete_account(UserId(1))
+    accounts = await account_repository.get_accounts(Pagination(size=PaginationSize(2), page=PaginationPage(0)))
+
+    assert [account.user.id for account in accounts] == [0, 2]
+    assert accounts[1].user.personal_information == account_3.user.personal_information
+
+
+async def test_account_repository_in_memory_list_after_id(account_repository: AccountRepositoryInterface):
+    """Test repository keyset list workflow does not skip accounts when the previous page changes."""
+    first = await account_repository.get_accounts(Pagination(size=PaginationSize(2)))
+    await account_repository.delete_account(UserId(0))
+    second = await account_repository.get_accounts(Pagination(size=PaginationSize(2), after_id=first[-1].user.id))
+
+    assert [account.user.id for account in first] == [0, 1]
+    assert [account.user.id for account in second] == [2, 3]
+
+
+async def test_account_repository_in_memory_rows(account_repository: AccountRepositoryInMemory, account_1: Account):
+    """Test rows read back by chunks load into another repository with the same listings and next id."""
+    await account_repository.delete_account(UserId(1))
+    rows = account_repository.rows(None, 2) + account_repository.rows(UserId(2), 2)
+    loaded = AccountRepositoryInMemory()
+    loaded.load(*map(list, zip(*rows)), UserId(4))
+    created = await loaded.create_account(account_1.model_copy(deep=True))
+
+    assert [row[0] for row in rows] == [0, 2, 3]
+    assert await loaded.get_accounts(Pagination(size=PaginationSize(10))) == \
+        await account_repository.get_accounts(Pagination(size=PaginationSize(10))) + [created]
+    assert [account.user.id for account in await loaded.get_accounts(
+        Pagination(size=PaginationSize(10)), AccountQuery(sort='name'))] == [0, 3, 4, 2]
+    assert [account.user.id for account in await loaded.search_accounts('Alex', PaginationSize(10))][:1] == [0]
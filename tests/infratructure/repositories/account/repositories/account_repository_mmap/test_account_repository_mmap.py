@@ -0,0 +1,139 @@
+"""Module related with AccountRepositoryMmap tests"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from domain.aggregates.account import Account
+from domain.entities.user import User
+from domain.types.pagination_size import PaginationSize
+from domain.types.personal_age import PersonalAge
+from domain.types.personal_name import PersonalName
+from domain.types.user_id import UserId
+from domain.value_objects.pagination import Pagination
+from domain.value_objects.personal_information import PersonalInformation
+from infrastructure.repositories.account.exceptions.account_not_found_error import AccountNotFoundError
+from infrastructure.repositories.account.repositories.account_repository_mmap.repository import \
+    AccountRepositoryMmap
+
+
+def _account(name: str, age: int) -> Account:
+    return Account(user=User(id=None, personal_information=PersonalInformation(age=PersonalAge(age),
+                                                                              name=PersonalName(name))))
+
+
+async def _create_accounts(path: str, worker: int, count: int) -> List[UserId]:
+    repo = AccountRepositoryMmap(path)
+    user_ids = [(await repo.create_account(_account(f'worker {worker}', index))).user.id for index in range(count)]
+    await repo.close()
+    return user_ids
+
+
+def _create_accounts_in_process(path: str, worker: int, count: int) -> List[UserId]:
+    return asyncio.run(_create_accounts(path, worker, count))
+
+
+async def test_account_repository_mmap_shared(tmp_path: Path, account_1: Account, account_2: Account):
+    """Test repositories opened on the same path see the writes of each other, past the initial capacity."""
+    path = str(tmp_path / 'accounts.mmap')
+    writer = AccountRepositoryMmap(path)
+    reader = AccountRepositoryMmap(path)
+    await writer.create_accounts([_account(f'name {index}', index) for index in range(3000)])
+    await reader.create_account(account_1)
+    await writer.delete_account(UserId(0))
+    account_2.user.id = UserId(1)
+    await writer.patch_account(account_2)
+
+    accounts = await reader.get_accounts(Pagination(size=PaginationSize(2)))
+    created = await writer.get_account(UserId(3000))
+    with pytest.raises(AccountNotFoundError):
+        await reader.get_account(UserId(0))
+    await writer.close()
+    await reader.close()
+
+    assert [account.user.personal_information for account in accounts] == [
+        account_2.user.personal_information, _account('name 2', 2).user.personal_information]
+    assert created.user.personal_information == account_1.user.personal_information
+
+
+async def test_account_repository_mmap_persistence(tmp_path: Path, account_1: Account):
+    """Test accounts and the next id survive reopening the files."""
+    path = str(tmp_path / 'accounts.mmap')
+    repo = AccountRepositoryMmap(path)
+    await repo.create_accounts([_account('Zoë Ångström', 30), account_1])
+    await repo.close()
+
+    repo = AccountRepositoryMmap(path)
+    account = await repo.get_account(UserId(0))
+    created = await repo.create_account(account_1)
+    await repo.close()
+
+    assert account.user.personal_information.name == 'Zoë Ångström'
+    assert created.user.id == 2
+
+
+async def test_account_repository_mmap_compaction(tmp_path: Path):
+    """Test names survive the compaction triggered by deletes and growing patches."""
+    repo = AccountRepositoryMmap(str(tmp_path / 'accounts.mmap'))
+    await repo.create_accounts([_account(f'a rather long name {index}', index) for index in range(6000)])
+    await repo.delete_accounts([UserId(index) for index in range(6000) if index % 3 != 2])
+    await repo.patch_accounts([Account(user=User(id=UserId(index), personal_information=PersonalInformation(
+        age=PersonalAge(1), name=PersonalName(f'a much much longer name {index}')))) for index in range(2, 6000, 6)])
+
+    patched = await repo.get_account(UserId(5996))
+    kept = await repo.get_account(UserId(5999))
+    _, name_bytes, dead_name_bytes, _ = repo._header()
+    await repo.close()
+
+    assert patched.user.personal_information == PersonalInformation(
+        age=PersonalAge(1), name=PersonalName('a much much longer name 5996'))
+    assert kept.user.personal_information == PersonalInformation(
+        age=PersonalAge(5999), name=PersonalName('a rather long name 5999'))
+    assert dead_name_bytes * 2 <= name_bytes
+
+
+async def test_account_repository_mmap_not_an_account_file(tmp_path: Path):
+    """Test a file written by something else is rejected."""
+    path = tmp_path / 'accounts.mmap'
+    path.write_bytes(b'not accounts')
+
+    with pytest.raises(ValueError):
+        AccountRepositoryMmap(str(path))
+
+
+async def test_account_repository_mmap_counts_previous_files(tmp_path: Path):
+    """Test files written before the header counted the accounts are counted when opened."""
+    path = tmp_path / 'accounts.mmap'
+    repo = AccountRepositoryMmap(str(path))
+    await repo.create_accounts([_account('name', index) for index in range(5)])
+    await repo.delete_account(UserId(1))
+    await repo.close()
+    with path.open('r+b') as file:
+        file.write(b'ACCMMAP2')
+        file.seek(32)
+        file.write(bytes(8))
+
+    repo = AccountRepositoryMmap(str(path))
+    count = await repo.count_accounts()
+    await repo.close()
+
+    assert count == 4
+    assert path.read_bytes()[:8] == b'ACCMMAP3'
+
+
+def test_account_repository_mmap_processes(tmp_path: Path):
+    """Test processes creating accounts concurrently get distinct ids and see every account."""
+    path = str(tmp_path / 'accounts.mmap')
+    with ProcessPoolExecutor(4, mp_context=multiprocessing.get_context('spawn')) as executor:
+        user_ids = list(executor.map(_create_accounts_in_process, [path] * 4, range(4), [500] * 4))
+    repo = AccountRepositoryMmap(path)
+    accounts = asyncio.run(repo.get_accounts(Pagination(size=PaginationSize(5000))))
+    asyncio.run(repo.close())
+
+    assert sorted(user_id for worker_ids in user_ids for user_id in worker_ids) == list(range(2000))
+    assert all(worker_ids == sorted(worker_ids) for worker_ids in user_ids)
+    assert [account.user.id for account in accounts] == list(range(2000))
+    assert {account.user.personal_information.name for account in accounts} == {f'worker {index}' for index in range(4)}
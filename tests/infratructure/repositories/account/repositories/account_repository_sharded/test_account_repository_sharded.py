@@ -0,0 +1,83 @@
+"""Module related with ShardedAccountRepository tests"""
+import asyncio
+from typing import Optional
+
+from domain.aggregates.account import Account
+from domain.entities.user import User
+from domain.types.account_version import AccountVersion
+from domain.types.pagination_page import PaginationPage
+from domain.types.pagination_size import PaginationSize
+from domain.types.personal_age import PersonalAge
+from domain.types.personal_name import PersonalName
+from domain.types.user_id import UserId
+from domain.value_objects.account_query import AccountQuery
+from domain.value_objects.pagination import Pagination
+from domain.value_objects.personal_information import PersonalInformation
+from infrastructure.repositories.account.id_allocators.counting import CountingUserIdAllocator
+from infrastructure.repositories.account.repositories.account_repository_in_memory.repository import \
+    AccountRepositoryInMemory
+from infrastructure.repositories.account.repositories.account_repository_sharded.repository import \
+    ShardedAccountRepository
+
+
+class _BlockedAccountRepository(AccountRepositoryInMemory):
+    """In-memory repository whose patches suspend until released, as a repository doing I/O would."""
+
+    def __init__(self, first_id: UserId, id_step: int):
+        super().__init__(id_allocator=CountingUserIdAllocator(first_id, id_step))
+        self.released = asyncio.Event()
+
+    async def patch_account(self, account_aggregate: Account,
+                            expected_version: Optional[AccountVersion] = None) -> Account:
+        await self.released.wait()
+        return await super().patch_account(account_aggregate, expected_version)
+
+
+def _account(name: str, age: int, user_id: Optional[int] = None) -> Account:
+    return Account(user=User(id=user_id, personal_information=PersonalInformation(age=PersonalAge(age),
+                                                                                 name=PersonalName(name))))
+
+
+async def test_account_repository_sharded_partition():
+    """Test accounts are dealt to the shards in turn, each holding the ids at its position modulo the shards."""
+    shards = [AccountRepositoryInMemory(id_allocator=CountingUserIdAllocator(shard, 3)) for shard in range(3)]
+    repo = ShardedAccountRepository(shards)
+    created = await repo.create_account(_account('first', 1))
+    batch = await repo.create_accounts([_account(f'name {index}', index) for index in range(6)])
+
+    assert [account.user.id for account in [created, *batch]] == list(range(7))
+    assert [[account.user.id for account in await shard.get_accounts(Pagination(size=PaginationSize(10)))]
+            for shard in shards] == [[0, 3, 6], [1, 4], [2, 5]]
+
+
+async def test_account_repository_sharded_uneven_pages():
+    """Test pages are complete when most accounts live in one shard, which is then asked for more."""
+    repo = ShardedAccountRepository([AccountRepositoryInMemory(id_allocator=CountingUserIdAllocator(shard, 3))
+                                     for shard in range(3)])
+    await repo.create_accounts([_account(f'name {index}', 30 - index) for index in range(30)])
+    await repo.delete_accounts([UserId(user_id) for user_id in range(30) if user_id % 3 and user_id != 7])
+
+    by_id = await repo.get_accounts(Pagination(size=PaginationSize(6), after_id=UserId(0)))
+    by_age = await repo.get_accounts(Pagination(size=PaginationSize(4), page=PaginationPage(1)),
+                                     AccountQuery(sort='age'))
+
+    assert [account.user.id for account in by_id] == [3, 6, 7, 9, 12, 15]
+    assert [account.user.id for account in by_age] == [15, 12, 9, 7]
+
+
+async def test_account_repository_sharded_locks():
+    """Test a write waiting on its shard holds back the later writes of that shard only, which apply in order."""
+    blocked = _BlockedAccountRepository(0, 2)
+    repo = ShardedAccountRepository([blocked, AccountRepositoryInMemory(id_allocator=CountingUserIdAllocator(1, 2))])
+    await repo.create_accounts([_account('zero', 0), _account('one', 1)])
+
+    first = asyncio.create_task(repo.patch_account(_account('first', 2, 0), expected_version=1))
+    second = asyncio.create_task(repo.patch_account(_account('second', 3, 0), expected_version=2))
+    other = await repo.patch_account(_account('other', 4, 1), expected_version=1)
+    waiting = not first.done() and not second.done()
+    blocked.released.set()
+
+    assert waiting
+    assert other.version == 2
+    assert [(await first).version, (await second).version] == [2, 3]
+    assert (await repo.get_account(UserId(0))).user.personal_information.name == 'second'
@@ -0,0 +1,100 @@
+"""Module related with AccountRepositorySQLite tests"""
+import asyncio
+import sqlite3
+from pathlib import Path
+
+from domain.aggregates.account import Account
+from domain.types.pagination_size import PaginationSize
+from domain.types.user_id import UserId
+from domain.value_objects.pagination import Pagination
+from infrastructure.repositories.account.id_allocators.block_leasing import BlockLeasingUserIdAllocator
+from infrastructure.repositories.account.id_allocators.id_block_leases import SQLiteIdBlockLeases
+from infrastructure.repositories.account.repositories.account_repository_sqlite.repository import \
+    AccountRepositorySQLite
+
+
+async def test_account_repository_sqlite_persistence(tmp_path: Path, account_1: Account, account_2: Account):
+    """Test accounts and the id sequence survive reopening the database."""
+    path = str(tmp_path / 'accounts.sqlite3')
+    repo = AccountRepositorySQLite(path)
+    await repo.create_account(account_1)
+    await repo.create_account(account_2)
+    await repo.delete_account(UserId(1))
+    await repo.close()
+
+    repo = AccountRepositorySQLite(path)
+    account = await repo.get_account(UserId(0))
+    created = await repo.create_account(account_2)
+    await repo.close()
+
+    assert account.user.personal_information == account_1.user.personal_information
+    assert created.user.id == 2
+
+
+async def test_account_repository_sqlite_id_allocator(tmp_path: Path, account_1: Account, account_2: Account):
+    """Test leased ids start past the sequence, which is moved past them for when the database is reopened without."""
+    path = str(tmp_path / 'accounts.sqlite3')
+    repo = AccountRepositorySQLite(path)
+    await repo.create_account(account_1)
+    await repo.close()
+
+    repo = AccountRepositorySQLite(path, id_allocator=BlockLeasingUserIdAllocator(SQLiteIdBlockLeases(path), 10))
+    leased = [account.user.id for account in await repo.create_accounts([account_1, account_2])]
+    await repo.close()
+    repo = AccountRepositorySQLite(path)
+    created = await repo.create_account(account_2)
+    await repo.close()
+
+    assert (leased, created.user.id) == ([1, 2], 3)
+
+
+async def test_account_repository_sqlite_version_migration(tmp_path: Path):
+    """Test a database created before versions gets the column, with its accounts at version 1."""
+    path = tmp_path / 'accounts.sqlite3'
+    with sqlite3.connect(path) as connection:
+        connection.execute('CREATE TABLE accounts (id INTEGER PRIMARY KEY, name TEXT NOT NULL, age INTEGER NOT NULL)')
+        connection.execute("INSERT INTO accounts (id, name, age) VALUES (0, 'Ann', 20)")
+    connection.close()
+
+    repo = AccountRepositorySQLite(str(path))
+    account = await repo.get_account(UserId(0))
+    await repo.close()
+
+    assert account.version == 1
+
+
+async def test_account_repository_sqlite_count_migration(tmp_path: Path):
+    """Test a database created before the account count is counted once, then kept up to date."""
+    path = tmp_path / 'accounts.sqlite3'
+    with sqlite3.connect(path) as connection:
+        connection.execute('CREATE TABLE accounts (id INTEGER PRIMARY KEY, name TEXT NOT NULL, age INTEGER NOT NULL)')
+        connection.executemany('INSERT INTO accounts (id, name, age) VALUES (?, ?, 20)', [(0, 'Ann'), (1, 'Bob')])
+    connection.close()
+
+    repo = AccountRepositorySQLite(str(path))
+    counts = [await repo.count_accounts()]
+    await repo.delete_account(UserId(0))
+    counts.append(await repo.count_accounts())
+    await repo.close()
+
+    assert counts == [2, 1]
+
+
+async def test_account_repository_sqlite_wal(tmp_path: Path):
+    """Test the database is opened in WAL mode."""
+    repo = AccountRepositorySQLite(str(tmp_path / 'accounts.sqlite3'))
+    journal_mode = await repo._pool.run(lambda connection: connection.execute('PRAGMA journal_mode').fetchone()[0])
+    await repo.close()
+
+    assert journal_mode == 'wal'
+
+
+async def test_account_repository_sqlite_concurrent_create(tmp_path: Path, account_1: Account):
+    """Test concurrent creations, more than the pool size, get distinct ids."""
+    repo = AccountRepositorySQLite(str(tmp_path / 'accounts.sqlite3'), pool_size=2)
+    accounts = await asyncio.gather(*(repo.create_account(account_1.model_copy(deep=True)) for _ in range(20)))
+    listed = await repo.get_accounts(Pagination(size=PaginationSize(100)))
+    await repo.close()
+
+    assert sorted(account.user.id for account in accounts) == list(range(20))
+    assert len(listed) == 20
@@ -0,0 +1,52 @@
+from pathlib import Path
+from typing import AsyncIterator
+
+import pytest
+
+from domain.aggregates.account import Account
+from infrastructure.repositories.account.factory import build_account_repository
+from infrastructure.repositories.account.interface import AccountRepositoryInterface
+from settings import Settings
+
+
+_REPOSITORY_SETTINGS = {
+    'in_memory': {'account_repository': 'in_memory'},
+    'columnar': {'account_repository': 'columnar'},
+    'sqlite': {'account_repository': 'sqlite'},
+    'mmap': {'account_repository': 'mmap'},
+    # The log directory is relative to the temporary directory of the test.
+    'in_memory_durable': {'account_repository': 'in_memory', 'account_wal_directory': 'wal'},
+    # A tiny cache, so evictions happen within the tests too.
+    'sqlite_cached': {'account_repository': 'sqlite', 'account_cache_size': 2, 'account_cache_pages': True},
+    'in_memory_sharded': {'account_repository': 'in_memory', 'account_shards': 3},
+    'columnar_sharded': {'account_repository': 'columnar', 'account_shards': 2},
+    # Ids leased in blocks from a store in the temporary directory of the test.
+    'sqlite_leased_ids': {'account_repository': 'sqlite', 'account_id_leases': 'sqlite'},
+    'columnar_sharded_leased_ids': {'account_repository': 'columnar', 'account_shards': 2, 'account_id_leases': 'file',
+                                    'account_id_block_size': 2},
+}
+
+
+@pytest.fixture(params=list(_REPOSITORY_SETTINGS))
+async def empty_account_repository(request: pytest.FixtureRequest,
+                                   tmp_path: Path) -> AsyncIterator[AccountRepositoryInterface]:
+    """Every repository implementation, empty."""
+    settings = _REPOSITORY_SETTINGS[request.param]
+    if 'account_wal_directory' in settings:
+        settings = {**settings, 'account_wal_directory': str(tmp_path / settings['account_wal_directory'])}
+    repo = build_account_repository(Settings(account_sqlite_path=str(tmp_path / 'accounts.sqlite3'),
+                                             account_mmap_path=str(tmp_path / 'accounts.mmap'),
+                                             account_id_lease_path=str(tmp_path / 'account_ids'), **settings))
+    yield repo
+    await repo.close()
+
+
+@pytest.fixture
+async def filled_account_repository(empty_account_repository: AccountRepositoryInterface, account_1: Account,
+                                    account_2: Account, account_3: Account) -> AccountRepositoryInterface:
+    """Every repository implementation, with the same four accounts created in order."""
+    await empty_account_repository.create_account(account_1)
+    await empty_account_repository.create_account(account_2)
+    await empty_account_repository.create_account(account_3)
+    await empty_account_repository.create_account(account_1)
+    return empty_account_repository
@@ -0,0 +1,282 @@
+"""Module related with the tests every AccountRepositoryInterface implementation must pass."""
+import random
+from typing import List, Optional
+
+import pytest
+
+from domain.aggregates.account import Account
+from domain.entities.user import User
+from domain.types.account_sort import AccountSort
+from domain.types.pagination_page import PaginationPage
+from domain.types.pagination_size import PaginationSize
+from domain.types.personal_age import PersonalAge
+from domain.types.personal_name import PersonalName
+from domain.types.user_id import UserId
+from domain.value_objects.account_query import AccountQuery
+from domain.value_objects.pagination import Pagination
+from domain.value_objects.personal_information import PersonalInformation
+from infrastructure.data_structures.trigram_index import SIMILARITY_THRESHOLD, similarity, trigrams
+from infrastructure.repositories.account.exceptions.account_not_found_error import AccountNotFoundError
+from infrastructure.repositories.account.exceptions.account_version_conflict_error import \
+    AccountVersionConflictError
+from infrastructure.repositories.account.interface import AccountRepositoryInterface
+
+
+async def test_account_repository_create(empty_account_repository: AccountRepositoryInterface, account_1: Account):
+    """Test repository creation workflow."""
+    await empty_account_repository.create_account(account_1)
+
+    account = await empty_account_repository.get_account(UserId(0))
+
+    assert account.user.id == 0
+    assert account_1.user.id == 0
+    assert account.user.personal_information == account_1.user.personal_information
+
+
+async def test_account_repository_get(filled_account_repository: AccountRepositoryInterface, account_2: Account):
+    """Test repository get workflow."""
+    account = await filled_account_repository.get_account(UserId(1))
+    assert account.user.personal_information == account_2.user.personal_information
+
+
+async def test_account_repository_get_not_found(filled_account_repository: AccountRepositoryInterface):
+    """Test repository get workflow with a missing account."""
+    with pytest.raises(AccountNotFoundError):
+        await filled_account_repository.get_account(UserId(-1))
+
+
+async def test_account_repository_list(filled_account_repository: AccountRepositoryInterface, account_1: Account,
+                                       account_3: Account):
+    """Test repository list workflow."""
+    accounts = await filled_account_repository.get_accounts(Pagination(size=PaginationSize(2), page=PaginationPage(1)))
+
+    assert len(accounts) == 2
+    assert accounts[0].user.personal_information == account_3.user.personal_information
+    assert accounts[1].user.personal_information == account_1.user.personal_information
+
+
+async def test_account_repository_list_after_id(filled_account_repository: AccountRepositoryInterface):
+    """Test repository keyset list workflow does not skip accounts when the previous page changes."""
+    first = await filled_account_repository.get_accounts(Pagination(size=PaginationSize(2)))
+    await filled_account_repository.delete_account(UserId(0))
+    second = await filled_account_repository.get_accounts(Pagination(size=PaginationSize(2),
+                                                                     after_id=first[-1].user.id))
+
+    assert [account.user.id for account in first] == [0, 1]
+    assert [account.user.id for account in second] == [2, 3]
+
+
+async def test_account_repository_patch(filled_account_repository: AccountRepositoryInterface, account_1: Account):
+    """Test repository patch workflow."""
+    personal_information = PersonalInformation(
+        age=PersonalAge(99),
+        name=PersonalName("test")
+    )
+
+    account_1.user.personal_information = personal_information
+    account_resp = await filled_account_repository.patch_account(account_1)
+
+    account = await filled_account_repository.get_account(account_1.user.id)
+
+    assert account.user.personal_information == personal_information
+    assert account_resp.user.personal_information == personal_information
+
+
+async def test_account_repository_patch_not_found(filled_account_repository: AccountRepositoryInterface,
+                                                  account_1: Account):
+    """Test repository patch workflow when account is not found."""
+    account_1.user.id = UserId(-1)
+    with pytest.raises(AccountNotFoundError):
+        await filled_account_repository.patch_account(account_1)
+
+
+async def test_account_repository_versions(filled_account_repository: AccountRepositoryInterface,
+                                           account_1: Account):
+    """Test repository bumps the version on every patch and rejects a patch at another expected version."""
+    created = await filled_account_repository.create_account(account_1.model_copy(deep=True))
+    patched = await filled_account_repository.patch_account(created.model_copy(deep=True), expected_version=1)
+    batch_patched, = await filled_account_repository.patch_accounts([patched.model_copy(deep=True)])
+
+    with pytest.raises(AccountVersionConflictError):
+        await filled_account_repository.patch_account(created.model_copy(deep=True), expected_version=2)
+    account = await filled_account_repository.get_account(created.user.id)
+
+    assert [created.version, patched.version, batch_patched.version, account.version] == [1, 2, 3, 3]
+
+
+async def test_account_repository_delete(filled_account_repository: AccountRepositoryInterface):
+    """Test repository delete workflow."""
+    accounts_past = await filled_account_repository.get_accounts(Pagination(size=PaginationSize(999)))
+
+    await filled_account_repository.delete_account(UserId(1))
+    accounts_present = await filled_account_repository.get_accounts(Pagination(size=PaginationSize(999)))
+    assert len(accounts_past) == 4
+    assert [account.user.id for account in accounts_present] == [0, 2, 3]
+    with pytest.raises(AccountNotFoundError):
+        await filled_account_repository.get_account(UserId(1))
+
+
+async def test_account_repository_delete_not_found(filled_account_repository: AccountRepositoryInterface):
+    """Test repository delete workflow when account is not found."""
+    with pytest.raises(AccountNotFoundError):
+        await filled_account_repository.delete_account(UserId(-1))
+
+
+async def test_account_repository_create_accounts(filled_account_repository: AccountRepositoryInterface,
+                                                  account_1: Account, account_2: Account):
+    """Test repository batch creation workflow allocates ids in order."""
+    accounts = await filled_account_repository.create_accounts([account_2.model_copy(deep=True),
+                                                                account_1.model_copy(deep=True)])
+    listed = await filled_account_repository.get_accounts(Pagination(size=PaginationSize(2), after_id=UserId(3)))
+
+    assert [account.user.id for account in accounts] == [4, 5]
+    assert [account.user.personal_information for account in listed] == [account_2.user.personal_information,
+                                                                         account_1.user.personal_information]
+    assert await filled_account_repository.create_accounts([]) == []
+
+
+async def test_account_repository_patch_accounts(filled_account_repository: AccountRepositoryInterface,
+                                                 account_1: Account, account_2: Account):
+    """Test repository batch patch workflow reports missing accounts."""
+    missing = account_2.model_copy(deep=True)
+    missing.user.id = UserId(99)
+    account_1.user.id = UserId(2)
+    account_1.user.personal_information = PersonalInformation(age=PersonalAge(5), name=PersonalName("batch"))
+
+    results = await filled_account_repository.patch_accounts([missing, account_1])
+
+    assert results == [None, account_1]
+    assert (await filled_account_repository.get_account(UserId(2))).user.personal_information.name == "batch"
+
+
+async def test_account_repository_delete_accounts(filled_account_repository: AccountRepositoryInterface):
+    """Test repository batch delete workflow reports missing accounts."""
+    results = await filled_account_repository.delete_accounts([UserId(1), UserId(99), UserId(1), UserId(3)])
+    accounts = await filled_account_repository.get_accounts(Pagination(size=PaginationSize(999)))
+
+    assert results == [True, False, False, True]
+    assert [account.user.id for account in accounts] == [0, 2]
+
+
+async def test_account_repository_get_accounts_by_ids(filled_account_repository: AccountRepositoryInterface,
+                                                      account_1: Account, account_2: Account):
+    """Test repository multi-get returns the accounts in the order given, with None for the missing ones."""
+    accounts = await filled_account_repository.get_accounts_by_ids([UserId(1), UserId(99), UserId(0), UserId(1)])
+
+    assert [account.user.id if account is not None else None for account in accounts] == [1, None, 0, 1]
+    assert accounts[1:3] == [None, await filled_account_repository.get_account(UserId(0))]
+    assert accounts[0].user.personal_information == account_2.user.personal_information
+    assert await filled_account_repository.get_accounts_by_ids([]) == []
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 4, 100])
+async def test_account_repository_iter_accounts(filled_account_repository: AccountRepositoryInterface,
+                                                chunk_size: int):
+    """Test repository iteration yields every account once, in id order, whatever the chunk size."""
+    await filled_account_repository.delete_account(UserId(1))
+
+    user_ids = [account.user.id
+                async for account in filled_account_repository.iter_accounts(PaginationSize(chunk_size))]
+
+    assert user_ids == [0, 2, 3]
+
+
+_QUERIES = [AccountQuery(sort=sort, min_age=min_age, max_age=max_age) for sort in ('id', 'age', 'name')
+            for min_age, max_age in ((None, None), (3, 3), (5, 25), (20, None), (None, 4), (31, None))]
+
+
+@pytest.fixture
+async def random_account_repository(
+        empty_account_repository: AccountRepositoryInterface) -> AccountRepositoryInterface:
+    """Every repository implementation, with random accounts created, patched and deleted."""
+    generator = random.Random(0)
+    accounts = await empty_account_repository.create_accounts([
+        Account(user=User(id=None, personal_information=PersonalInformation(
+            age=PersonalAge(generator.randrange(30)), name=PersonalName(generator.choice('abcdef') * 2))))
+        for _ in range(120)
+    ])
+    for account in generator.sample(accounts, 30):
+        account.user.personal_information = PersonalInformation(age=PersonalAge(generator.randrange(30)),
+                                                                name=PersonalName(generator.choice('abcdef')))
+        await empty_account_repository.patch_account(account)
+    await empty_account_repository.delete_accounts([UserId(user_id) for user_id in generator.sample(range(120), 30)])
+    return empty_account_repository
+
+
+def _expected(accounts: List[Account], query: AccountQuery) -> List[UserId]:
+    matching = [account for account in accounts if query.matches(account.user.personal_information.age)]
+    if query.sort != 'id':
+        matching.sort(key=lambda account: (getattr(account.user.personal_information, query.sort), account.user.id))
+    return [account.user.id for account in matching]
+
+
+@pytest.mark.parametrize('query', _QUERIES, ids=str)
+async def test_account_repository_query_pages(random_account_repository: AccountRepositoryInterface,
+                                              query: AccountQuery):
+    """Test repository filtered and sorted listing workflow, by offset and by keyset."""
+    expected = _expected(await random_account_repository.get_accounts(Pagination(size=PaginationSize(999))), query)
+
+    by_offset = []
+    for page in range(len(expected) // 7 + 2):
+        by_offset += await random_account_repository.get_accounts(
+            Pagination(size=PaginationSize(7), page=PaginationPage(page)), query)
+    by_keyset = []
+    last: Optional[Account] = None
+    while True:
+        pagination = Pagination(size=PaginationSize(7)) if last is None else Pagination(
+            size=PaginationSize(7), after_id=last.user.id,
+            after_value=None if query.sort == 'id' else getattr(last.user.personal_information, query.sort))
+        page = await random_account_repository.get_accounts(pagination, query)
+        by_keyset += page
+        if len(page) < 7:
+            break
+        last = page[-1]
+
+    assert [account.user.id for account in by_offset] == expected
+    assert [account.user.id for account in by_keyset] == expected
+
+
+@pytest.mark.parametrize('query', [query for query in _QUERIES if query.sort == 'id'], ids=str)
+async def test_account_repository_count_accounts(random_account_repository: AccountRepositoryInterface,
+                                                 query: AccountQuery):
+    """Test repository counts the accounts matching the age bounds, kept up to date by creates and deletes."""
+    accounts = await random_account_repository.get_accounts(Pagination(size=PaginationSize(999)))
+    count = await random_account_repository.count_accounts(query)
+    await random_account_repository.delete_accounts([accounts[0].user.id, accounts[0].user.id, UserId(999)])
+    await random_account_repository.create_account(accounts[0])
+
+    assert count == len(_expected(accounts, query))
+    assert await random_account_repository.count_accounts(query) == count
+    assert await random_account_repository.count_accounts() == 90
+
+
+@pytest.mark.parametrize('sort', ['id', 'age', 'name'])
+async def test_account_repository_fields(random_account_repository: AccountRepositoryInterface, sort: AccountSort):
+    """Test repository listings with fields hold those fields, the id and the sort field, and the same accounts."""
+    query = AccountQuery(sort=sort, min_age=5, max_age=25, fields={'version'})
+    accounts = await random_account_repository.get_accounts(Pagination(size=PaginationSize(999)), query)
+    last = accounts[len(accounts) // 2]
+    after_last = await random_account_repository.get_accounts(Pagination(
+        size=PaginationSize(999), after_id=last.user.id,
+        after_value=None if sort == 'id' else getattr(last.user.personal_information, sort)), query)
+    complete = await random_account_repository.get_accounts(Pagination(size=PaginationSize(999)),
+                                                            AccountQuery(sort=sort, min_age=5, max_age=25))
+
+    assert [(account.user.id, account.version) for account in accounts] == \
+        [(account.user.id, account.version) for account in complete]
+    assert after_last == accounts[len(accounts) // 2 + 1:]
+    assert {(account.user.personal_information.name is None, account.user.personal_information.age is None)
+            for account in accounts} == {(sort != 'name', sort != 'age')}
+
+@pytest.mark.parametrize('text', ['aa', 'a', 'bb cc', 'zz', ''])
+async def test_account_repository_search_accounts(random_account_repository: AccountRepositoryInterface, text: str):
+    """Test repository search workflow ranks accounts by name similarity, then by id."""
+    accounts = await random_account_repository.get_accounts(Pagination(size=PaginationSize(999)))
+    scores = [(similarity(trigrams(text), trigrams(account.user.personal_information.name)), account.user.id)
+              for account in accounts]
+    expected = sorted((match for match in scores if match[0] >= SIMILARITY_THRESHOLD),
+                      key=lambda match: (-match[0], match[1]))
+
+    found = await random_account_repository.search_accounts(text, PaginationSize(5))
+
+    assert [account.user.id for account in found] == [user_id for _, user_id in expected[:5]]
@@ -0,0 +1,57 @@
+"""Module related with application factory tests."""
+import logging
+from pathlib import Path
+
+import pytest
+from starlette.testclient import TestClient
+
+import main
+from infrastructure.metrics.registry import REGISTRY
+from infrastructure.repositories.account.repositories.account_repository_sqlite.repository import \
+    AccountRepositorySQLite
+from main import create_app
+from settings import Settings
+
+
+def test_create_app(tmp_path: Path, caplog: pytest.LogCaptureFixture):
+    """Test the application opens the configured repository and warms up on startup, and logs its duration."""
+    app = create_app(Settings(account_repository='sqlite', account_sqlite_path=str(tmp_path / 'accounts.sqlite3'),
+                              metrics_enabled=False))
+    assert not hasattr(app.state, 'account_service')
+
+    metrics = REGISTRY.render()
+    with caplog.at_level(logging.INFO, logger='main'), TestClient(app) as client:
+        assert app.openapi_schema is not None
+        created = client.post('/api/account/', json={'user': {'id': None,
+                                                              'personal_information': {'age': 3, 'name': 'Ann'}}})
+        assert client.get(f'/api/account/{created.json()["user"]["id"]}').json() == created.json()
+        assert client.get('/metrics').status_code == 404
+        assert REGISTRY.render() == metrics
+    with TestClient(app) as client:
+        assert client.get(f'/api/account/{created.json()["user"]["id"]}').status_code == 200
+
+    assert 'repository' in caplog.records[0].getMessage()
+    assert (tmp_path / 'accounts.sqlite3').exists()
+
+
+def test_create_app_startup_failure(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Test the repository is closed when a startup step after opening it fails."""
+    closed = []
+    close = AccountRepositorySQLite.close
+
+    async def record_close(self: AccountRepositorySQLite):
+        closed.append(self)
+        await close(self)
+
+    def fail():
+        raise RuntimeError('warm up failed')
+
+    monkeypatch.setattr(AccountRepositorySQLite, 'close', record_close)
+    monkeypatch.setattr(main, '_warm_up_serialization', fail)
+    app = create_app(Settings(account_repository='sqlite', account_sqlite_path=str(tmp_path / 'accounts.sqlite3'),
+                              metrics_enabled=False))
+
+    with pytest.raises(RuntimeError), TestClient(app):
+        pass
+
+    assert len(closed) == 1
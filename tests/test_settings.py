@@ -0,0 +1,36 @@
+"""Module related with settings tests."""
+import pytest
+from pydantic import ValidationError
+
+from settings import Settings
+
+
+def test_settings_from_env():
+    """Test settings are read from upper case environment variables."""
+    settings = Settings.from_env({'ACCOUNT_REPOSITORY': 'sqlite', 'ACCOUNT_SQLITE_POOL_SIZE': '8', 'OTHER': 'x'})
+
+    assert settings.account_repository == 'sqlite'
+    assert settings.account_sqlite_pool_size == 8
+    assert settings.account_sqlite_path == Settings().account_sqlite_path
+
+
+def test_settings_from_env_invalid():
+    """Test unknown repositories are rejected."""
+    with pytest.raises(ValidationError):
+        Settings.from_env({'ACCOUNT_REPOSITORY': 'unknown'})
+
+
+def test_settings_shards_invalid():
+    """Test shards are rejected for the repositories that can not be sharded."""
+    assert Settings(account_shards=4).account_shards == 4
+    with pytest.raises(ValidationError):
+        Settings(account_repository='sqlite', account_shards=2)
+    with pytest.raises(ValidationError):
+        Settings(account_shards=2, account_wal_directory='wal')
+
+
+def test_settings_id_leases_invalid():
+    """Test id leases are rejected for the mmap repository, which allocates its own ids."""
+    assert Settings(account_repository='sqlite', account_id_leases='file').account_id_leases == 'file'
+    with pytest.raises(ValidationError):
+        Settings(account_repository='mmap', account_id_leases='sqlite')